@@ -0,0 +1,434 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Measures how fast the random walk simulation and the plotting scale"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+import walker
+
+# the walking times, numbers of walker and walking speeds of the default grid
+WALKING_TIMES = [10**2, 10**3, 10**4, 10**5, 10**6, 10**7]
+WALKER_COUNTS = [1, 10, 100]
+WALKING_SPEEDS = [1, 2, 4]
+# cases with more steps than this in total are skipped
+MAX_STEPS = 10**8
+# the relative slowdown or additional memory allowed before a case counts as regression
+TOLERANCE = 0.5
+GRID_BENCHMARKS = ("walker", "scene", "plot")
+BENCHMARKS = GRID_BENCHMARKS + ("startup",)
+# the longest time importing walker may take, e.g. for the CLI called by a workflow
+STARTUP_BUDGET = 0.5
+# the number of times the import is timed at least, as a single import is noisy
+STARTUP_REPEATS = 5
+# times the import inside the new process, without starting the interpreter
+STARTUP_SCRIPT = (
+    "import time; start = time.perf_counter(); import walker; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def measure(function, repeats: int = 1) -> tuple:
+    """
+    Measures the time and the peak memory a function needs. The time is measured
+        without tracing the memory, as the tracing slows down the function
+    :param function: the function to be measured, it is called without arguments
+    :param repeats: the number of times the function is timed, the fastest one counts
+    :return: a tuple of the seconds and the peak memory in bytes
+    """
+    seconds = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        seconds.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        function()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(seconds), peak_memory
+
+
+def measure_startup(repeats: int = STARTUP_REPEATS) -> dict:
+    """
+    Measures the time a new Python process needs to import walker, which every call of
+        the CLI pays before doing anything. The import is timed inside the process, so
+        the startup of the interpreter itself is not counted
+    :param repeats: the number of new processes the import is timed in, the median
+        counts
+    :return: a dictionary describing the case and holding the measurements
+    """
+    seconds = []
+    for _ in range(repeats):
+        process = subprocess.run(
+            [sys.executable, "-c", STARTUP_SCRIPT],
+            cwd=os.path.dirname(os.path.abspath(walker.__file__)),
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        seconds.append(float(process.stdout))
+    return {
+        "benchmark": "startup",
+        "walking_time": 0,
+        "number_of_walker": 0,
+        "walking_speed": 0,
+        "steps": 0,
+        "seconds": float(np.median(seconds)),
+        "steps_per_second": 0,
+        "peak_memory": 0,
+        "budget": STARTUP_BUDGET,
+    }
+
+
+def run_case(
+    benchmark: str,
+    walking_time: int,
+    number_of_walker: int,
+    walking_speed: int,
+    repeats: int = 1,
+    seed: int = 0,
+) -> dict:
+    """
+    Measures one case of the grid
+    :param benchmark: 'walker' calculates the path of each walker on its own, 'scene'
+        calculates all walker with create_scene and 'plot' plots the paths without
+        showing them
+    :param walking_time: the walking time of the walker
+    :param number_of_walker: the number of walker
+    :param walking_speed: the walking speed of all walker
+    :param repeats: the number of times the case is timed
+    :param seed: the seed of the walker
+    :return: a dictionary describing the case and holding the measurements
+    """
+    assert (
+        benchmark in GRID_BENCHMARKS
+    ), "The benchmark must be one of {}. You stated '{}'".format(
+        GRID_BENCHMARKS, benchmark
+    )
+    walking_speeds = [walking_speed] * number_of_walker
+    if benchmark == "walker":
+
+        def function():
+            for index in range(number_of_walker):
+                walker.Walker(
+                    walking_time, walking_speed, seed=seed + index
+                ).calculate_the_path()
+
+    elif benchmark == "scene":
+
+        def function():
+            walker.create_scene(walking_time, walking_speeds, seed=seed)
+
+    else:
+        scene = walker.create_scene(walking_time, walking_speeds, seed=seed)
+        outfile = tempfile.NamedTemporaryFile(suffix=".png", delete=False)
+        outfile.close()
+
+        def function():
+            walker.plot_the_paths(scene, outfile.name, show=False)
+
+    try:
+        seconds, peak_memory = measure(function, repeats)
+    finally:
+        if benchmark == "plot":
+            os.remove(outfile.name)
+    steps = number_of_walker * walking_time * walking_speed
+    return {
+        "benchmark": benchmark,
+        "walking_time": walking_time,
+        "number_of_walker": number_of_walker,
+        "walking_speed": walking_speed,
+        "steps": steps,
+        "seconds": seconds,
+        "steps_per_second": steps / seconds if seconds > 0 else float("inf"),
+        "peak_memory": peak_memory,
+    }
+
+
+def run_benchmarks(
+    walking_times: list = None,
+    walker_counts: list = None,
+    walking_speeds: list = None,
+    benchmarks: list = None,
+    max_steps: int = MAX_STEPS,
+    repeats: int = 1,
+    tolerance: float = TOLERANCE,
+) -> dict:
+    """
+    Measures all cases of the grid of walking times, numbers of walker and speeds
+    :param walking_times: the walking times, by default WALKING_TIMES
+    :param walker_counts: the numbers of walker, by default WALKER_COUNTS
+    :param walking_speeds: the walking speeds, by default WALKING_SPEEDS
+    :param benchmarks: the benchmarks to run, by default all of BENCHMARKS
+    :param max_steps: cases with more steps than this in total are skipped. Plotting
+        is limited to 12 walker like plot_the_paths
+    :param repeats: the number of times each case is timed
+    :param tolerance: the relative slowdown or additional memory allowed, which sets
+        the regression thresholds of each case
+    :return: a dictionary holding the machine the benchmarks ran on and the results
+    """
+    results = []
+    if "startup" in (benchmarks or BENCHMARKS):
+        result = measure_startup(max(repeats, STARTUP_REPEATS))
+        result["max_seconds"] = result["seconds"] * (1 + tolerance)
+        result["max_peak_memory"] = 0
+        results.append(result)
+        print("startup: {seconds:9.4f} s".format(**result))
+    for benchmark in benchmarks or BENCHMARKS:
+        if benchmark == "startup":
+            continue
+        for walking_time in walking_times or WALKING_TIMES:
+            for number_of_walker in walker_counts or WALKER_COUNTS:
+                for walking_speed in walking_speeds or WALKING_SPEEDS:
+                    steps = number_of_walker * walking_time * walking_speed
+                    if steps > max_steps or (
+                        benchmark == "plot" and number_of_walker > 12
+                    ):
+                        continue
+                    result = run_case(
+                        benchmark,
+                        walking_time,
+                        number_of_walker,
+                        walking_speed,
+                        repeats,
+                    )
+                    result["max_seconds"] = result["seconds"] * (1 + tolerance)
+                    result["max_peak_memory"] = int(
+                        result["peak_memory"] * (1 + tolerance)
+                    )
+                    results.append(result)
+                    print(
+                        "{benchmark:>6} time {walking_time:>8} "
+                        "walker {number_of_walker:>3} speed {walking_speed}: "
+                        "{seconds:9.4f} s, "
+                        "{steps_per_second:12.0f} steps/s, "
+                        "{peak_memory:>11} bytes".format(**result)
+                    )
+    return {
+        "machine": {
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+        },
+        "results": results,
+    }
+
+
+def find_regressions(results: dict, baseline: dict) -> list:
+    """
+    Compares results to the thresholds of a baseline
+    :param results: the results of run_benchmarks
+    :param baseline: earlier results of run_benchmarks holding the thresholds
+    :return: a list of messages, one for each case slower or bigger than allowed
+    """
+    thresholds = {
+        (
+            result["benchmark"],
+            result["walking_time"],
+            result["number_of_walker"],
+            result["walking_speed"],
+        ): result
+        for result in baseline["results"]
+    }
+    regressions = []
+    for result in results["results"]:
+        key = (
+            result["benchmark"],
+            result["walking_time"],
+            result["number_of_walker"],
+            result["walking_speed"],
+        )
+        if key not in thresholds:
+            continue
+        threshold = thresholds[key]
+        if result["seconds"] > threshold["max_seconds"]:
+            regressions.append(
+                "{} took {:.4f} s instead of at most {:.4f} s".format(
+                    key, result["seconds"], threshold["max_seconds"]
+                )
+            )
+        if result["peak_memory"] > threshold["max_peak_memory"]:
+            regressions.append(
+                "{} needed {} bytes instead of at most {} bytes".format(
+                    key, result["peak_memory"], threshold["max_peak_memory"]
+                )
+            )
+    return regressions
+
+
+def find_budget_overruns(results: dict) -> list:
+    """
+    Checks the results which have a fixed budget, like the startup time
+    :param results: the results of run_benchmarks
+    :return: a list of messages, one for each case taking longer than its budget
+    """
+    return [
+        "{} took {:.4f} s instead of at most {:.4f} s".format(
+            result["benchmark"], result["seconds"], result["budget"]
+        )
+        for result in results["results"]
+        if "budget" in result and result["seconds"] > result["budget"]
+    ]
+
+
+def plot_scaling(results: dict, outfile_name: str) -> None:
+    """
+    Plots the steps per second against the length of the paths, one line for each
+        benchmark, number of walker and speed
+    :param results: the results of run_benchmarks
+    :param outfile_name: the image to be created
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=(10, 6))
+    FigureCanvasAgg(figure)
+    axes = figure.add_subplot()
+    lines = {}
+    for result in results["results"]:
+        if result["steps"] == 0:
+            continue
+        key = (
+            result["benchmark"],
+            result["number_of_walker"],
+            result["walking_speed"],
+        )
+        lines.setdefault(key, []).append(
+            (
+                result["walking_time"] * result["walking_speed"] + 1,
+                result["steps_per_second"],
+            )
+        )
+    for (benchmark, number_of_walker, walking_speed), points in sorted(lines.items()):
+        path_lengths, steps_per_second = zip(*sorted(points))
+        axes.plot(
+            path_lengths,
+            steps_per_second,
+            marker="o",
+            label="{}, {} walker, speed {}".format(
+                benchmark, number_of_walker, walking_speed
+            ),
+        )
+    axes.set_xscale("log")
+    axes.set_yscale("log")
+    axes.set_xlabel("path length (steps)")
+    axes.set_ylabel("steps per second")
+    axes.legend(fontsize="small")
+    figure.savefig(outfile_name)
+
+
+def parse_arguments(arguments: list = None) -> argparse.Namespace:
+    """
+    Reads in the specifications defined by the user
+    :param arguments: the command line arguments. If None, they are taken from sys.argv
+    :return: the namespace holding the specifications
+    """
+    parser = argparse.ArgumentParser(
+        description="Measures how fast the random walk simulation and the plotting "
+        "scale",
+        epilog="Example: 'python benchmark.py results.json --plot scaling.png "
+        "--baseline old_results.json'",
+    )
+    parser.add_argument("outfile_name", help="the JSON file the results are saved to")
+    parser.add_argument(
+        "--walking-times",
+        type=int,
+        nargs="+",
+        default=WALKING_TIMES,
+        help="the walking times (default: 10^2 to 10^7)",
+    )
+    parser.add_argument(
+        "--walker-counts",
+        type=int,
+        nargs="+",
+        default=WALKER_COUNTS,
+        help="the numbers of walker (default: 1 10 100)",
+    )
+    parser.add_argument(
+        "--speeds",
+        type=int,
+        nargs="+",
+        default=WALKING_SPEEDS,
+        help="the walking speeds, any positive integers (default: 1 2 4)",
+    )
+    parser.add_argument(
+        "--benchmarks",
+        nargs="+",
+        choices=BENCHMARKS,
+        default=list(BENCHMARKS),
+        help="the benchmarks to run (default: all)",
+    )
+    parser.add_argument(
+        "--max-steps",
+        type=int,
+        default=MAX_STEPS,
+        help="cases with more steps in total are skipped (default: 10^8)",
+    )
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        default=1,
+        help="the number of times each case is timed, the fastest counts (default: 1)",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=TOLERANCE,
+        help="the relative slowdown or additional memory allowed in later runs "
+        "(default: 0.5)",
+    )
+    parser.add_argument(
+        "--baseline",
+        default=None,
+        help="earlier results whose thresholds the results are checked against. "
+        "Regressions are reported and the exit code is 1",
+    )
+    parser.add_argument(
+        "--plot", default=None, help="an image of the steps per second to be created"
+    )
+    return parser.parse_args(arguments)
+
+
+def main(arguments: list = None) -> int:
+    """
+    The main program. Runs the benchmarks, saves the results and checks them
+    :param arguments: the command line arguments. If None, they are taken from sys.argv
+    :return: the exit code, 1 if there are regressions
+    """
+    arguments = parse_arguments(arguments)
+    results = run_benchmarks(
+        arguments.walking_times,
+        arguments.walker_counts,
+        arguments.speeds,
+        arguments.benchmarks,
+        arguments.max_steps,
+        arguments.repeats,
+        arguments.tolerance,
+    )
+    with open(arguments.outfile_name, "w") as outfile:
+        json.dump(results, outfile, indent=1)
+    if arguments.plot is not None:
+        plot_scaling(results, arguments.plot)
+    regressions = find_budget_overruns(results)
+    if arguments.baseline is not None:
+        with open(arguments.baseline) as infile:
+            regressions += find_regressions(results, json.load(infile))
+    for regression in regressions:
+        print("Regression:", regression)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
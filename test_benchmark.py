@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Contains tests for the benchmark suite"""
+
+import json
+import os
+import tempfile
+
+from matplotlib.image import imread
+
+import benchmark
+
+
+def test_benchmark_results_and_regressions():
+    """Tests whether the benchmarks save their results and the scaling plot and find
+    regressions compared to a baseline"""
+    with tempfile.TemporaryDirectory() as tmp_dirname:
+        results_file = os.path.join(tmp_dirname, "results.json")
+        plot_file = os.path.join(tmp_dirname, "scaling.png")
+        arguments = [
+            results_file,
+            "--walking-times",
+            "10",
+            "100",
+            "--walker-counts",
+            "1",
+            "--speeds",
+            "1",
+            "4",
+            "--benchmarks",
+            "walker",
+            "scene",
+            "plot",
+            "--plot",
+            plot_file,
+        ]
+        assert benchmark.main(arguments) == 0
+        with open(results_file) as infile:
+            results = json.load(infile)
+        assert len(results["results"]) == 3 * 2 * 1 * 2
+        for result in results["results"]:
+            assert result["seconds"] <= result["max_seconds"]
+            assert result["peak_memory"] <= result["max_peak_memory"]
+            assert result["steps"] == (
+                result["walking_time"]
+                * result["number_of_walker"]
+                * result["walking_speed"]
+            )
+        assert len(imread(plot_file).shape) == 3
+        # a baseline which was much faster and smaller
+        for result in results["results"]:
+            result["max_seconds"] = 0
+            result["max_peak_memory"] = 0
+        baseline_file = os.path.join(tmp_dirname, "baseline.json")
+        with open(baseline_file, "w") as outfile:
+            json.dump(results, outfile)
+        assert (
+            benchmark.main(
+                arguments + ["--benchmarks", "walker", "--baseline", baseline_file]
+            )
+            == 1
+        )
+        regressions = benchmark.find_regressions(results, results)
+        assert len(regressions) == 2 * len(results["results"])
+
+
+def test_startup_budget():
+    """Tests whether the startup time is measured and checked against its budget"""
+    results = benchmark.run_benchmarks(benchmarks=["startup"])
+    assert len(results["results"]) == 1
+    startup = results["results"][0]
+    assert 0 < startup["seconds"] <= startup["max_seconds"]
+    startup["budget"] = 0
+    assert len(benchmark.find_budget_overruns(results)) == 1
@@ -2,12 +2,16 @@
 # -*- coding: utf-8 -*-
 """Contains tests for the walker class"""
 
+import json
 import os
+import subprocess
+import sys
 import tempfile
 
 import numpy as np
 import pytest
 from matplotlib.image import imread
+from PIL import Image
 
 import walker
 
@@ -71,16 +75,48 @@ def test_scene_creation_invalid_input_negative_number_of_walker():
         )
 
 
-def test_scene_creation_invalid_input_too_many_walker():
-    """Tests whether the validation check of the user input works and stops the
-    calculation due to invalid inputs"""
+def test_plotting_invalid_input_too_many_walker():
+    """Tests whether a scene with more than 12 walker can be created, but plotting
+    each walker in its own subplot is stopped"""
+    scene = walker.create_walker(
+        walking_time=1,
+        number_of_usual_walker=10,
+        number_of_fast_walker=2,
+        number_of_running_walker=2,
+    )
+    assert len(scene) == 14
     with pytest.raises(AssertionError):  # error more than 12 walker
-        walker.create_walker(
-            walking_time=1,
-            number_of_usual_walker=10,
-            number_of_fast_walker=2,
-            number_of_running_walker=2,
+        walker.plot_the_paths(scene, "too_many_walker.png")
+
+
+def test_command_line_rejects_too_many_plotted_walker():
+    """Tests whether the command line refuses to plot more than 12 walker one by one
+    before walking, but accepts them in modes which don't plot each walker"""
+    with pytest.raises(SystemExit):
+        walker.parse_arguments(["10", "14", "0", "0", "out.png", "--no-show"])
+    with pytest.raises(SystemExit):
+        walker.parse_arguments(
+            ["10", "14", "0", "0", "--no-plot", "--animate", "a.gif"]
+        )
+    for options in (["--render-mode", "heatmap"], ["--render-workers", "2"]):
+        assert walker.parse_arguments(["10", "14", "0", "0", "out.png", *options])
+    assert walker.parse_arguments(["10", "14", "0", "0", "--no-plot"])
+
+
+def test_command_line_statistics_need_an_outfile():
+    """Tests whether the command line refuses to calculate statistics without a file
+    to save them to, instead of failing after walking"""
+    with pytest.raises(SystemExit):
+        walker.parse_arguments(["10", "2", "0", "0", "--stats", "--no-plot"])
+    with tempfile.TemporaryDirectory() as tmp_dirname:
+        outfile = os.path.join(tmp_dirname, "statistics.json")
+        walker.run(
+            walker.parse_arguments(
+                ["10", "2", "0", "0", outfile, "--stats", "--no-plot", "--no-cache"]
+            )
         )
+        with open(outfile) as infile:
+            assert json.load(infile)
 
 
 def test_usual_walker_coordinate_length():
@@ -244,3 +280,896 @@ def test_plotting():
         walker.plot_the_paths([test_walker], outfile)
         image = imread(outfile)
         assert len(image.shape) == 3
+
+
+def test_vectorized_path_avoids_building():
+    """Tests whether the vectorized engine calculates a path of unit steps which never
+    enters the building. The walker runs long enough to cross several blocks and to
+    try to walk into the building many times"""
+    walking_time = 5000
+    walking_speed = 4
+    test_walker = walker.Walker(walking_time, walking_speed)
+    test_walker.calculate_the_path(engine="vectorized")
+    x_difference = np.abs(np.diff(test_walker.x_coordinates))
+    y_difference = np.abs(np.diff(test_walker.y_coordinates))
+    assert len(test_walker.x_coordinates) == walking_time * walking_speed + 1
+    assert np.all(x_difference + y_difference == 1)
+    inside = walker.inside_buildings(
+        test_walker.x_coordinates[None, :],
+        test_walker.y_coordinates[None, :],
+        np.array([test_walker.building]),
+    )
+    assert not inside.any()
+
+
+def test_walk_block_step_distribution():
+    """Tests whether the vectorized engine chooses each direction with the same
+    probability if the building is out of reach"""
+    building = np.array([[1000.5, 1010.5, 1000.5, 1010.5]])
+    step_generator, collision_generator = walker.create_random_streams(
+        np.random.SeedSequence(1)
+    )
+    directions, _, _ = walker.walk_block(
+        np.array([0]),
+        np.array([0]),
+        building,
+        [40000],
+        [step_generator],
+        [collision_generator],
+    )
+    frequencies = np.bincount(directions[0], minlength=4) / directions.size
+    assert np.allclose(frequencies, 0.25, atol=0.01)
+
+
+def test_scene_walker_are_views():
+    """Tests whether the walker of a scene are views into the paths of the scene and
+    have the number of steps of their respective speed"""
+    scene = walker.create_walker(
+        walking_time=20,
+        number_of_usual_walker=1,
+        number_of_fast_walker=0,
+        number_of_running_walker=1,
+    )
+    assert scene.x_coordinates.shape == (2, 20 * 4 + 1)
+    usual_walker = scene[0]
+    assert len(usual_walker.x_coordinates) == 20 + 1
+    assert usual_walker.get_end_point() == scene.get_end_points()[0].tolist()
+    # the usual walker keeps standing at its end point after it arrived
+    assert np.all(scene.x_coordinates[0, 20:] == usual_walker.get_end_point()[0])
+    assert np.shares_memory(usual_walker.directions, scene.packed_directions)
+    usual_walker.start_point[0] = -1
+    assert scene.x_coordinates[0, 0] == -1
+
+
+def test_large_scene_avoids_buildings():
+    """Tests whether a scene with many walker is calculated and no walker enters its
+    building"""
+    scene = walker.create_walker(
+        walking_time=200,
+        number_of_usual_walker=500,
+        number_of_fast_walker=500,
+        number_of_running_walker=500,
+    )
+    assert len(scene) == 1500
+    steps = np.abs(np.diff(scene.x_coordinates, axis=1)) + np.abs(
+        np.diff(scene.y_coordinates, axis=1)
+    )
+    assert np.all(steps[:, :200] == 1)
+    assert not walker.inside_buildings(
+        scene.x_coordinates, scene.y_coordinates, scene.buildings
+    ).any()
+
+
+def test_scene_is_reproducible_with_seed():
+    """Tests whether the same seed leads to the same scene and a different seed to a
+    different scene"""
+    scenes = [walker.create_walker(100, 2, 1, 1, seed=seed) for seed in (42, 42, 43)]
+    assert np.array_equal(scenes[0].x_coordinates, scenes[1].x_coordinates)
+    assert np.array_equal(scenes[0].y_coordinates, scenes[1].y_coordinates)
+    assert not np.array_equal(scenes[0].x_coordinates, scenes[2].x_coordinates)
+
+
+def test_scene_does_not_depend_on_workers():
+    """Tests whether the paths of a seeded scene are bit-identical, no matter in how
+    many processes the walker are calculated"""
+    serial_scene = walker.create_walker(3000, 3, 2, 2, seed=7)
+    parallel_scene = walker.create_walker(3000, 3, 2, 2, seed=7, workers=3)
+    assert np.array_equal(serial_scene.x_coordinates, parallel_scene.x_coordinates)
+    assert np.array_equal(serial_scene.y_coordinates, parallel_scene.y_coordinates)
+
+
+def test_compact_path_matches_coordinates():
+    """Tests whether packing the directions of a path and expanding them again leads to
+    the same coordinates, also if the number of steps is not a multiple of 4"""
+    x_coordinates = np.array([5, 6, 6, 6, 5, 5, 6])
+    y_coordinates = np.array([3, 3, 4, 3, 3, 2, 2])
+    directions = walker.directions_of_path(x_coordinates, y_coordinates)
+    packed = walker.pack_directions(directions)
+    assert packed.nbytes == 2
+    for axis, coordinates in enumerate((x_coordinates, y_coordinates)):
+        expanded = walker.expand_coordinates(
+            np.array([[5, 3]]), packed, np.array([0, 2]), np.array([7]), axis
+        )
+        assert np.array_equal(expanded, coordinates)
+
+
+def test_walker_path_is_stored_compactly():
+    """Tests whether a long walk is stored with 2 bits per step and the coordinates are
+    stored in the smallest fitting integer type"""
+    test_walker = walker.Walker(walking_time=10000, walking_speed=4, seed=3)
+    test_walker.calculate_the_path()
+    assert test_walker.directions.nbytes == 10000
+    assert test_walker.x_coordinates.dtype == np.int32
+    assert test_walker.get_end_point() == [
+        test_walker.x_coordinates[-1],
+        test_walker.y_coordinates[-1],
+    ]
+
+
+def test_iter_path_does_not_depend_on_chunk_size():
+    """Tests whether walking a path in chunks leads to the same path as calculating it
+    at once and that the end point is carried over from chunk to chunk"""
+    calculated_walker = walker.Walker(walking_time=3000, walking_speed=2, seed=11)
+    calculated_walker.calculate_the_path()
+    streamed_walker = walker.Walker(walking_time=3000, walking_speed=2, seed=11)
+    chunks = list(streamed_walker.iter_path(chunk_size=500))
+    assert [chunk.first_step for chunk in chunks[:3]] == [1, 501, 1001]
+    assert np.array_equal(
+        np.concatenate([chunk.x_coordinates for chunk in chunks]),
+        calculated_walker.x_coordinates[1:],
+    )
+    assert np.array_equal(
+        np.concatenate([chunk.y_coordinates for chunk in chunks]),
+        calculated_walker.y_coordinates[1:],
+    )
+    assert streamed_walker.get_end_point() == calculated_walker.get_end_point()
+
+
+def test_scene_iter_paths_matches_calculated_scene():
+    """Tests whether walking a scene in chunks leads to the same paths as calculating
+    it and that the chunks of each round cover the same time, one chunk per speed"""
+    calculated_scene = walker.create_walker(500, 1, 1, 1, seed=5)
+    streamed_scene = walker.Scene(500, [1, 2, 4], seed=5)
+    chunks = list(streamed_scene.iter_paths(chunk_size=100))
+    # the fastest walker take at most 100 steps per chunk, 24 time units
+    assert len(chunks) == 3 * 21
+    assert [chunk.walker.tolist() for chunk in chunks[3:6]] == [[0], [1], [2]]
+    assert [chunk.first_step for chunk in chunks[3:6]] == [25, 49, 97]
+    assert [chunk.x_coordinates.shape[1] for chunk in chunks[3:6]] == [24, 48, 96]
+    x_coordinates = np.full((3, 2000), -1)
+    y_coordinates = np.full((3, 2000), -1)
+    for chunk in chunks:
+        columns = slice(
+            chunk.first_step - 1, chunk.first_step - 1 + chunk.x_coordinates.shape[1]
+        )
+        x_coordinates[chunk.walker, columns] = chunk.x_coordinates
+        y_coordinates[chunk.walker, columns] = chunk.y_coordinates
+    for row, number_of_steps in enumerate(calculated_scene.number_of_steps):
+        x_coordinates[row, number_of_steps - 1 :] = x_coordinates[
+            row, number_of_steps - 2
+        ]
+        y_coordinates[row, number_of_steps - 1 :] = y_coordinates[
+            row, number_of_steps - 2
+        ]
+    assert np.array_equal(x_coordinates, calculated_scene.x_coordinates[:, 1:])
+    assert np.array_equal(y_coordinates, calculated_scene.y_coordinates[:, 1:])
+    assert np.array_equal(streamed_scene.end_points, calculated_scene.end_points)
+
+
+def test_calculating_a_path_again_starts_at_the_start_point():
+    """Tests whether calculating the path of a walker or a scene a second time starts
+    at the start point again, so the end point is the end of the stored path and the
+    path stays outside the building"""
+    test_walker = walker.Walker(walking_time=2000, walking_speed=4, seed=16)
+    test_walker.calculate_the_path()
+    test_walker.calculate_the_path()
+    assert test_walker.x_coordinates[0] == test_walker.get_start_point()[0]
+    assert test_walker.get_end_point() == [
+        test_walker.x_coordinates[-1],
+        test_walker.y_coordinates[-1],
+    ]
+    assert not walker.inside_buildings(
+        test_walker.x_coordinates[None, :],
+        test_walker.y_coordinates[None, :],
+        np.array([test_walker.building]),
+    ).any()
+    scene = walker.create_walker(500, 2, 1, 1, seed=16)
+    scene.calculate_the_paths()
+    assert np.array_equal(scene.end_points[:, 0], scene.x_coordinates[:, -1])
+    assert np.array_equal(scene.end_points[:, 1], scene.y_coordinates[:, -1])
+    assert not walker.blocked_positions(
+        scene.x_coordinates, scene.y_coordinates, scene.buildings
+    ).any()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_trajectory_file_round_trip(workers):
+    """Tests whether the paths written to a trajectory file while calculating the scene
+    are loaded again as memory-mapped walker with the same paths and buildings"""
+    with tempfile.TemporaryDirectory() as tmp_dirname:
+        trajectory_file = os.path.join(tmp_dirname, "scene.rwt")
+        scene = walker.create_walker(
+            5000,
+            1,
+            1,
+            1,
+            seed=21,
+            workers=workers,
+            consumers=[walker.TrajectoryWriter(trajectory_file)],
+        )
+        header = walker.read_trajectory_header(trajectory_file)
+        assert header["walking_speeds"] == [1, 2, 4]
+        assert header["seed"] == 21
+        loaded_walker = walker.load_trajectories(trajectory_file)
+        assert len(loaded_walker) == 3
+        for scene_walker, loaded in zip(scene, loaded_walker):
+            assert isinstance(loaded.x_coordinates, np.memmap)
+            assert np.array_equal(scene_walker.x_coordinates, loaded.x_coordinates)
+            assert np.array_equal(scene_walker.y_coordinates, loaded.y_coordinates)
+            assert loaded.building == scene_walker.building
+            assert loaded.get_end_point() == scene_walker.get_end_point()
+        del loaded_walker
+
+
+@pytest.mark.parametrize("render_mode", ["full", "decimated", "density", "heatmap"])
+def test_plotting_without_showing(render_mode):
+    """Tests that an image is written in each render mode without showing it"""
+    scene = walker.create_walker(2000, 1, 0, 1, seed=2)
+    with tempfile.TemporaryDirectory() as tmp_dirname:
+        outfile = os.path.join(tmp_dirname, "test_image.png")
+        walker.plot_the_paths(scene, outfile, render_mode=render_mode, show=False)
+        image = imread(outfile)
+        assert len(image.shape) == 3
+
+
+def test_pixel_segments_bounded_by_resolution():
+    """Tests whether a long path is reduced to a number of lines which depends on the
+    resolution and that the lines connect neighbouring pixels"""
+    test_walker = walker.Walker(walking_time=200000, walking_speed=4, seed=8)
+    test_walker.calculate_the_path()
+    resolution = (50, 40)
+    extent = walker.path_extent(test_walker.x_coordinates, test_walker.y_coordinates)
+    segments = walker.pixel_segments(
+        test_walker.x_coordinates, test_walker.y_coordinates, extent, resolution
+    )
+    assert 0 < len(segments) <= 4 * resolution[0] * resolution[1]
+    pixel_size = np.array(
+        [
+            (extent[1] - extent[0]) / resolution[0],
+            (extent[3] - extent[2]) / resolution[1],
+        ]
+    )
+    lengths = np.abs(segments[:, 1] - segments[:, 0]) / pixel_size
+    assert np.all(np.round(lengths) <= 1)
+
+
+def test_render_walker_panels_in_parallel():
+    """Tests whether each walker is rendered into its own image by several processes
+    and the images are put together into the outfile"""
+    scene = walker.create_walker(100, 2, 0, 1, seed=9)
+    with tempfile.TemporaryDirectory() as tmp_dirname:
+        outfile = os.path.join(tmp_dirname, "test_image.png")
+        panel_names = walker.render_walker_panels(scene, outfile, workers=2)
+        assert [os.path.basename(name) for name in panel_names] == [
+            "test_image_walker_1.png",
+            "test_image_walker_2.png",
+            "test_image_walker_3.png",
+        ]
+        panel = imread(panel_names[0])
+        composite = imread(outfile)
+        assert composite.shape[0] == 2 * panel.shape[0]
+        assert composite.shape[1] == 2 * panel.shape[1]
+        # the encounters and a landscape are drawn like plot_the_paths does
+        x, y = scene.start_points[0]
+        encounters = np.array([[0, 0, 2, x, y]])
+        marked_names = walker.render_walker_panels(
+            scene,
+            os.path.join(tmp_dirname, "marked.png"),
+            workers=2,
+            encounters=encounters,
+            landscape=walker.Landscape([[x + 2.5, x + 6.5, y - 2.5, y + 2.5]]),
+        )
+        assert not np.array_equal(imread(marked_names[0]), panel)
+        assert not np.array_equal(imread(marked_names[1]), imread(panel_names[1]))
+
+
+def test_landscape_bitmap():
+    """Tests whether the occupancy bitmap of a landscape holds exactly the positions
+    inside the obstacles, also if they overlap"""
+    landscape = walker.Landscape([[-0.5, 2.5, -0.5, 0.5], [1.5, 3.5, -2.5, 1.5]])
+    x_coordinates, y_coordinates = np.meshgrid(np.arange(-3, 6), np.arange(-4, 4))
+    expected = (x_coordinates >= 0) & (x_coordinates <= 2) & (y_coordinates == 0) | (
+        x_coordinates >= 2
+    ) & (x_coordinates <= 3) & (y_coordinates >= -2) & (y_coordinates <= 1)
+    assert np.array_equal(landscape.blocked(x_coordinates, y_coordinates), expected)
+
+
+def test_scene_avoids_landscape_obstacles():
+    """Tests whether the walker of a scene in a landscape with many obstacles never
+    enter an obstacle and that the landscape replaces their buildings"""
+    generator = np.random.default_rng(0)
+    corners = generator.integers(-300, 1300, size=(2000, 2)) + 0.5
+    obstacles = np.stack(
+        [corners[:, 0], corners[:, 0] + 5, corners[:, 1], corners[:, 1] + 3], axis=1
+    )
+    landscape = walker.Landscape(obstacles)
+    scene = walker.create_walker(300, 5, 5, 5, seed=4, landscape=landscape)
+    assert scene.buildings is None
+    assert scene[0].building is None
+    assert not landscape.blocked(scene.x_coordinates, scene.y_coordinates).any()
+    loop_scene = walker.create_walker(
+        300, 1, 0, 1, seed=4, landscape=landscape, engine="loop"
+    )
+    assert not landscape.blocked(
+        loop_scene.x_coordinates, loop_scene.y_coordinates
+    ).any()
+    with tempfile.TemporaryDirectory() as tmp_dirname:
+        outfile = os.path.join(tmp_dirname, "test_image.png")
+        walker.plot_the_paths(list(scene)[:3], outfile, show=False)
+        assert len(imread(outfile).shape) == 3
+
+
+def test_ensemble_statistics_match_stored_paths():
+    """Tests whether the statistics calculated while walking without storing the
+    paths equal the statistics of the stored paths"""
+    statistics = walker.EnsembleStatistics(time_resolution=10)
+    walker.create_walker(
+        300, 20, 20, 20, seed=5, consumers=[statistics], keep_paths=False
+    )
+    summary = statistics.summary()
+    scene = walker.create_walker(300, 20, 20, 20, seed=5)
+    assert summary["number_of_walker"] == 60
+    assert summary["times"] == list(range(0, 301, 10))
+    squared_displacements = np.array(
+        [
+            (path.x_coordinates[:: path.walking_speed * 10] - path.start_point[0]) ** 2
+            + (path.y_coordinates[:: path.walking_speed * 10] - path.start_point[1])
+            ** 2
+            for path in scene
+        ]
+    )
+    assert np.allclose(
+        summary["mean_squared_displacement"], squared_displacements.mean(axis=0)
+    )
+    assert np.allclose(
+        summary["variance_squared_displacement"],
+        squared_displacements.var(axis=0, ddof=1),
+    )
+    distances = np.sqrt(squared_displacements[:, -1])
+    assert summary["flying_fraction"] == np.mean(distances >= walker.FLYING_DISTANCE)
+    assert sum(summary["end_distance_counts"]) == 60
+    assert np.array_equal(
+        summary["end_distance_counts"],
+        np.bincount((distances // summary["distance_bin_width"]).astype(int)),
+    )
+
+
+def test_ensemble_statistics_cannot_drop_paths_in_parallel():
+    """Tests whether dropping the paths is refused, if they are not walked in one
+    process"""
+    with pytest.raises(AssertionError):
+        walker.create_walker(10, 2, 0, 0, workers=2, keep_paths=False)
+
+
+def test_landscape_distance():
+    """Tests whether the distance of positions to the next obstacle of a landscape
+    equals the smallest distance to any blocked position"""
+    generator = np.random.default_rng(1)
+    corners = generator.integers(-100, 100, size=(30, 2)) + 0.5
+    obstacles = np.stack(
+        [corners[:, 0], corners[:, 0] + 5, corners[:, 1], corners[:, 1] + 3], axis=1
+    )
+    landscape = walker.Landscape(obstacles)
+    x_coordinates, y_coordinates = np.meshgrid(
+        np.arange(-150, 150, 3), np.arange(-150, 150, 3)
+    )
+    blocked_y, blocked_x = np.nonzero(landscape.bitmap)
+    distances = np.min(
+        np.abs(x_coordinates.reshape(-1, 1) - blocked_x - landscape.origin[0])
+        + np.abs(y_coordinates.reshape(-1, 1) - blocked_y - landscape.origin[1]),
+        axis=1,
+    )
+    assert np.array_equal(
+        landscape.distance(x_coordinates, y_coordinates).ravel(), distances
+    )
+    assert landscape.distances.dtype.itemsize <= 2
+
+
+def test_fully_blocked_landscape():
+    """Tests whether drawing a start point in a landscape which blocks the whole
+    region fails instead of drawing again forever"""
+    landscape = walker.Landscape([[-10.5, 20.5, -10.5, 20.5]])
+    with pytest.raises(ValueError):
+        walker.draw_start_point(np.random.default_rng(1), 10, landscape)
+
+
+def test_endpoint_engine():
+    """Tests whether the end points calculated without the paths are distributed like
+    the end points of the paths and never inside the building"""
+    scene = walker.create_walker(300, 1000, 0, 0, seed=6, engine="endpoint")
+    paths_scene = walker.create_walker(300, 1000, 0, 0, seed=6)
+    assert scene.packed_directions is None
+    assert not walker.inside_buildings(
+        scene.end_points[:, 0:1], scene.end_points[:, 1:2], scene.buildings
+    ).any()
+    squared_distances = ((scene.end_points - scene.start_points) ** 2).sum(axis=1)
+    paths_squared_distances = (
+        (paths_scene.end_points - paths_scene.start_points) ** 2
+    ).sum(axis=1)
+    assert abs(squared_distances.mean() / paths_squared_distances.mean() - 1) < 0.15
+    assert np.array_equal(
+        scene.end_points,
+        walker.create_walker(
+            300, 1000, 0, 0, seed=6, engine="endpoint", workers=2
+        ).end_points,
+    )
+    # the end point of a walker does not depend on the other walker of the scene
+    rows = np.array([5, 100, 999])
+    selected_scene = walker.Scene(300, scene.walking_speeds, seed=6).select(rows)
+    selected_scene.calculate_the_paths("endpoint")
+    assert np.array_equal(selected_scene.end_points, scene.end_points[rows])
+    # a very long walk only takes a few jumps
+    long_walker = walker.Walker(10**7, 4, seed=6)
+    long_walker.calculate_the_path("endpoint")
+    assert long_walker.directions is None
+    assert not long_walker.is_blocked(*long_walker.get_end_point())
+
+
+def test_scene_without_paths():
+    """Tests whether the coordinates of a scene calculated without paths are refused
+    instead of showing walker standing at their start point, and that its walker
+    are still plotted from their start to their end point"""
+    scene = walker.create_walker(300, 2, 1, 0, seed=6, engine="endpoint")
+    with pytest.raises(AssertionError):
+        scene.coordinates(0)
+    with pytest.raises(AssertionError):
+        scene.x_coordinates
+    with pytest.raises(AssertionError):
+        list(scene)[0].y_coordinates
+    with tempfile.TemporaryDirectory() as tmp_dirname:
+        outfile = os.path.join(tmp_dirname, "test_image.png")
+        walker.plot_the_paths(scene, outfile, show=False)
+        assert os.path.isfile(outfile)
+
+
+def test_profiling_report():
+    """Tests whether the profiler counts the steps and rejected steps of each walker
+    and measures the phases, and that nothing is measured while it is disabled"""
+    profiler = walker.enable_profiling()
+    try:
+        scene = walker.create_walker(200, 2, 1, 1, seed=7)
+        walker.Walker(100, 2, seed=7).calculate_the_path("loop")
+        with tempfile.TemporaryDirectory() as tmp_dirname:
+            walker.plot_the_paths(
+                scene, os.path.join(tmp_dirname, "test_image.png"), show=False
+            )
+            report_file = os.path.join(tmp_dirname, "report.json")
+            profiler.save(report_file)
+            with open(report_file) as infile:
+                report = json.load(infile)
+    finally:
+        walker.disable_profiling()
+    assert report["counters"]["steps"] == 200 * (2 + 2 + 4) + 100 * 2
+    assert len(report["walker_counters"]["rejected_steps"]) == 5
+    assert report["counters"]["rejected_steps"] == sum(
+        report["walker_counters"]["rejected_steps"]
+    )
+    assert report["counters"]["allocated_bytes"] > 0
+    for phase in ["start_points", "walking", "plotting", "rendering"]:
+        assert report["phases"][phase]["calls"] > 0
+    assert not walker.profiler.enabled
+    walker.create_walker(10, 1, 0, 0)
+    assert profiler.counters["steps"] == report["counters"]["steps"]
+
+
+def test_result_cache():
+    """Tests whether a cached scene is returned instead of calculating it again and
+    whether the least recently used scenes are deleted"""
+    with tempfile.TemporaryDirectory() as tmp_dirname:
+        cache = walker.ResultCache(tmp_dirname)
+        scene = walker.create_walker(300, 2, 1, 1, seed=8, cache=cache)
+        key = cache.key(8, 300, scene.walking_speeds)
+        assert os.path.exists(cache.path(key))
+        statistics = walker.EnsembleStatistics()
+        cached_scene = walker.create_walker(
+            300, 2, 1, 1, seed=8, cache=cache, consumers=[statistics]
+        )
+        assert np.array_equal(cached_scene.x_coordinates, scene.x_coordinates)
+        assert np.array_equal(cached_scene.y_coordinates, scene.y_coordinates)
+        assert np.array_equal(cached_scene.buildings, scene.buildings)
+        assert statistics.summary()["number_of_walker"] == 4
+        # the random streams continue where the calculated scene stopped
+        assert cached_scene.step_generators[0].integers(
+            0, 1000
+        ) == scene.step_generators[0].integers(0, 1000)
+        assert cache.key(9, 300, scene.walking_speeds) != key
+        assert cache.key(8, 300, scene.walking_speeds, engine="loop") != key
+        # scenes without paths are not cached, they could not be replayed
+        walker.create_walker(300, 2, 1, 1, seed=8, engine="endpoint", cache=cache)
+        assert not os.path.exists(
+            cache.path(cache.key(8, 300, scene.walking_speeds, engine="endpoint"))
+        )
+        # the command line only creates the cache for scenes with a seed
+        cache_dir = os.path.join(tmp_dirname, "cli_cache")
+        walker.run(
+            walker.parse_arguments(
+                ["10", "1", "0", "0", "--no-plot", "--cache-dir", cache_dir]
+            )
+        )
+        assert not os.path.exists(cache_dir)
+        # only the most recently used scene fits into a small cache, the scenes
+        # differ in size as each path only takes the room of its own steps
+        cache.max_bytes = int(1.5 * os.path.getsize(cache.path(key)))
+        other_scene = walker.create_walker(300, 1, 2, 1, seed=8, cache=cache)
+        other_key = cache.key(8, 300, other_scene.walking_speeds)
+        assert os.path.exists(cache.path(other_key))
+        assert not os.path.exists(cache.path(key))
+        cache.clear()
+        assert not os.path.exists(cache.path(other_key))
+
+
+def test_occupancy_heatmap_counts_visits():
+    """Tests whether the heatmap fed while walking counts the visits of each position
+    of all paths, also if the positions are spread far apart"""
+    heatmap = walker.OccupancyHeatmap()
+    scene = walker.create_walker(500, 20, 0, 5, seed=9, consumers=[heatmap])
+    walking = np.arange(scene.x_coordinates.shape[1]) < scene.number_of_steps[:, None]
+    positions, visits = np.unique(
+        np.stack([scene.x_coordinates[walking], scene.y_coordinates[walking]], axis=1),
+        axis=0,
+        return_counts=True,
+    )
+    image, extent = heatmap.to_image(resolution=10**4)
+    assert image.sum() == walking.sum()
+    assert np.array_equal(
+        image[
+            positions[:, 1] - int(extent[2] + 0.5),
+            positions[:, 0] - int(extent[0] + 0.5),
+        ],
+        visits,
+    )
+    assert heatmap.number_of_walker == 25
+    # positions far apart only create the tiles they are in
+    sparse_heatmap = walker.OccupancyHeatmap()
+    sparse_heatmap.add([-(10**9), 0, 0, 10**9], [10**9, 0, 0, -(10**9)])
+    assert len(sparse_heatmap.tile_indices) == 3
+    image, extent = sparse_heatmap.to_image(resolution=100)
+    assert image.sum() == 4
+    assert image.max() == 2
+
+
+def test_import_does_not_load_plotting_libraries():
+    """Tests that importing walker and calculating a scene without plotting does not
+    import matplotlib, which takes most of the startup time"""
+    code = (
+        "import sys, walker\n"
+        "walker.create_walker(10, 1, 1, 1)\n"
+        "print('matplotlib' in sys.modules)"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=os.path.dirname(os.path.abspath(walker.__file__)),
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    assert output.strip() == "False"
+
+
+@pytest.mark.parametrize("radius", [0, 1, 3])
+def test_encounter_detection_matches_all_pairs(radius):
+    """Tests whether the encounters found while walking without storing the paths equal
+    the encounters found by comparing all pairs of walker at each point in time"""
+    detector = walker.EncounterDetector(radius)
+    walker.create_walker(
+        300, 20, 10, 10, seed=4, consumers=[detector], keep_paths=False
+    )
+    scene = walker.create_walker(300, 20, 10, 10, seed=4)
+    expected = []
+    rows = np.arange(len(scene))
+    for time in range(scene.walking_time + 1):
+        x = scene.x_coordinates[rows, time * scene.walking_speeds]
+        y = scene.y_coordinates[rows, time * scene.walking_speeds]
+        for first in rows:
+            for second in rows[first + 1 :]:
+                if (
+                    abs(x[first] - x[second]) <= radius
+                    and abs(y[first] - y[second]) <= radius
+                ):
+                    expected.append([time, first, second, x[first], y[first]])
+    assert np.array_equal(detector.events, np.array(expected).reshape(-1, 5))
+    if radius == 3:
+        assert len(detector.events) > 0
+        with tempfile.TemporaryDirectory() as tmp_dirname:
+            outfile = os.path.join(tmp_dirname, "encounters.csv")
+            detector.save(outfile)
+            saved = np.loadtxt(outfile, delimiter=",", skiprows=1, ndmin=2)
+            assert np.array_equal(saved, detector.events)
+            image_file = os.path.join(tmp_dirname, "encounters.png")
+            walker.plot_the_paths(
+                [scene[number] for number in range(4)],
+                image_file,
+                show=False,
+                encounters=detector.events,
+            )
+            assert len(imread(image_file).shape) == 3
+
+
+def test_encounter_detection_keeps_few_positions_of_mixed_speeds():
+    """Tests whether the positions the encounter detector keeps for later points in
+    time are bounded by the chunk length instead of growing with the walking time if
+    slow and fast walker walk together, also if the stored paths are replayed"""
+
+    class RecordingDetector(walker.EncounterDetector):
+        def update(self, chunk):
+            super().update(chunk)
+            self.largest_pending = max(
+                getattr(self, "largest_pending", 0), self.pending.shape[1]
+            )
+
+    largest_pending = []
+    for walking_time in [2000, 8000]:
+        detector = RecordingDetector()
+        scene = walker.Scene(walking_time, [1] * 200 + [4], seed=2)
+        scene.calculate_the_paths(consumers=[detector])
+        largest_pending.append(detector.largest_pending)
+        replayed = RecordingDetector()
+        scene.replay_paths([replayed])
+        assert np.array_equal(replayed.events, detector.events)
+        assert replayed.largest_pending == detector.largest_pending
+    # the slow walker keep at most the positions of one chunk of the fastest walker
+    assert largest_pending[0] == largest_pending[1]
+    assert largest_pending[1] <= 201 * walker.BLOCK_SIZE // 4
+
+
+def test_extend_and_checkpoint():
+    """Tests whether extending a scene keeps the paths walked so far, does not depend on
+    how the time is split up or on saving and loading a checkpoint in between and
+    grows the storage of the paths by doubling"""
+    scene = walker.create_walker(101, 3, 2, 2, seed=7)
+    short_scene = walker.create_walker(101, 3, 2, 2, seed=7)
+    scene.extend(57)
+    scene.extend(3)
+    with tempfile.TemporaryDirectory() as tmp_dirname:
+        checkpoint = os.path.join(tmp_dirname, "checkpoint.npz")
+        short_scene.save_checkpoint(checkpoint)
+        loaded = walker.Scene.load_checkpoint(checkpoint)
+    assert np.array_equal(loaded.buildings, short_scene.buildings)
+    loaded.extend(60)
+    assert loaded.walking_time == scene.walking_time == 161
+    assert np.array_equal(loaded.x_coordinates, scene.x_coordinates)
+    assert np.array_equal(loaded.y_coordinates, scene.y_coordinates)
+    assert np.array_equal(loaded.end_points, scene.end_points)
+    for index, short_walker in enumerate(short_scene):
+        steps = short_walker.number_of_steps
+        assert np.array_equal(
+            scene[index].x_coordinates[:steps], short_walker.x_coordinates
+        )
+        assert np.array_equal(
+            scene[index].y_coordinates[:steps], short_walker.y_coordinates
+        )
+        assert scene[index].get_end_point() == [
+            scene[index].x_coordinates[-1],
+            scene[index].y_coordinates[-1],
+        ]
+    assert not walker.blocked_positions(
+        scene.x_coordinates, scene.y_coordinates, scene.buildings
+    ).any()
+    # extending by one time unit again and again copies the paths only a few times
+    growing_scene = walker.create_walker(1, 1, 0, 1, seed=3)
+    capacities = set()
+    for _ in range(200):
+        growing_scene.extend(1)
+        capacities.add(len(growing_scene.packed_directions))
+    assert len(capacities) <= 8
+    endpoint_scene = walker.create_walker(101, 3, 2, 2, seed=7)
+    endpoint_scene.extend(60, engine="endpoint")
+    assert endpoint_scene.packed_directions is None
+
+
+def test_walk_with_checkpoints_resumes(monkeypatch):
+    """Tests whether a walk which stopped after a checkpoint continues to the same paths
+    as a walk which did not stop and as a scene calculated without checkpoints"""
+    speeds = [1, 1, 2, 4]
+    save_checkpoint = walker.Scene.save_checkpoint
+
+    def save_and_stop(scene, file_name):
+        save_checkpoint(scene, file_name)
+        if scene.walking_time == 30:
+            raise RuntimeError("stopped")
+
+    with tempfile.TemporaryDirectory() as tmp_dirname:
+        checkpoint = os.path.join(tmp_dirname, "checkpoint.npz")
+        monkeypatch.setattr(walker.Scene, "save_checkpoint", save_and_stop)
+        with pytest.raises(RuntimeError):
+            walker.walk_with_checkpoints(checkpoint, 55, speeds, 10, seed=4)
+        monkeypatch.undo()
+        assert walker.Scene.load_checkpoint(checkpoint).walking_time == 30
+        resumed = walker.walk_with_checkpoints(checkpoint, 55, speeds, 10, seed=4)
+        uninterrupted = walker.walk_with_checkpoints(
+            os.path.join(tmp_dirname, "other.npz"), 55, speeds, 10, seed=4
+        )
+        assert walker.Scene.load_checkpoint(checkpoint).walking_time == 55
+        with pytest.raises(AssertionError):
+            walker.walk_with_checkpoints(checkpoint, 55, [1, 1, 1, 2, 4], 10)
+    assert np.array_equal(resumed.x_coordinates, uninterrupted.x_coordinates)
+    assert np.array_equal(resumed.y_coordinates, uninterrupted.y_coordinates)
+    # the checkpoints do not change the walk
+    scene = walker.create_scene(55, speeds, seed=4)
+    assert np.array_equal(resumed.start_points, scene.start_points)
+    assert np.array_equal(resumed.x_coordinates, scene.x_coordinates)
+    assert np.array_equal(resumed.y_coordinates, scene.y_coordinates)
+
+
+def test_speed_classes_in_ragged_layout():
+    """Tests whether walker of user-defined speeds are stored one after the other
+    without padding and whether their statistics and plots match their paths"""
+    with tempfile.TemporaryDirectory() as tmp_dirname:
+        config = os.path.join(tmp_dirname, "speeds.json")
+        with open(config, "w") as outfile:
+            json.dump(
+                {
+                    "strolling": {"speed": 1, "number": 2},
+                    "jogging": {"speed": 3, "number": 1},
+                    "cycling": {"speed": 8, "number": 1},
+                },
+                outfile,
+            )
+        speeds = walker.load_speed_classes(config)
+        assert speeds == [1, 1, 3, 8]
+        statistics = walker.EnsembleStatistics(time_resolution=1)
+        scene = walker.create_scene(101, speeds, seed=12, consumers=[statistics])
+        parallel_scene = walker.create_scene(101, speeds, seed=12, workers=2)
+        walker.plot_the_paths(
+            scene, os.path.join(tmp_dirname, "speeds.png"), show=False
+        )
+    offsets = scene.coordinate_offsets
+    assert offsets[-1] == 101 * 13 + 4
+    assert len(scene.packed_directions) == sum(
+        (101 * speed + 3) // 4 for speed in speeds
+    )
+    x_coordinates = scene.coordinates(0)
+    y_coordinates = scene.coordinates(1)
+    assert len(x_coordinates) == offsets[-1]
+    assert np.array_equal(parallel_scene.coordinates(0), x_coordinates)
+    squared_displacements = []
+    for index, scene_walker in enumerate(scene):
+        path = slice(offsets[index], offsets[index + 1])
+        assert np.array_equal(x_coordinates[path], scene_walker.x_coordinates)
+        assert np.array_equal(y_coordinates[path], scene_walker.y_coordinates)
+        position = offsets[index] + 100 * speeds[index]
+        squared_displacements.append(
+            (x_coordinates[position] - x_coordinates[offsets[index]]) ** 2
+            + (y_coordinates[position] - y_coordinates[offsets[index]]) ** 2
+        )
+    assert np.array_equal(scene.x_coordinates[3], x_coordinates[offsets[3] :])
+    summary = statistics.summary()
+    assert np.isclose(
+        summary["mean_squared_displacement"][100], np.mean(squared_displacements)
+    )
+    replayed = walker.EnsembleStatistics(time_resolution=1)
+    scene.replay_paths([replayed])
+    assert replayed.summary() == summary
+    with pytest.raises(AssertionError):
+        walker.create_scene(10, [1, 0])
+
+
+def test_animate_the_paths():
+    """Tests whether the animation shows a bounded number of points in time and whether
+    its last frame shows the whole paths"""
+    scene = walker.create_walker(1000, 1, 0, 1, seed=13)
+    with tempfile.TemporaryDirectory() as tmp_dirname:
+        animation = os.path.join(tmp_dirname, "walk.gif")
+        assert walker.animate_the_paths(scene, animation, frames=5) == [animation]
+        with Image.open(animation) as image:
+            assert image.n_frames == 5
+        frame_names = walker.animate_the_paths(
+            scene, os.path.join(tmp_dirname, "walk.png"), frames=3
+        )
+        assert [os.path.basename(name) for name in frame_names] == [
+            "walk_0000.png",
+            "walk_0001.png",
+            "walk_0002.png",
+        ]
+        first_frame = imread(frame_names[0])
+        last_frame = imread(frame_names[-1])
+    # the paths are drawn in the first colour of the cycle, they grow frame by frame
+    path_colour = np.array([0x1F, 0x77, 0xB4]) / 255
+    path_pixels = [
+        np.count_nonzero(np.all(np.abs(frame[..., :3] - path_colour) < 0.02, axis=-1))
+        for frame in (first_frame, last_frame)
+    ]
+    assert path_pixels[1] > 10 * max(path_pixels[0], 1)
+
+
+def test_first_passage_matches_calculated_paths():
+    """Tests whether the first passage finds the first step of each calculated path at
+    the target and leaves the walker unchanged"""
+    speeds = [1] * 20 + [2] * 10 + [3] * 10
+    targets = [
+        walker.DistanceTarget(25),
+        walker.ObstacleContact(),
+        walker.RegionTarget([100, 300, 100, 300]),
+    ]
+    for target in targets:
+        scene = walker.Scene(400, speeds, seed=14)
+        passage = scene.first_passage(target)
+        scene.calculate_the_paths()
+        x_coordinates = scene.x_coordinates
+        y_coordinates = scene.y_coordinates
+        hits = target.hits(
+            scene.start_points, x_coordinates, y_coordinates, scene.obstacles
+        ) & (np.arange(x_coordinates.shape[1]) < scene.number_of_steps[:, None])
+        assert np.array_equal(passage.hit, hits.any(axis=1))
+        steps = np.where(hits.any(axis=1), hits.argmax(axis=1), -1)
+        assert np.array_equal(passage.steps, steps)
+        assert np.allclose(
+            passage.times[passage.hit],
+            steps[passage.hit] / scene.walking_speeds[passage.hit],
+        )
+        columns = np.where(passage.hit, steps, scene.number_of_steps - 1)
+        assert np.array_equal(
+            passage.positions[:, 0], x_coordinates[np.arange(len(speeds)), columns]
+        )
+        assert np.array_equal(
+            passage.positions[:, 1], y_coordinates[np.arange(len(speeds)), columns]
+        )
+    assert 0 < np.count_nonzero(passage.hit) < len(speeds)
+    single_walker = walker.Walker(walking_time=2000, walking_speed=2, seed=15)
+    single_passage = single_walker.first_passage()
+    single_walker.calculate_the_path()
+    distances = np.hypot(
+        single_walker.x_coordinates - single_walker.x_coordinates[0],
+        single_walker.y_coordinates - single_walker.y_coordinates[0],
+    )
+    far = np.flatnonzero(distances >= walker.FLYING_DISTANCE)
+    assert single_passage.steps[0] == (far[0] if far.size else -1)
+    with tempfile.TemporaryDirectory() as tmp_dirname:
+        file_name = os.path.join(tmp_dirname, "passage.csv")
+        walker.save_first_passage(passage, file_name)
+        rows = np.genfromtxt(file_name, delimiter=",", skip_header=1)
+    assert np.array_equal(rows[:, 1], passage.steps)
+
+
+def test_first_passage_of_calculated_scene():
+    """Tests whether the first passage of a scene whose paths were already calculated
+    and extended, or which was loaded again, describes the calculated paths"""
+    speeds = [1] * 10 + [2] * 5 + [3] * 5
+    target = walker.DistanceTarget(20)
+    landscape = walker.Landscape([[10.5, 30.5, 10.5, 20.5], [50.5, 52.5, 0.5, 80.5]])
+    scene = walker.create_scene(150, speeds, seed=16, landscape=landscape)
+    scene.extend(100)
+    with tempfile.TemporaryDirectory() as tmp_dirname:
+        checkpoint = os.path.join(tmp_dirname, "checkpoint.npz")
+        scene.save_checkpoint(checkpoint)
+        loaded_scene = walker.Scene.load_checkpoint(checkpoint)
+    offsets = scene.coordinate_offsets
+    x_coordinates = scene.coordinates(0)
+    y_coordinates = scene.coordinates(1)
+    steps = []
+    for index in range(len(speeds)):
+        path = slice(offsets[index], offsets[index + 1])
+        hits = target.hits(
+            scene.start_points[index : index + 1],
+            x_coordinates[None, path],
+            y_coordinates[None, path],
+            scene.obstacles,
+        )[0]
+        steps.append(hits.argmax() if hits.any() else -1)
+    assert 0 < np.count_nonzero(np.array(steps) >= 0) < len(speeds)
+    assert np.array_equal(scene.first_passage(target).steps, steps)
+    assert np.array_equal(loaded_scene.first_passage(target).steps, steps)
+    rows = np.array([3, 12, 17])
+    assert np.array_equal(
+        scene.select(rows).first_passage(target).steps, np.array(steps)[rows]
+    )
+    assert scene[12].first_passage(target).steps[0] == steps[12]
+    single_walker = walker.Walker(walking_time=500, walking_speed=2, seed=15)
+    single_walker.calculate_the_path()
+    passage = single_walker.first_passage(target)
+    distances = np.hypot(
+        single_walker.x_coordinates - single_walker.x_coordinates[0],
+        single_walker.y_coordinates - single_walker.y_coordinates[0],
+    )
+    far = np.flatnonzero(distances >= 20)
+    assert passage.steps[0] == (far[0] if far.size else -1)
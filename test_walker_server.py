@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Contains tests for the simulation server"""
+
+import asyncio
+import concurrent.futures
+import os
+import pickle
+import socket
+import tempfile
+import threading
+
+import numpy as np
+import pytest
+
+import walker
+import walker_server
+
+
+@pytest.fixture
+def server():
+    """Runs a server with one worker on a temporary Unix socket in a thread. The
+    socket file of a server which stopped is left behind before"""
+    with tempfile.TemporaryDirectory() as directory:
+        socket_path = os.path.join(directory, "walker.sock")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stale_socket:
+            stale_socket.bind(socket_path)
+        started = threading.Event()
+
+        async def serve():
+            ready = asyncio.Event()
+            task = asyncio.create_task(
+                walker_server.SimulationServer(socket_path).serve(ready)
+            )
+            await ready.wait()
+            started.set()
+            await task
+
+        thread = threading.Thread(target=asyncio.run, args=(serve(),))
+        thread.start()
+        assert started.wait(30)
+        yield socket_path, directory
+        list(walker_server.submit([{"action": "shutdown"}], socket_path))
+        thread.join(30)
+        assert not thread.is_alive()
+        assert not os.path.exists(socket_path)
+
+
+def test_server_runs_simulate_and_plot_jobs(server):
+    """Tests whether the server queues the jobs of a client, answers each of them and
+    returns the same scene as create_walker"""
+    socket_path, directory = server
+    outfile_name = os.path.join(directory, "walker.png")
+    parameters = {
+        "walking_time": 200,
+        "number_of_usual_walker": 2,
+        "number_of_fast_walker": 1,
+        "number_of_running_walker": 1,
+        "seed": 5,
+    }
+    requests = [
+        {"action": "simulate", **parameters},
+        {"action": "plot", "outfile_name": outfile_name, **parameters},
+        {"action": "simulate", **parameters, "walking_time": -1},
+        {"id": "fly", "action": "fly"},
+    ]
+    responses = list(walker_server.submit(requests, socket_path))
+    results = {
+        response["id"]: response
+        for response in responses
+        if response["status"] != "queued"
+    }
+    assert len(responses) == 7
+    assert results[0]["status"] == "done"
+    scene = walker.create_walker(200, 2, 1, 1, seed=5)
+    np.testing.assert_array_equal(results[0]["end_points"], scene.end_points)
+    assert results[1] == {"id": 1, "status": "done", "outfile_name": outfile_name}
+    assert os.path.getsize(outfile_name) > 0
+    assert results[2]["status"] == "error"
+    assert results["fly"]["status"] == "error"
+
+
+def test_server_does_not_take_over_a_running_server(server):
+    """Tests whether a second server refuses to start on the socket of a running
+    server instead of removing it"""
+    socket_path, _ = server
+    assert walker_server.socket_in_use(socket_path)
+    with pytest.raises(RuntimeError):
+        asyncio.run(walker_server.SimulationServer(socket_path).serve())
+    assert os.path.exists(socket_path)
+
+
+def test_server_splits_jobs_between_free_workers():
+    """Tests whether the queued jobs are split up evenly between all free workers
+    instead of being passed to one of them"""
+    batches = []
+
+    class RecordingServer(walker_server.SimulationServer):
+        async def run_jobs(self, executor, jobs):
+            batches.append([request["id"] for request, _ in jobs])
+
+    async def dispatch():
+        server = RecordingServer(workers=3, batch_size=4)
+        server.queue = asyncio.Queue()
+        server.free_workers = asyncio.Semaphore(3)
+        for number in range(7):
+            server.queue.put_nowait(({"id": number}, None))
+        dispatcher = asyncio.create_task(server.dispatch(None))
+        await asyncio.sleep(0.1)
+        dispatcher.cancel()
+
+    asyncio.run(dispatch())
+    assert batches == [[0, 1, 2], [3, 4], [5, 6]]
+
+
+def test_server_answers_failed_jobs(server):
+    """Tests whether a job which fails and a batch which cannot be run in a worker are
+    answered with an error instead of leaving the client waiting"""
+    socket_path, _ = server
+    responses = list(
+        walker_server.submit(
+            [{"action": "simulate", "walking_time": 10}], socket_path=socket_path
+        )
+    )
+    assert responses[-1]["status"] == "error"
+    assert responses[-1]["message"].startswith("KeyError")
+
+    class FailingExecutor(concurrent.futures.Executor):
+        def submit(self, function, *arguments, **keywords):
+            raise pickle.PicklingError("cannot pass the batch")
+
+    async def run_jobs():
+        server = walker_server.SimulationServer()
+        server.free_workers = asyncio.Semaphore(0)
+        future = asyncio.get_running_loop().create_future()
+        await server.run_jobs(FailingExecutor(), [({"id": 3}, future)])
+        return await asyncio.wait_for(future, 5)
+
+    response = asyncio.run(run_jobs())
+    assert response["id"] == 3
+    assert response["status"] == "error"
+    assert "PicklingError" in response["message"]
@@ -1,26 +1,90 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 """A Random Walk Simulation For Multiple Walker"""
+
 # based on the idea of:
 # Python code for 2D random walk.
 # Source: https://www.geeksforgeeks.org/random-walk-implementation-python/
 
+import argparse
+import contextlib
+import hashlib
+import json
 import math
-import sys
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import NamedTuple
 
-import matplotlib.pyplot as plt
 import numpy as np
 
+try:
+    import fcntl
+except ImportError:  # not available on Windows, the cache is not locked there
+    fcntl = None
+
+# the unit step of each direction as (x, y) in the order east, west, north, south
+STEP_DIRECTIONS = np.array([[1, 0], [-1, 0], [0, 1], [0, -1]])
+# the additional direction of walker which already arrived and keep standing
+STAND_STILL = 4
+STEPS = np.vstack([STEP_DIRECTIONS, [[0, 0]]])
+# the bit positions of four directions packed into one byte
+PACKING_SHIFTS = np.array([0, 2, 4, 6], dtype=np.uint8)
+# number of steps the vectorized engine draws at once
+BLOCK_SIZE = 4096
+# walker which walk into their building within a block are calculated again in
+# segments of this length, so a rejected step only shifts the rest of its segment
+SEGMENT_LENGTH = 64
+ENGINES = ("vectorized", "loop", "endpoint")
+# the endpoint engine jumps over all steps which cannot reach an obstacle, walker
+# closer than this to an obstacle walk a segment of single steps instead
+JUMP_DISTANCE = 16
+# the largest probability that a jump of the endpoint engine passes an obstacle
+JUMP_TOLERANCE = 1e-12
+# the number of start points drawn for a walker before its landscape is given up
+START_POINT_ATTEMPTS = 10000
+# the first bytes of a trajectory file and the alignment of its coordinate arrays
+TRAJECTORY_MAGIC = b"RWALK001"
+TRAJECTORY_ALIGNMENT = 64
+RENDER_MODES = ("full", "decimated", "density", "heatmap")
+# the side length of the tiles of an occupancy heatmap and the largest side of its image
+TILE_SIZE = 64
+HEATMAP_RESOLUTION = 1024
+# walker which are at most this far apart in x and y at the same time meet
+ENCOUNTER_RADIUS = 1
+# walker which end this far away from their start position took a plane
+FLYING_DISTANCE = 150
+# the version of the path calculation, cached scenes of other versions are not used
+ENGINE_VERSION = 1
+# the default size limit of the result cache in bytes
+CACHE_SIZE = 1 << 30
+# number of coordinates which are reduced to pixels at once when plotting
+PLOT_CHUNK_SIZE = 1 << 20
+# the largest number of frames of an animation and the time each is shown in ms
+ANIMATION_FRAMES = 200
+ANIMATION_FRAME_DURATION = 50
+# the names of the usual speeds in the titles of the plots
+SPEED_NAMES = {1: "walking casually", 2: "walking fast", 4: "running"}
+
 
 def create_walker(
     walking_time: int,
     number_of_usual_walker: int,
     number_of_fast_walker: int,
     number_of_running_walker: int,
-) -> list:
+    engine: str = "vectorized",
+    workers: int = 1,
+    seed: int = None,
+    consumers: list = None,
+    landscape: "Landscape" = None,
+    keep_paths: bool = True,
+    cache: "ResultCache" = None,
+) -> "Scene":
     """
-    Checks if all user definitions of the walker are valid. If so, Creates a list of
-        all walker objects and calculates their paths.
+    Checks if all user definitions of the walker are valid. If so, Creates the scene
+        holding all walker and calculates their paths.
     :param walking_time: the 'time' each walker walks and therefore (depending on it's
         respective speed) the number of steps the walker will make
     :param number_of_usual_walker: the number of usual walker defines the number of
@@ -29,17 +93,173 @@ def create_walker(
         objects of this respective class which will be appended to the scene
     :param number_of_running_walker: the number of running walker defines the number
         of objects of this respective class which will be appended to the scene
-    :return: a list, the 'scene' which contains all walker, so all objects and their
-        coordinates
+    :param engine: the engine which calculates the paths. Either 'vectorized' (default)
+        which calculates blocks of steps at once, 'loop' which calculates one step
+        after the other, or 'endpoint' which only calculates the end points
+    :param workers: the number of processes the walker are split up to. The paths do
+        not depend on the number of processes
+    :param seed: the seed each walker gets its own random stream from. The same seed
+        leads to the same scene. If None, the scene is random
+    :param consumers: objects which get the paths chunk by chunk while they are
+        calculated, e.g. a TrajectoryWriter. See Scene.calculate_the_paths
+    :param landscape: a landscape with obstacles all walker walk in. If given, it is
+        used instead of the building of each walker
+    :param keep_paths: if False, the paths are only passed to the consumers and not
+        stored, e.g. to calculate EnsembleStatistics of very many or long walks
+    :param cache: a result cache the scene is taken from, if it was calculated before
+        with the same seed. Otherwise, the calculated scene is stored in it
+    :return: the 'scene' which contains all walker and their coordinates. It can be
+        used like a list of walker objects
+    """
+    return create_scene(
+        walking_time,
+        speeds_of_classes(
+            number_of_usual_walker, number_of_fast_walker, number_of_running_walker
+        ),
+        engine,
+        workers,
+        seed,
+        consumers,
+        landscape,
+        keep_paths,
+        cache,
+    )
+
+
+def create_scene(
+    walking_time: int,
+    walking_speeds: list,
+    engine: str = "vectorized",
+    workers: int = 1,
+    seed: int = None,
+    consumers: list = None,
+    landscape: "Landscape" = None,
+    keep_paths: bool = True,
+    cache: "ResultCache" = None,
+) -> "Scene":
+    """
+    Checks if the definitions of walker with any speeds are valid. If so, creates the
+        scene holding them and calculates their paths. See create_walker for the
+        walker of the three usual speeds
+    :param walking_time: the 'time' each walker walks
+    :param walking_speeds: the speed of each walker, the number of steps it makes per
+        time. It must be a positive integer, but may differ from walker to walker,
+        e.g. from the classes of load_speed_classes
+    :param engine: 'vectorized' (default), 'loop' or 'endpoint', see create_walker
+    :param workers: the number of processes the walker are split up to
+    :param seed: the seed each walker gets its own random stream from
+    :param consumers: objects which get the paths chunk by chunk while they are
+        calculated. See Scene.calculate_the_paths
+    :param landscape: a landscape with obstacles all walker walk in
+    :param keep_paths: if False, the paths are only passed to the consumers and not
+        stored
+    :param cache: a result cache the scene is taken from or stored in. Only scenes
+        with a seed and with their paths are cached
+    :return: the scene
     """
-    number_of_walker = (
-        number_of_usual_walker + number_of_fast_walker + number_of_running_walker
+    check_walker(walking_time, walking_speeds)
+    assert engine in ENGINES, "The engine must be one of {}. You stated '{}'".format(
+        ENGINES, engine
     )
+    assert (
+        workers >= 1
+    ), "The number of workers must be at least '1'. " "You stated {}".format(workers)
+
+    key = None
+    # scenes without paths are not cached, they could not be passed to consumers
+    if cache is not None and seed is not None and keep_paths and engine != "endpoint":
+        key = cache.key(seed, walking_time, walking_speeds, landscape, engine)
+        scene = cache.load(key, seed, landscape)
+        if scene is not None:
+            scene.replay_paths(consumers)
+            return scene
+    scene = Scene(walking_time, walking_speeds, seed, landscape)
+    scene.calculate_the_paths(engine, workers, consumers, keep_paths)
+    if key is not None:
+        cache.store(key, scene)
+    return scene
+
+
+def check_walker(walking_time: int, walking_speeds: list) -> None:
+    """
+    Checks if the walking time and the speeds of the walker of a scene are valid
+    :param walking_time: the 'time' each walker walks
+    :param walking_speeds: the speed of each walker
+    """
     assert (
         walking_time >= 1
     ), "walking_time must be greater than '0'. " "You stated '{}'".format(
         walking_time - 1
     )
+    assert (
+        len(walking_speeds) > 0
+    ), "The number of walker must be greater than '1'. " "You stated {}".format(
+        len(walking_speeds)
+    )
+    assert all(
+        isinstance(speed, (int, np.integer)) and speed >= 1 for speed in walking_speeds
+    ), "The walking speeds must be positive integers. You stated {}".format(
+        sorted(set(walking_speeds))
+    )
+
+
+def first_passage(
+    walking_time: int,
+    walking_speeds: list,
+    target=None,
+    seed: int = None,
+    landscape: "Landscape" = None,
+) -> "FirstPassage":
+    """
+    Finds when and where walker first hit a target within their walking time, without
+        walking the rest of their paths. The walker are the same as the ones
+        create_scene creates with the same arguments, so they hit the target where
+        their calculated paths do.
+    :param walking_time: the 'time' each walker walks at most
+    :param walking_speeds: the speed of each walker, see create_scene
+    :param target: a DistanceTarget (default: the distance from which on a walker
+        takes a plane), a RegionTarget or ObstacleContact
+    :param seed: the seed each walker gets its own random stream from
+    :param landscape: a landscape with obstacles all walker walk in
+    :return: the hitting times and positions of the walker
+    """
+    check_walker(walking_time, walking_speeds)
+    return Scene(walking_time, walking_speeds, seed, landscape).first_passage(target)
+
+
+def summarise_first_passage(
+    hitting_steps: np.ndarray, positions: np.ndarray, walking_speeds: np.ndarray
+) -> "FirstPassage":
+    """
+    Describes the result of walk_to_target
+    :param hitting_steps: an array holding the step each walker hit the target at, -1
+        if it didn't
+    :param positions: an array of shape (walker, 2) holding the positions the walker
+        stopped at
+    :param walking_speeds: an array holding the speed of each walker
+    :return: the hitting times and positions
+    """
+    hit = hitting_steps >= 0
+    return FirstPassage(
+        hit,
+        hitting_steps,
+        np.where(hit, hitting_steps / walking_speeds, np.nan),
+        positions,
+    )
+
+
+def speeds_of_classes(
+    number_of_usual_walker: int,
+    number_of_fast_walker: int,
+    number_of_running_walker: int,
+) -> list:
+    """
+    Lists the speed of each walker of the three usual classes
+    :param number_of_usual_walker: the number of walker at usual speed
+    :param number_of_fast_walker: the number of walker walking fast
+    :param number_of_running_walker: the number of running walker
+    :return: a list holding the speed of each walker
+    """
     assert (
         number_of_usual_walker >= 0
         and number_of_fast_walker >= 0
@@ -50,41 +270,95 @@ def create_walker(
             number_of_usual_walker, number_of_fast_walker, number_of_running_walker
         )
     )
-    assert (
-        number_of_walker > 0
-    ), "The number of walker must be greater than '1'. " "You stated {}".format(
-        number_of_walker
+    # usual walker walk one step, fast walker two steps and running walker four steps
+    # per time
+    return (
+        [1] * number_of_usual_walker
+        + [2] * number_of_fast_walker
+        + [4] * number_of_running_walker
     )
-    assert (
-        number_of_walker <= 12
-    ), "The number of walker must be max. '12'. " "You stated {}".format(
-        number_of_walker
-    )
-
-    scene = []
-    for _ in range(number_of_usual_walker):
-        # create the array of a walker and add it to the scene-list
-        scene.append(Walker(walking_time, 1))
-    for _ in range(number_of_fast_walker):
-        # create the array of a walker and add it to the scene-list
-        scene.append(Walker(walking_time, 2))
-    for _ in range(number_of_running_walker):
-        # create the array of a running walker and add it to the scene-list
-        scene.append(Walker(walking_time, 4))
-    for walker in scene:
-        walker.calculate_the_path()
-        continue
-    return scene
 
 
-def plot_the_paths(list_of_walker: list, outfile_name: str) -> None:
+def load_speed_classes(file_name: str) -> list:
+    """
+    Reads user-defined classes of walker from a JSON file, an object holding for each
+        class its speed and number of walker, e.g.
+        {"strolling": {"speed": 1, "number": 3}, "cycling": {"speed": 8, "number": 1}}
+    :param file_name: the JSON file
+    :return: a list holding the speed of each walker, class after class
+    """
+    with open(file_name) as infile:
+        classes = json.load(infile)
+    assert isinstance(
+        classes, dict
+    ), "The speed classes must be a JSON object. '{}' holds {}".format(
+        file_name, type(classes).__name__
+    )
+    walking_speeds = []
+    for name, speed_class in classes.items():
+        assert isinstance(speed_class, dict) and {"speed", "number"} <= set(
+            speed_class
+        ), "The class '{}' needs a 'speed' and a 'number'. You stated {}".format(
+            name, speed_class
+        )
+        speed = speed_class["speed"]
+        number = speed_class["number"]
+        assert (
+            isinstance(speed, int) and speed >= 1
+        ), "The speed of '{}' must be a positive integer. You stated {}".format(
+            name, speed
+        )
+        assert (
+            isinstance(number, int) and number >= 0
+        ), "The number of walker of '{}' can't be negative. You stated {}".format(
+            name, number
+        )
+        walking_speeds += [speed] * number
+    return walking_speeds
+
+
+def plot_the_paths(
+    list_of_walker: list,
+    outfile_name: str,
+    render_mode: str = "full",
+    show: bool = True,
+    landscape: "Landscape" = None,
+    encounters: np.ndarray = None,
+) -> None:
     """
     Creates the plots of the calculated paths of the walker as well as the building
         next to it
     :param list_of_walker: A list holding the walker objects. Each object holds the
         coordinates of the respective path the walker walked.
     :param outfile_name: The file which will be created with the plotted paths
+    :param render_mode: 'full' (default) plots every coordinate, 'decimated' plots
+        each line between two pixels only once and 'density' plots how often each
+        pixel was visited. The last two draw at most a number of elements depending
+        on the resolution, not on the length of the paths. 'heatmap' plots how often
+        each position was visited by any walker in a single plot, see plot_heatmap
+    :param show: if True, the plot is shown to the user after saving it. If False,
+        the plot is only saved, without any interactive backend
+    :param landscape: a landscape whose obstacles are plotted instead of the buildings.
+        By default, the landscape the walker walked in is plotted
+    :param encounters: an array of encounters as found by EncounterDetector, which are
+        marked in the subplots of the walker who met
     """
+    assert (
+        render_mode in RENDER_MODES
+    ), "The render mode must be one of {}. You stated '{}'".format(
+        RENDER_MODES, render_mode
+    )
+    if render_mode == "heatmap":
+        heatmap = OccupancyHeatmap()
+        for walker in list_of_walker:
+            heatmap.add_walker(walker)
+        plot_heatmap(heatmap, outfile_name, show, landscape, encounters)
+        return
+    assert (
+        len(list_of_walker) <= 12
+    ), "A maximum of '12' walker can be plotted. " "You stated {}".format(
+        len(list_of_walker)
+    )
     # define the number of rows and columns of subplots
     if len(list_of_walker) == 1:
         columns_of_plots = 1
@@ -93,7 +367,8 @@ def plot_the_paths(list_of_walker: list, outfile_name: str) -> None:
     rows_of_plots = math.ceil(len(list_of_walker) / 2)
 
     # create the subplots
-    figure, axes = plt.subplots(rows_of_plots, columns_of_plots, squeeze=False)
+    figure = create_figure(show)
+    axes = figure.subplots(rows_of_plots, columns_of_plots, squeeze=False)
     figure.set_figheight(4.8 * rows_of_plots + 1)
     flying_walker = []
     for walker in enumerate(list_of_walker):
@@ -103,59 +378,18 @@ def plot_the_paths(list_of_walker: list, outfile_name: str) -> None:
             column = 0
         else:
             column = 1
-        if walker[1].walking_speed == 1:
-            walker_type = "walking casually"
-        elif walker[1].walking_speed == 2:
-            walker_type = "walking fast"
-        elif walker[1].walking_speed == 4:
-            walker_type = "running"
-        start_coordinates = np.array(walker[1].get_start_point())
-        end_coordinates = np.array(walker[1].get_end_point())
-        distance = start_coordinates - end_coordinates
-        if (
-            math.sqrt(distance[0] ** 2 + distance[1] ** 2)
-        ) >= 150:  # pythagorean theorem
-            axes[row, column].plot(
-                [start_coordinates[0], end_coordinates[0]],
-                [start_coordinates[1], end_coordinates[1]],
-            )
-            flying_walker.append(walker[0] + 1)
-        else:
-            axes[row, column].plot(walker[1].x_coordinates, walker[1].y_coordinates)
-        axes[row, column].fill(
-            [
-                walker[1].building[0],
-                walker[1].building[1],
-                walker[1].building[1],
-                walker[1].building[0],
-                walker[1].building[0],
-            ],
-            [
-                walker[1].building[2],
-                walker[1].building[2],
-                walker[1].building[3],
-                walker[1].building[3],
-                walker[1].building[2],
-            ],
-            c="grey",
-            label="Building",
-        )
-        axes[row, column].scatter(
-            walker[1].get_start_point()[0],
-            walker[1].get_start_point()[1],
-            label="Startposition",
-            marker="o",
-            c="turquoise",
-        )
-        axes[row, column].scatter(
-            walker[1].get_end_point()[0],
-            walker[1].get_end_point()[1],
-            label="Endposition",
-            marker="^",
-            c="orange",
-        )
-        axes[row, column].legend()
-        axes[row, column].set_title(f"Walker {walker[0] + 1} is {walker_type}")
+        with profiler.phase("plotting"):
+            if plot_walker(
+                axes[row, column],
+                walker[1],
+                walker[0] + 1,
+                render_mode,
+                landscape,
+                None
+                if encounters is None
+                else encounter_positions(encounters, walker[0]),
+            ):
+                flying_walker.append(walker[0] + 1)
 
     if len(list_of_walker) % 2 != 0 and len(list_of_walker) != 1:
         # if the number of walker is odd, delete the last (unused) subplot
@@ -164,92 +398,2022 @@ def plot_the_paths(list_of_walker: list, outfile_name: str) -> None:
     # arrange subplot to not interfere each other, save the figure to the outfile and
     # show the plot to the user
     if len(flying_walker) > 0:
-        plt.figtext(
+        figure.text(
             0.5,
             0.01,
             f"\nWalker(s) {flying_walker} took a plane, as they don't want to walk"
             f"such a long distance!",
             ha="center",
         )
-    figure.tight_layout(rect=[0, 0.01, 1, 1])
-    plt.savefig(outfile_name)
-    plt.show()
+    with profiler.phase("rendering"):
+        figure.tight_layout(rect=[0, 0.01, 1, 1])
+        figure.savefig(outfile_name)
+    if show:
+        import matplotlib.pyplot as plt
 
+        plt.show()
 
-class Walker:
-    """Represents a walker to which a walking speed and walking time are given"""
 
-    def __init__(self, walking_time: int, walking_speed: int):
-        self.walking_speed = walking_speed
-        self.walking_time = walking_time
-        self.number_of_steps = self.walking_time * self.walking_speed + 1
-        (self.x_coordinates, self.y_coordinates) = self.assign_random_coordinates()
-        self.building = self.create_building()
+def create_figure(show: bool, **figure_arguments):
+    """
+    Creates a figure. Matplotlib is only imported here, so the simulation does not
+        need to load it. Only figures which are shown use pyplot and its interactive
+        backend
+    :param show: if True, the figure is created by pyplot to be shown later
+    :param figure_arguments: the arguments of the figure, e.g. figsize
+    :return: the figure
+    """
+    if show:
+        import matplotlib.pyplot as plt
+
+        return plt.figure(**figure_arguments)
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figure = Figure(**figure_arguments)
+    FigureCanvasAgg(figure)
+    return figure
+
+
+def plot_walker(
+    axes,
+    walker: "Walker",
+    number: int,
+    render_mode: str,
+    landscape: "Landscape" = None,
+    encounters: np.ndarray = None,
+) -> bool:
+    """
+    Plots the path of a walker, its building and its start and end position in a
+        subplot. If the walker went too far, only the flight from the start to the end
+        position is plotted.
+    :param axes: the subplot
+    :param walker: the walker object. If only its end point was calculated, the line
+        from the start to the end position is plotted like a flight
+    :param number: the number of the walker shown in the title
+    :param render_mode: 'full', 'decimated' or 'density', see plot_the_paths
+    :param landscape: a landscape whose obstacles are plotted instead of the building.
+        By default, the landscape the walker walked in is plotted
+    :param encounters: an array of shape (encounters, 2) holding the positions where
+        the walker met others, which are marked
+    :return: True if the walker took a plane, otherwise False
+    """
+    if landscape is None:
+        landscape = walker.landscape
+    walker_type = SPEED_NAMES.get(
+        walker.walking_speed, f"walking at speed {walker.walking_speed}"
+    )
+    start_coordinates = np.array(walker.get_start_point())
+    end_coordinates = np.array(walker.get_end_point())
+    distance = start_coordinates - end_coordinates
+    flying = (
+        math.sqrt(distance[0] ** 2 + distance[1] ** 2)
+    ) >= FLYING_DISTANCE  # pythagorean theorem
+    if flying or walker.path_dropped:
+        axes.plot(
+            [start_coordinates[0], end_coordinates[0]],
+            [start_coordinates[1], end_coordinates[1]],
+        )
+    else:
+        plot_path(axes, walker.x_coordinates, walker.y_coordinates, render_mode)
+    if landscape is not None:
+        plot_obstacles(
+            axes, landscape.obstacles, path_extent(*axes.dataLim.get_points().T)
+        )
+    else:
+        plot_building(axes, walker.building)
+    axes.scatter(
+        walker.get_start_point()[0],
+        walker.get_start_point()[1],
+        label="Startposition",
+        marker="o",
+        c="turquoise",
+    )
+    axes.scatter(
+        walker.get_end_point()[0],
+        walker.get_end_point()[1],
+        label="Endposition",
+        marker="^",
+        c="orange",
+    )
+    if encounters is not None and len(encounters) > 0:
+        plot_encounters(axes, encounters)
+    axes.legend()
+    axes.set_title(f"Walker {number} is {walker_type}")
+    return flying
+
+
+def plot_obstacles(
+    axes, obstacles: np.ndarray, extent: list, label: str = "Obstacles"
+) -> None:
+    """
+    Plots the obstacles of a landscape or buildings which are within an area. The
+        obstacles don't change the limits of the subplot, so it still shows the path
+    :param axes: the subplot
+    :param obstacles: an array of shape (obstacles, 4) holding xmin, xmax, ymin, ymax
+        of each obstacle, e.g. the obstacles of a landscape
+    :param extent: the area as xmin, xmax, ymin, ymax
+    :param label: the label of the obstacles in the legend
+    """
+    from matplotlib.collections import PolyCollection
+
+    visible = (
+        (obstacles[:, 0] < extent[1])
+        & (obstacles[:, 1] > extent[0])
+        & (obstacles[:, 2] < extent[3])
+        & (obstacles[:, 3] > extent[2])
+    )
+    axes.add_collection(
+        PolyCollection(
+            obstacles[visible][:, [[0, 2], [1, 2], [1, 3], [0, 3]]],
+            facecolors="grey",
+            label=label,
+        ),
+        autolim=False,
+    )
+
+
+def plot_building(axes, building: list) -> None:
+    """
+    Plots the building of a walker
+    :param axes: the subplot
+    :param building: the 4 coordinates of the building
+    """
+    axes.fill(
+        [building[0], building[1], building[1], building[0], building[0]],
+        [building[2], building[2], building[3], building[3], building[2]],
+        c="grey",
+        label="Building",
+    )
+
+
+def plot_encounters(axes, positions: np.ndarray) -> None:
+    """
+    Marks the positions where walker met others
+    :param axes: the subplot
+    :param positions: an array of shape (encounters, 2) holding x and y
+    """
+    axes.scatter(
+        positions[:, 0],
+        positions[:, 1],
+        label="Encounters",
+        marker="x",
+        c="red",
+        zorder=3,
+    )
+
+
+def plot_heatmap(
+    heatmap: "OccupancyHeatmap",
+    outfile_name: str,
+    show: bool = True,
+    landscape: "Landscape" = None,
+    encounters: np.ndarray = None,
+) -> None:
+    """
+    Plots how often each position was visited by any walker, together with the
+        buildings of the walker or the obstacles of the landscape they walked in. The
+        cost does not depend on the number of walker or steps, but on the area.
+    :param heatmap: the heatmap holding the visits
+    :param outfile_name: The file which will be created with the plot
+    :param show: if True, the plot is shown to the user after saving it. If False,
+        the plot is only saved, without any interactive backend
+    :param landscape: a landscape whose obstacles are plotted instead of the buildings.
+        By default, the landscape the walker walked in is plotted
+    :param encounters: an array of encounters as found by EncounterDetector, which are
+        marked
+    """
+    if landscape is None:
+        landscape = heatmap.landscape
+    figure = create_figure(show, figsize=(8, 7))
+    axes = figure.subplots()
+    with profiler.phase("plotting"):
+        visits, extent = heatmap.to_image(HEATMAP_RESOLUTION)
+        image = axes.imshow(
+            np.ma.masked_equal(np.log1p(visits), 0),
+            extent=extent,
+            origin="lower",
+            interpolation="nearest",
+            cmap="viridis",
+        )
+        figure.colorbar(image, ax=axes, label="log(1 + visits)")
+        if landscape is not None:
+            plot_obstacles(axes, landscape.obstacles, extent)
+        elif heatmap.buildings is not None:
+            plot_obstacles(axes, heatmap.buildings, extent, "Buildings")
+        if encounters is not None and len(encounters) > 0:
+            plot_encounters(axes, encounters[:, 3:5])
+            axes.legend()
+        axes.set_title(f"Visits of {heatmap.number_of_walker} walker")
+    with profiler.phase("rendering"):
+        figure.tight_layout()
+        figure.savefig(outfile_name)
+    if show:
+        import matplotlib.pyplot as plt
+
+        plt.show()
+
+
+def render_walker_panels(
+    list_of_walker: list,
+    outfile_name: str,
+    workers: int = 1,
+    render_mode: str = "full",
+    composite: bool = True,
+    landscape: "Landscape" = None,
+    encounters: np.ndarray = None,
+) -> list:
+    """
+    Renders the plot of each walker into its own image, in several processes at once.
+        The images are saved next to the outfile as '<name>_walker_<number><suffix>'.
+        Optionally, they are put together into the outfile in the same layout as
+        plot_the_paths uses, two walker next to each other.
+    :param list_of_walker: A list holding the walker objects
+    :param outfile_name: The file which will be created with the plotted paths
+    :param workers: the number of processes rendering the images
+    :param render_mode: 'full', 'decimated' or 'density', see plot_the_paths
+    :param composite: if True, the images are put together into the outfile
+    :param landscape: a landscape whose obstacles are plotted instead of the buildings.
+        By default, the landscape the walker walked in is plotted
+    :param encounters: an array of encounters as found by EncounterDetector, which are
+        marked in the images of the walker who met
+    :return: a list holding the file names of the images of the walker
+    """
+    assert (
+        render_mode in RENDER_MODES
+    ), "The render mode must be one of {}. You stated '{}'".format(
+        RENDER_MODES, render_mode
+    )
+    assert (
+        render_mode != "heatmap"
+    ), "The heatmap shows all walker in one image, use plot_the_paths"
+    assert (
+        workers >= 1
+    ), "The number of workers must be at least '1'. " "You stated {}".format(workers)
+    name, suffix = os.path.splitext(outfile_name)
+    panel_names = [
+        f"{name}_walker_{number}{suffix}"
+        for number in range(1, len(list_of_walker) + 1)
+    ]
+    arguments = (
+        list_of_walker,
+        range(1, len(list_of_walker) + 1),
+        panel_names,
+        repeat(render_mode),
+        repeat(landscape),
+        (
+            repeat(None)
+            if encounters is None
+            else (
+                encounter_positions(encounters, index)
+                for index in range(len(list_of_walker))
+            )
+        ),
+    )
+    with profiler.phase("rendering"):
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                flying = list(executor.map(_render_walker_panel, *arguments))
+        else:
+            flying = list(map(_render_walker_panel, *arguments))
+        if composite:
+            flying_walker = [
+                number for number, plane in enumerate(flying, start=1) if plane
+            ]
+            composite_panels(panel_names, outfile_name, flying_walker)
+    return panel_names
+
+
+def _render_walker_panel(
+    walker: "Walker",
+    number: int,
+    panel_name: str,
+    render_mode: str,
+    landscape: "Landscape" = None,
+    encounters: np.ndarray = None,
+) -> bool:
+    """
+    Renders the plot of one walker into an image. This is executed in the worker
+        processes
+    :param walker: the walker object
+    :param number: the number of the walker shown in the title
+    :param panel_name: the image to be created
+    :param render_mode: 'full', 'decimated' or 'density', see plot_the_paths
+    :param landscape: a landscape whose obstacles are plotted instead of the building
+    :param encounters: an array of shape (encounters, 2) holding the positions where
+        the walker met others, which are marked
+    :return: True if the walker took a plane, otherwise False
+    """
+    # half the width of the figure of plot_the_paths, as it holds two walker per row
+    figure = create_figure(False, figsize=(3.2, 4.8))
+    flying = plot_walker(
+        figure.subplots(), walker, number, render_mode, landscape, encounters
+    )
+    figure.tight_layout()
+    figure.savefig(panel_name)
+    return flying
+
+
+def composite_panels(panel_names: list, outfile_name: str, flying_walker: list) -> None:
+    """
+    Puts the images of the walker together, two walker next to each other
+    :param panel_names: the file names of the images of the walker
+    :param outfile_name: The file which will be created
+    :param flying_walker: the numbers of the walker which took a plane
+    """
+    from matplotlib.image import imread
+
+    panels = [imread(panel_name) for panel_name in panel_names]
+    height, width, channels = panels[0].shape
+    columns_of_plots = 1 if len(panels) == 1 else 2
+    rows_of_plots = math.ceil(len(panels) / 2)
+    # leave space for the note about the walker taking a plane at the bottom
+    note_height = 40 if flying_walker else 0
+    composite = np.ones(
+        (rows_of_plots * height + note_height, columns_of_plots * width, channels),
+        dtype=panels[0].dtype,
+    )
+    for number, panel in enumerate(panels):
+        row = number // 2
+        column = number % 2
+        composite[
+            row * height : (row + 1) * height, column * width : (column + 1) * width
+        ] = panel
+    dpi = 100
+    figure = create_figure(
+        False, figsize=(composite.shape[1] / dpi, composite.shape[0] / dpi), dpi=dpi
+    )
+    figure.figimage(composite, origin="upper")
+    if flying_walker:
+        figure.text(
+            0.5,
+            0.01,
+            f"Walker(s) {flying_walker} took a plane, as they don't want to walk "
+            f"such a long distance!",
+            ha="center",
+        )
+    figure.savefig(outfile_name, dpi=dpi)
+
+
+def animate_the_paths(
+    list_of_walker: list,
+    outfile_name: str,
+    frames: int = ANIMATION_FRAMES,
+    frame_duration: int = ANIMATION_FRAME_DURATION,
+    landscape: "Landscape" = None,
+) -> list:
+    """
+    Creates an animation of the walker walking their paths, saved as a GIF or as a
+        sequence of images. Only a bounded number of points in time is shown, so long
+        walks skip steps between two frames. Each frame only draws the part of the
+        paths walked since the last frame on top of the previous frame (blitting), the
+        figure, buildings and axes are drawn once, so the time does not depend on how
+        often the paths are drawn again, but only on their length
+    :param list_of_walker: A list holding the walker objects
+    :param outfile_name: The file which will be created. A '.gif' file holds all
+        frames, otherwise each frame is saved as '<name>_<frame><suffix>'
+    :param frames: the largest number of frames, which are spread evenly over the
+        walking time
+    :param frame_duration: the time each frame is shown in milliseconds
+    :param landscape: a landscape whose obstacles are plotted instead of the buildings.
+        By default, the landscape the walker walked in is plotted
+    :return: a list holding the file names of the created images
+    """
+    from PIL import Image
+
+    assert (
+        len(list_of_walker) <= 12
+    ), "A maximum of '12' walker can be plotted. " "You stated {}".format(
+        len(list_of_walker)
+    )
+    assert frames >= 2, "The animation needs at least '2' frames. You stated {}".format(
+        frames
+    )
+    columns_of_plots = 1 if len(list_of_walker) == 1 else 2
+    rows_of_plots = math.ceil(len(list_of_walker) / 2)
+    figure = create_figure(False)
+    axes = figure.subplots(rows_of_plots, columns_of_plots, squeeze=False).ravel()
+    figure.set_figheight(4.8 * rows_of_plots + 1)
+    if len(list_of_walker) % 2 != 0 and len(list_of_walker) != 1:
+        figure.delaxes(axes[-1])
+    walking_time = max(walker.walking_time for walker in list_of_walker)
+    times = np.unique(np.linspace(0, walking_time, frames).round().astype(np.int64))
+    paths = []
+    with profiler.phase("plotting"):
+        for number, (walker_axes, walker) in enumerate(
+            zip(axes, list_of_walker), start=1
+        ):
+            x_coordinates = walker.x_coordinates
+            y_coordinates = walker.y_coordinates
+            extent = path_extent(x_coordinates, y_coordinates)
+            walker_axes.update_datalim([extent[::2], extent[1::2]])
+            obstacles = landscape if landscape is not None else walker.landscape
+            if obstacles is not None:
+                plot_obstacles(
+                    walker_axes,
+                    obstacles.obstacles,
+                    path_extent(*walker_axes.dataLim.get_points().T),
+                )
+            else:
+                plot_building(walker_axes, walker.building)
+            walker_axes.autoscale_view()
+            # the artists of the path are only drawn by blitting, not with the figure.
+            # The markers are drawn again on top of the path each frame
+            (line,) = walker_axes.plot([], [], label="Path", animated=True)
+            start = walker_axes.scatter(
+                x_coordinates[0],
+                y_coordinates[0],
+                label="Startposition",
+                marker="o",
+                c="turquoise",
+                animated=True,
+            )
+            (position,) = walker_axes.plot(
+                [], [], "^", c="orange", label="Position", animated=True
+            )
+            walker_type = SPEED_NAMES.get(
+                walker.walking_speed, f"walking at speed {walker.walking_speed}"
+            )
+            walker_axes.set_title(f"Walker {number} is {walker_type}")
+            paths.append(
+                (
+                    walker_axes,
+                    x_coordinates,
+                    y_coordinates,
+                    np.minimum(
+                        times * walker.walking_speed, walker.number_of_steps - 1
+                    ),
+                    line,
+                    [start, position],
+                )
+            )
+        # the legend is outside of the subplots, so the paths never cover it
+        figure.legend(*axes[0].get_legend_handles_labels(), loc="lower center", ncol=4)
+        clock = figure.text(0.5, 0.99, "", ha="center", va="top", animated=True)
+        figure.tight_layout(rect=[0, 0.05, 1, 0.96])
+
+    def render():
+        """Draws the frames one after the other"""
+        canvas = figure.canvas
+        canvas.draw()
+        background = canvas.copy_from_bbox(figure.bbox)
+        last_steps = np.zeros(len(paths), dtype=np.int64)
+        palette = None
+        for frame, current_time in enumerate(times):
+            canvas.restore_region(background)
+            for index, (walker_axes, x, y, steps, line, _) in enumerate(paths):
+                step = int(steps[frame])
+                if step > last_steps[index]:
+                    # the new part starts at the last position to connect it
+                    line.set_data(
+                        x[last_steps[index] : step + 1], y[last_steps[index] : step + 1]
+                    )
+                    walker_axes.draw_artist(line)
+                    last_steps[index] = step
+            background = canvas.copy_from_bbox(figure.bbox)
+            for walker_axes, x, y, steps, _, overlay in paths:
+                step = int(steps[frame])
+                overlay[1].set_data([x[step]], [y[step]])
+                for artist in overlay:
+                    walker_axes.draw_artist(artist)
+            clock.set_text(f"time {current_time} of {walking_time}")
+            figure.draw_artist(clock)
+            image = Image.fromarray(np.asarray(canvas.buffer_rgba())).convert("RGB")
+            if palette is None:
+                # all frames share the colours of the first one, which already shows
+                # the colour of the paths in the legend
+                palette = image.quantize()
+            yield image.quantize(palette=palette, dither=Image.Dither.NONE)
+
+    name, suffix = os.path.splitext(outfile_name)
+    with profiler.phase("rendering"):
+        if suffix.lower() == ".gif":
+            # the frames are rendered while they are written, so only one of them is
+            # held in memory
+            images = render()
+            next(images).save(
+                outfile_name,
+                save_all=True,
+                append_images=images,
+                duration=frame_duration,
+                loop=0,
+                optimize=False,
+            )
+            return [outfile_name]
+        frame_names = []
+        for frame, image in enumerate(render()):
+            frame_names.append(f"{name}_{frame:04d}{suffix}")
+            image.save(frame_names[-1])
+        return frame_names
+
+
+def plot_path(
+    axes, x_coordinates: np.ndarray, y_coordinates: np.ndarray, render_mode: str
+) -> None:
+    """
+    Plots the path of a walker in the respective render mode
+    :param axes: the subplot the path is plotted in
+    :param x_coordinates: an array holding the x-coordinates of the path
+    :param y_coordinates: an array holding the y-coordinates of the path
+    :param render_mode: 'full', 'decimated' or 'density', see plot_the_paths
+    """
+    if render_mode == "full":
+        axes.plot(x_coordinates, y_coordinates)
+        return
+    extent = path_extent(x_coordinates, y_coordinates)
+    # a pixel is not smaller than a unit, so neighbouring positions touch
+    resolution = (
+        max(min(int(axes.bbox.width), int(extent[1] - extent[0])), 1),
+        max(min(int(axes.bbox.height), int(extent[3] - extent[2])), 1),
+    )
+    if render_mode == "decimated":
+        from matplotlib.collections import LineCollection
+
+        axes.add_collection(
+            LineCollection(
+                pixel_segments(x_coordinates, y_coordinates, extent, resolution),
+                colors="C0",
+            )
+        )
+        axes.autoscale_view()
+    else:
+        visits = pixel_visits(x_coordinates, y_coordinates, extent, resolution)
+        axes.imshow(
+            np.ma.masked_equal(np.log1p(visits), 0),
+            extent=extent,
+            origin="lower",
+            aspect="auto",
+            interpolation="nearest",
+            cmap="viridis",
+        )
+
+
+def path_extent(x_coordinates: np.ndarray, y_coordinates: np.ndarray) -> list:
+    """
+    Calculates the area a path covers, extended by half a unit to each side
+    :param x_coordinates: an array holding the x-coordinates of the path
+    :param y_coordinates: an array holding the y-coordinates of the path
+    :return: a list holding xmin, xmax, ymin, ymax
+    """
+    return [
+        float(np.min(x_coordinates)) - 0.5,
+        float(np.max(x_coordinates)) + 0.5,
+        float(np.min(y_coordinates)) - 0.5,
+        float(np.max(y_coordinates)) + 0.5,
+    ]
+
+
+def pixel_indices(
+    x_coordinates: np.ndarray,
+    y_coordinates: np.ndarray,
+    extent: list,
+    resolution: tuple,
+) -> np.ndarray:
+    """
+    Calculates the pixel each position of a path is drawn in
+    :param x_coordinates: an array holding the x-coordinates of the path
+    :param y_coordinates: an array holding the y-coordinates of the path
+    :param extent: the area which is drawn as xmin, xmax, ymin, ymax
+    :param resolution: the number of pixels in x- and y-direction
+    :return: an array holding the index of the pixel (row by row) of each position
+    """
+    columns = (
+        (np.asarray(x_coordinates) - extent[0])
+        / (extent[1] - extent[0])
+        * resolution[0]
+    ).astype(np.int64)
+    rows = (
+        (np.asarray(y_coordinates) - extent[2])
+        / (extent[3] - extent[2])
+        * resolution[1]
+    ).astype(np.int64)
+    return np.clip(rows, 0, resolution[1] - 1) * resolution[0] + np.clip(
+        columns, 0, resolution[0] - 1
+    )
+
+
+def pixel_segments(
+    x_coordinates: np.ndarray,
+    y_coordinates: np.ndarray,
+    extent: list,
+    resolution: tuple,
+) -> np.ndarray:
+    """
+    Reduces a path to the lines between the centres of the pixels it passes. Each line
+        is kept only once, no matter how often the walker passed it, so the number of
+        lines is bounded by the resolution. The path is processed in chunks.
+    :param x_coordinates: an array holding the x-coordinates of the path
+    :param y_coordinates: an array holding the y-coordinates of the path
+    :param extent: the area which is drawn as xmin, xmax, ymin, ymax
+    :param resolution: the number of pixels in x- and y-direction
+    :return: an array of shape (lines, 2, 2) holding the start and end of each line
+    """
+    number_of_pixels = resolution[0] * resolution[1]
+    lines = np.empty(0, dtype=np.int64)
+    for first in range(0, len(x_coordinates), PLOT_CHUNK_SIZE):
+        # the chunks overlap by one position to keep the line between them
+        last = first + PLOT_CHUNK_SIZE + 1
+        pixels = pixel_indices(
+            x_coordinates[first:last], y_coordinates[first:last], extent, resolution
+        )
+        changes = np.flatnonzero(pixels[1:] != pixels[:-1])
+        start_pixels = np.minimum(pixels[changes], pixels[changes + 1])
+        end_pixels = np.maximum(pixels[changes], pixels[changes + 1])
+        lines = np.union1d(lines, start_pixels * number_of_pixels + end_pixels)
+    pixel_size = np.array(
+        [
+            (extent[1] - extent[0]) / resolution[0],
+            (extent[3] - extent[2]) / resolution[1],
+        ]
+    )
+    ends = np.stack([lines // number_of_pixels, lines % number_of_pixels], axis=1)
+    centres = np.stack([ends % resolution[0], ends // resolution[0]], axis=2)
+    return (centres + 0.5) * pixel_size + [extent[0], extent[2]]
+
+
+def pixel_visits(
+    x_coordinates: np.ndarray,
+    y_coordinates: np.ndarray,
+    extent: list,
+    resolution: tuple,
+) -> np.ndarray:
+    """
+    Counts how often a path visits each pixel. The path is processed in chunks.
+    :param x_coordinates: an array holding the x-coordinates of the path
+    :param y_coordinates: an array holding the y-coordinates of the path
+    :param extent: the area which is drawn as xmin, xmax, ymin, ymax
+    :param resolution: the number of pixels in x- and y-direction
+    :return: an array of shape (pixels in y-direction, pixels in x-direction) holding
+        the number of visits
+    """
+    visits = np.zeros(resolution[0] * resolution[1], dtype=np.int64)
+    for first in range(0, len(x_coordinates), PLOT_CHUNK_SIZE):
+        last = first + PLOT_CHUNK_SIZE
+        visits += np.bincount(
+            pixel_indices(
+                x_coordinates[first:last], y_coordinates[first:last], extent, resolution
+            ),
+            minlength=len(visits),
+        )
+    return visits.reshape(resolution[1], resolution[0])
+
+
+def inside_buildings(
+    x_coordinates: np.ndarray, y_coordinates: np.ndarray, buildings: np.ndarray
+) -> np.ndarray:
+    """
+    Checks which positions are inside the building of the respective walker
+    :param x_coordinates: an array of shape (walker, steps) with the x-coordinates
+    :param y_coordinates: an array of shape (walker, steps) with the y-coordinates
+    :param buildings: an array of shape (walker, 4) holding the building of each walker
+        as xmin, xmax, ymin, ymax
+    :return: a boolean array of shape (walker, steps), True inside the building
+    """
+    return (
+        (x_coordinates > buildings[:, 0:1])
+        & (x_coordinates < buildings[:, 1:2])
+        & (y_coordinates > buildings[:, 2:3])
+        & (y_coordinates < buildings[:, 3:4])
+    )
+
+
+def blocked_positions(
+    x_coordinates: np.ndarray, y_coordinates: np.ndarray, obstacles
+) -> np.ndarray:
+    """
+    Checks which positions are inside the building of the respective walker or inside
+        an obstacle of the landscape
+    :param x_coordinates: an array of shape (walker, steps) with the x-coordinates
+    :param y_coordinates: an array of shape (walker, steps) with the y-coordinates
+    :param obstacles: an array of shape (walker, 4) holding the building of each walker
+        or a landscape all walker walk in
+    :return: a boolean array of shape (walker, steps), True inside an obstacle
+    """
+    if isinstance(obstacles, Landscape):
+        return obstacles.blocked(x_coordinates, y_coordinates)
+    return inside_buildings(x_coordinates, y_coordinates, obstacles)
+
+
+def obstacle_distances(
+    x_coordinates: np.ndarray, y_coordinates: np.ndarray, obstacles
+) -> np.ndarray:
+    """
+    Calculates the number of steps from each position to the next position inside the
+        building of the respective walker or inside an obstacle of the landscape
+    :param x_coordinates: an array holding the x-coordinate of each walker
+    :param y_coordinates: an array holding the y-coordinate of each walker
+    :param obstacles: an array of shape (walker, 4) holding the building of each walker
+        or a landscape all walker walk in
+    :return: an array holding the distances (Manhattan distance)
+    """
+    if isinstance(obstacles, Landscape):
+        return obstacles.distance(x_coordinates, y_coordinates)
+    # the integer positions strictly inside the buildings
+    lower_x = np.floor(obstacles[:, 0]) + 1
+    upper_x = np.ceil(obstacles[:, 1]) - 1
+    lower_y = np.floor(obstacles[:, 2]) + 1
+    upper_y = np.ceil(obstacles[:, 3]) - 1
+    return (
+        np.maximum(lower_x - x_coordinates, 0)
+        + np.maximum(x_coordinates - upper_x, 0)
+        + np.maximum(lower_y - y_coordinates, 0)
+        + np.maximum(y_coordinates - upper_y, 0)
+    )
+
+
+def distances_along_axis(distances: np.ndarray, axis: int) -> np.ndarray:
+    """
+    Spreads distances along one axis of a grid, so each cell gets the smallest
+        distance of any cell of its row (or column) plus the number of steps to it
+    :param distances: a 2D array holding the distances
+    :param axis: the axis along which the distances are spread
+    :return: an array of the same shape holding the spread distances
+    """
+    shape = [1, 1]
+    shape[axis] = -1
+    indices = np.arange(distances.shape[axis], dtype=distances.dtype).reshape(shape)
+    forward = np.minimum.accumulate(distances - indices, axis=axis) + indices
+    backward = (
+        np.flip(
+            np.minimum.accumulate(np.flip(distances + indices, axis), axis=axis), axis
+        )
+        - indices
+    )
+    return np.minimum(forward, backward)
+
+
+def walk_to_end_points(
+    start_x: np.ndarray,
+    start_y: np.ndarray,
+    obstacles,
+    remaining_steps: np.ndarray,
+    step_generators: list,
+    collision_generators: list,
+    rejected_steps: np.ndarray = None,
+) -> tuple:
+    """
+    Calculates where several walker end without calculating their paths. A walker which
+        is further away from any obstacle than it walks in the next steps cannot
+        collide, so only the number of steps in each direction matters and the walker
+        jumps over all of them at once. Far away from the obstacles the jumps get
+        longer than the distance, as long as the probability to reach an obstacle
+        within the jump is below JUMP_TOLERANCE. Each walker draws its jumps from its
+        own step generator, so its end point does not depend on the other walker.
+        Walker close to an obstacle walk single steps until they are far enough away
+        again.
+    :param start_x: an array holding the current x-coordinate of each walker
+    :param start_y: an array holding the current y-coordinate of each walker
+    :param obstacles: an array of shape (walker, 4) holding the building of each walker
+        or a landscape all walker walk in
+    :param remaining_steps: an array holding the number of steps each walker walks
+    :param step_generators: the random generator of each walker to draw the steps from
+    :param collision_generators: the random generator of each walker to draw the
+        replacements of steps into the building from
+    :param rejected_steps: if given, an array the number of steps into an obstacle of
+        each walker is added to
+    :return: a tuple of two arrays holding the x- and the y-coordinate of each end point
+    """
+    end_x = np.array(start_x, dtype=np.int64)
+    end_y = np.array(start_y, dtype=np.int64)
+    remaining_steps = np.array(remaining_steps, dtype=np.int64)
+    walking = np.flatnonzero(remaining_steps > 0)
+    while walking.size > 0:
+        # within less steps than its distance a walker cannot reach any obstacle
+        reach = (
+            obstacle_distances(
+                end_x[walking], end_y[walking], obstacles_of_rows(obstacles, walking)
+            )
+            - 1
+        )
+        far = reach >= JUMP_DISTANCE
+        # each step changes both diagonal coordinates x + y and x - y by one, up or
+        # down independently of each other. Hoeffding's inequality bounds the
+        # probability that either of them gets as far as the obstacle within the jump
+        safe_steps = (reach[far] + 1) ** 2 / (2 * math.log(8 / JUMP_TOLERANCE))
+        jumps = np.minimum(
+            np.maximum(reach[far], safe_steps), remaining_steps[walking[far]]
+        ).astype(np.int64)
+        if jumps.size > 0:
+            # the number of steps up along both diagonals within the jump
+            ups = np.array(
+                [
+                    step_generators[row].binomial(jump, 0.5, 2)
+                    for row, jump in zip(walking[far].tolist(), jumps.tolist())
+                ]
+            )
+            diagonals = 2 * ups - jumps[:, None]
+            end_x[walking[far]] += (diagonals[:, 0] + diagonals[:, 1]) // 2
+            end_y[walking[far]] += (diagonals[:, 0] - diagonals[:, 1]) // 2
+            remaining_steps[walking[far]] -= jumps
+            profiler.count("jumped_steps", int(jumps.sum()))
+        near = walking[~far]
+        if near.size > 0:
+            block_lengths = np.minimum(remaining_steps[near], SEGMENT_LENGTH)
+            near_rejected_steps = (
+                np.zeros(near.size, dtype=np.int64)
+                if rejected_steps is not None
+                else None
+            )
+            _, x_block, y_block = walk_block(
+                end_x[near],
+                end_y[near],
+                obstacles_of_rows(obstacles, near),
+                block_lengths,
+                [step_generators[row] for row in near],
+                [collision_generators[row] for row in near],
+                near_rejected_steps,
+            )
+            if rejected_steps is not None:
+                rejected_steps[near] += near_rejected_steps
+            end_x[near] = x_block[:, -1]
+            end_y[near] = y_block[:, -1]
+            remaining_steps[near] -= block_lengths
+        walking = walking[remaining_steps[walking] > 0]
+    return end_x, end_y
+
+
+class DistanceTarget:
+    """
+    A walker hits this target as soon as it is at least a distance away from its start
+        point, by default the distance from which on it takes a plane
+    """
 
-    def assign_random_coordinates(self) -> tuple:
+    def __init__(self, distance: float = FLYING_DISTANCE):
         """
-        This function creates random coordinates, as many as the walker does steps.
-            These will be updated later when the walker walks by calling the function
-            calculate_the_path()
-        :return: A tuple of two arrays holding the x- or y-coordinates
+        :param distance: the distance from the start point
         """
-        # create random coordinates
-        x_coord = np.random.randint(
-            low=0, high=self.number_of_steps, size=self.number_of_steps
-        )
-        y_coord = np.random.randint(
-            low=0, high=self.number_of_steps, size=self.number_of_steps
+        assert distance >= 0, "The distance can't be negative. You stated {}".format(
+            distance
         )
-        return x_coord, y_coord
+        self.distance = distance
 
-    def calculate_the_path(self) -> None:
+    def hits(
+        self,
+        start_points: np.ndarray,
+        x_coordinates: np.ndarray,
+        y_coordinates: np.ndarray,
+        obstacles,
+    ) -> np.ndarray:
         """
-        Calculates the path the walker walks by updating each position and checking if
-        the walker does not collide with the building.
+        Checks which positions are far enough away from the start point
+        :param start_points: an array of shape (walker, 2) holding the start points
+        :param x_coordinates: an array of shape (walker, steps) with the x-coordinates
+        :param y_coordinates: an array of shape (walker, steps) with the y-coordinates
+        :param obstacles: the buildings of the walker or a landscape, not needed here
+        :return: a boolean array of shape (walker, steps), True at the target
         """
-        # calculate new coordinates for each step
-        for step_number in range(1, self.number_of_steps):
-            self.calculate_next_step(step_number)
-            while (
-                (self.x_coordinates[step_number] > self.building[0])
-                and (self.x_coordinates[step_number] < self.building[1])
-                and (self.y_coordinates[step_number] > self.building[2])
-                and (self.y_coordinates[step_number] < self.building[3])
-            ):
-                self.calculate_next_step(step_number)
+        return (x_coordinates - start_points[:, 0:1]) ** 2 + (
+            y_coordinates - start_points[:, 1:2]
+        ) ** 2 >= self.distance**2
 
-    def get_start_point(self) -> list:
+
+class RegionTarget:
+    """
+    A walker hits this target as soon as it enters a rectangular region
+    """
+
+    def __init__(self, region: list):
         """
-        gets the starting position of the walker
-        :return: a list with the x-coordinate as the first element and the y-coordinate
-            as the second element
+        :param region: the region as xmin, xmax, ymin, ymax, the borders belong to it
         """
-        return [self.x_coordinates[0], self.y_coordinates[0]]
+        assert (
+            len(region) == 4 and region[0] <= region[1] and region[2] <= region[3]
+        ), "The region must be given as xmin, xmax, ymin, ymax. You stated {}".format(
+            region
+        )
+        self.region = list(region)
 
-    def get_end_point(self) -> list:
+    def hits(
+        self,
+        start_points: np.ndarray,
+        x_coordinates: np.ndarray,
+        y_coordinates: np.ndarray,
+        obstacles,
+    ) -> np.ndarray:
         """
-        gets the last position of the walker
-        :return: a list with the x-coordinate as the first element and the y-coordinate
-            as the second element
+        Checks which positions are inside the region
+        :param start_points: the start points of the walker, not needed here
+        :param x_coordinates: an array of shape (walker, steps) with the x-coordinates
+        :param y_coordinates: an array of shape (walker, steps) with the y-coordinates
+        :param obstacles: the buildings of the walker or a landscape, not needed here
+        :return: a boolean array of shape (walker, steps), True at the target
         """
-        return [self.x_coordinates[-1], self.y_coordinates[-1]]
+        return (
+            (x_coordinates >= self.region[0])
+            & (x_coordinates <= self.region[1])
+            & (y_coordinates >= self.region[2])
+            & (y_coordinates <= self.region[3])
+        )
 
-    def calculate_next_step(self, step_number: int) -> None:
+
+class ObstacleContact:
+    """
+    A walker hits this target as soon as it stands next to its building or an obstacle
+        of the landscape, so one of its next steps could lead into it
+    """
+
+    def hits(
+        self,
+        start_points: np.ndarray,
+        x_coordinates: np.ndarray,
+        y_coordinates: np.ndarray,
+        obstacles,
+    ) -> np.ndarray:
         """
-        This is a helper function which is used by the function calculate_the_path. It
-            is executed each time the next step needs to be calculated or if the walker
-            would walk into the building. It takes a random direction and updates the
-            coordinates from the position before and adds a step according to the
-            randomly determined direction
-        :param step_number: The number of step to be calculated
+        Checks which positions neighbour an obstacle
+        :param start_points: the start points of the walker, not needed here
+        :param x_coordinates: an array of shape (walker, steps) with the x-coordinates
+        :param y_coordinates: an array of shape (walker, steps) with the y-coordinates
+        :param obstacles: an array of shape (walker, 4) holding the building of each
+            walker or a landscape all walker walk in
+        :return: a boolean array of shape (walker, steps), True at the target
         """
-        direction_of_step = np.random.randint(1, 5)
-        if direction_of_step == 1:  # east
-            self.x_coordinates[step_number] = self.x_coordinates[step_number - 1] + 1
-            self.y_coordinates[step_number] = self.y_coordinates[step_number - 1]
-        elif direction_of_step == 2:  # west
-            self.x_coordinates[step_number] = self.x_coordinates[step_number - 1] - 1
-            self.y_coordinates[step_number] = self.y_coordinates[step_number - 1]
+        contact = np.zeros(x_coordinates.shape, dtype=bool)
+        for x_step, y_step in STEP_DIRECTIONS:
+            contact |= blocked_positions(
+                x_coordinates + x_step, y_coordinates + y_step, obstacles
+            )
+        return contact
+
+
+def walk_to_target(
+    start_points: np.ndarray,
+    obstacles,
+    remaining_steps: np.ndarray,
+    step_generators: list,
+    collision_generators: list,
+    target,
+    rejected_steps: np.ndarray = None,
+) -> tuple:
+    """
+    Walks several walker until they hit a target or their steps are used up. The
+        walker walk in blocks of steps like the vectorized engine, so they walk the
+        same paths, but each walker is dropped from the walking walker as soon as a
+        block reaches the target. The first blocks are short and the blocks get longer
+        up to BLOCK_SIZE, so walker which hit early waste only a few steps.
+    :param start_points: an array of shape (walker, 2) holding the start points
+    :param obstacles: an array of shape (walker, 4) holding the building of each walker
+        or a landscape all walker walk in
+    :param remaining_steps: an array holding the largest number of steps of each walker
+    :param step_generators: the random generator of each walker to draw the steps from
+    :param collision_generators: the random generator of each walker to draw the
+        replacements of steps into the building from
+    :param target: an object with a method hits(start_points, x_coordinates,
+        y_coordinates, obstacles) like DistanceTarget, RegionTarget or
+        ObstacleContact
+    :param rejected_steps: if given, an array the number of steps into an obstacle of
+        each walker is added to
+    :return: a tuple of an array holding the step each walker hit the target at (-1
+        if it didn't) and an array of shape (walker, 2) holding the position it
+        stopped at, where it hit the target or at the end of its walk
+    """
+    positions = np.array(start_points, dtype=np.int64)
+    remaining_steps = np.array(remaining_steps, dtype=np.int64)
+    hitting_steps = np.full(len(positions), -1, dtype=np.int64)
+    walked_steps = np.zeros(len(positions), dtype=np.int64)
+    hit = target.hits(positions, positions[:, 0:1], positions[:, 1:2], obstacles)[:, 0]
+    hitting_steps[hit] = 0
+    walking = np.flatnonzero(~hit & (remaining_steps > 0))
+    block_size = SEGMENT_LENGTH
+    while walking.size > 0:
+        row_obstacles = obstacles_of_rows(obstacles, walking)
+        block_lengths = np.minimum(remaining_steps[walking], block_size)
+        row_rejected_steps = (
+            np.zeros(walking.size, dtype=np.int64)
+            if rejected_steps is not None
+            else None
+        )
+        _, x_block, y_block = walk_block(
+            positions[walking, 0],
+            positions[walking, 1],
+            row_obstacles,
+            block_lengths,
+            [step_generators[row] for row in walking],
+            [collision_generators[row] for row in walking],
+            row_rejected_steps,
+        )
+        if rejected_steps is not None:
+            rejected_steps[walking] += row_rejected_steps
+        hits = target.hits(start_points[walking], x_block, y_block, row_obstacles) & (
+            np.arange(x_block.shape[1]) < block_lengths[:, None]
+        )
+        hit = hits.any(axis=1)
+        # the walker stop at the first hit, the others at the end of the block
+        columns = np.where(hit, hits.argmax(axis=1), block_lengths - 1)
+        positions[walking, 0] = x_block[np.arange(walking.size), columns]
+        positions[walking, 1] = y_block[np.arange(walking.size), columns]
+        hitting_steps[walking[hit]] = walked_steps[walking[hit]] + columns[hit] + 1
+        walked_steps[walking] += block_lengths
+        remaining_steps[walking] -= block_lengths
+        walking = walking[~hit & (remaining_steps[walking] > 0)]
+        block_size = min(2 * block_size, BLOCK_SIZE)
+    return hitting_steps, positions
+
+
+def obstacles_of_rows(obstacles, rows: np.ndarray):
+    """
+    Selects the obstacles of some of the walker
+    :param obstacles: an array of shape (walker, 4) holding the building of each walker
+        or a landscape all walker walk in
+    :param rows: the indices of the walker
+    :return: the buildings of the walker or the landscape
+    """
+    if isinstance(obstacles, Landscape):
+        return obstacles
+    return obstacles[rows]
+
+
+def walk_block(
+    start_x: np.ndarray,
+    start_y: np.ndarray,
+    obstacles: np.ndarray,
+    block_lengths: np.ndarray,
+    step_generators: list,
+    collision_generators: list,
+    rejected_steps: np.ndarray = None,
+) -> tuple:
+    """
+    Calculates the next block of steps for several walker at once. All directions are
+        drawn at once and the positions are the cumulative sum of the steps. Only the
+        walker which walk into their building within the block are calculated again,
+        segment by segment, so a rejected step only shifts the rest of its segment.
+    :param start_x: an array holding the current x-coordinate of each walker
+    :param start_y: an array holding the current y-coordinate of each walker
+    :param obstacles: an array of shape (walker, 4) holding the building of each walker
+        or a landscape all walker walk in
+    :param block_lengths: an array holding the number of steps each walker walks in
+        this block. Walker with less steps than the longest keep standing afterwards
+    :param step_generators: the random generator of each walker to draw the steps from
+    :param collision_generators: the random generator of each walker to draw the
+        replacements of steps into the building from
+    :param rejected_steps: if given, an array the number of steps into an obstacle of
+        each walker is added to
+    :return: a tuple of three arrays of shape (walker, block length) holding the
+        directions (index into STEPS), the x- and the y-coordinates
+    """
+    directions = np.full((len(start_x), max(block_lengths)), STAND_STILL)
+    for row, (generator, block_length) in enumerate(
+        zip(step_generators, block_lengths)
+    ):
+        directions[row, :block_length] = generator.integers(0, 4, int(block_length))
+    x_block = start_x[:, None] + np.cumsum(STEPS[directions, 0], axis=1)
+    y_block = start_y[:, None] + np.cumsum(STEPS[directions, 1], axis=1)
+    profiler.count("steps", int(np.sum(block_lengths)))
+    profiler.count(
+        "allocated_bytes", directions.nbytes + x_block.nbytes + y_block.nbytes
+    )
+    rows = np.flatnonzero(blocked_positions(x_block, y_block, obstacles).any(axis=1))
+    if rows.size > 0:
+        with profiler.phase("collisions"):
+            row_directions = directions[rows]
+            row_generators = [collision_generators[row] for row in rows]
+            row_rejected_steps = (
+                np.zeros(rows.size, dtype=np.int64)
+                if rejected_steps is not None
+                else None
+            )
+            current_x = start_x[rows]
+            current_y = start_y[rows]
+            for first_step in range(0, directions.shape[1], SEGMENT_LENGTH):
+                segment = slice(first_step, first_step + SEGMENT_LENGTH)
+                x_segment, y_segment = resolve_collisions(
+                    current_x,
+                    current_y,
+                    row_directions[:, segment],
+                    obstacles_of_rows(obstacles, rows),
+                    row_generators,
+                    row_rejected_steps,
+                )
+                x_block[rows, segment] = x_segment
+                y_block[rows, segment] = y_segment
+                current_x = x_segment[:, -1]
+                current_y = y_segment[:, -1]
+            directions[rows] = row_directions
+            if rejected_steps is not None:
+                rejected_steps[rows] += row_rejected_steps
+    return directions, x_block, y_block
+
+
+def resolve_collisions(
+    start_x: np.ndarray,
+    start_y: np.ndarray,
+    directions: np.ndarray,
+    obstacles: np.ndarray,
+    collision_generators: list,
+    rejected_steps: np.ndarray = None,
+) -> tuple:
+    """
+    Calculates the positions of a segment of steps and replaces the steps into the
+        building. For each walker the first step into its building is replaced by a
+        step drawn uniformly from the directions which stay outside (this is the same
+        as drawing again until the step is valid) and the rest of the segment is
+        shifted accordingly. This is repeated until no walker is inside its building.
+    :param start_x: an array holding the x-coordinate of each walker before the segment
+    :param start_y: an array holding the y-coordinate of each walker before the segment
+    :param directions: an array of shape (walker, steps) holding the drawn directions.
+        The replaced steps are updated in place
+    :param obstacles: an array of shape (walker, 4) holding the building of each walker
+        or a landscape all walker walk in
+    :param collision_generators: the random generator of each walker to draw the
+        replacements from
+    :param rejected_steps: if given, an array the number of replaced steps of each
+        walker is added to
+    :return: a tuple of two arrays of shape (walker, steps) holding the x- and the
+        y-coordinates
+    """
+    x_segment = start_x[:, None] + np.cumsum(STEPS[directions, 0], axis=1)
+    y_segment = start_y[:, None] + np.cumsum(STEPS[directions, 1], axis=1)
+    collisions = blocked_positions(x_segment, y_segment, obstacles)
+    rows = np.flatnonzero(collisions.any(axis=1))
+    while rows.size > 0:
+        # the first step into the building of each affected walker
+        columns = collisions[rows].argmax(axis=1)
+        previous_x = np.where(columns > 0, x_segment[rows, columns - 1], start_x[rows])
+        previous_y = np.where(columns > 0, y_segment[rows, columns - 1], start_y[rows])
+        # choose one of the directions which do not lead into the building
+        valid_directions = ~blocked_positions(
+            previous_x[:, None] + STEP_DIRECTIONS[:, 0],
+            previous_y[:, None] + STEP_DIRECTIONS[:, 1],
+            obstacles_of_rows(obstacles, rows),
+        )
+        choices = [
+            collision_generators[row].integers(0, number_of_valid_directions)
+            for row, number_of_valid_directions in zip(
+                rows, valid_directions.sum(axis=1)
+            )
+        ]
+        new_directions = np.argmax(
+            np.cumsum(valid_directions, axis=1) > np.array(choices)[:, None], axis=1
+        )
+        shift = STEPS[new_directions] - STEPS[directions[rows, columns]]
+        directions[rows, columns] = new_directions
+        if rejected_steps is not None:
+            rejected_steps[rows] += 1
+        # shift the rest of the segment by the difference of the steps
+        rest_of_segment = np.arange(directions.shape[1]) >= columns[:, None]
+        x_segment[rows] += shift[:, 0:1] * rest_of_segment
+        y_segment[rows] += shift[:, 1:2] * rest_of_segment
+        collisions[rows] = blocked_positions(
+            x_segment[rows], y_segment[rows], obstacles_of_rows(obstacles, rows)
+        )
+        rows = rows[collisions[rows].any(axis=1)]
+    return x_segment, y_segment
+
+
+def packed_length(number_of_directions: int) -> int:
+    """
+    Calculates the number of bytes needed to store directions with 2 bits each
+    :param number_of_directions: the number of directions
+    :return: the number of bytes
+    """
+    return (number_of_directions + 3) // 4
+
+
+def pack_directions(directions: np.ndarray) -> np.ndarray:
+    """
+    Packs directions into 2 bits each, so four directions are stored in one byte.
+        STAND_STILL is stored as east, so the number of steps of the walker is needed
+        to unpack the directions again.
+    :param directions: an array of shape (..., steps) holding the directions
+    :return: an array of shape (..., steps / 4) holding the packed directions
+    """
+    directions = np.asarray(directions)
+    number_of_directions = directions.shape[-1]
+    padded = np.zeros(
+        directions.shape[:-1] + (4 * packed_length(number_of_directions),),
+        dtype=np.uint8,
+    )
+    padded[..., :number_of_directions] = directions & 3
+    quadruples = padded.reshape(padded.shape[:-1] + (-1, 4)) << PACKING_SHIFTS
+    return np.bitwise_or.reduce(quadruples, axis=-1)
+
+
+def unpack_directions(packed: np.ndarray, number_of_directions: int) -> np.ndarray:
+    """
+    Unpacks directions which were packed with pack_directions
+    :param packed: an array of shape (..., steps / 4) holding the packed directions
+    :param number_of_directions: the number of directions to unpack
+    :return: an array of shape (..., number_of_directions) holding the directions
+    """
+    packed = packed[..., : packed_length(number_of_directions)]
+    directions = (packed[..., None] >> PACKING_SHIFTS) & 3
+    return directions.reshape(packed.shape[:-1] + (-1,))[..., :number_of_directions]
+
+
+def segment_offsets(lengths: np.ndarray) -> np.ndarray:
+    """
+    Calculates where the segments of a ragged buffer start, one segment after the other
+    :param lengths: an array holding the length of each segment
+    :return: an array holding the offset of each segment and the total length at the
+        end, so segment i is buffer[offsets[i] : offsets[i + 1]]
+    """
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return offsets
+
+
+def ragged_indices(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """
+    Calculates the indices of several ranges at once without a loop over the ranges
+    :param starts: an array holding the first index of each range
+    :param lengths: an array holding the length of each range
+    :return: an array holding the indices of all ranges, one range after the other
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    lengths = np.asarray(lengths, dtype=np.int64)
+    ends = np.cumsum(lengths)
+    return np.arange(int(ends[-1]) if len(ends) else 0) + np.repeat(
+        starts - (ends - lengths), lengths
+    )
+
+
+def grow_packed(
+    packed: np.ndarray,
+    packed_offsets: np.ndarray,
+    used_lengths: np.ndarray,
+    lengths: np.ndarray,
+) -> tuple:
+    """
+    Makes room for more packed directions of walker stored one after the other. If any
+        walker needs more room, the room of each walker is at least doubled, so paths
+        which are extended many times are copied only a few times
+    :param packed: an array holding the packed directions of all walker
+    :param packed_offsets: an array holding where the room of each walker starts and
+        the total length at the end
+    :param used_lengths: an array holding the number of bytes of each walker which
+        hold directions and have to be kept
+    :param lengths: an array holding the number of bytes each walker needs
+    :return: a tuple of the packed directions and their offsets, the arrays themselves
+        if they are large enough, otherwise larger copies
+    """
+    capacities = np.diff(packed_offsets)
+    if np.all(capacities >= lengths):
+        return packed, packed_offsets
+    grown_offsets = segment_offsets(np.maximum(lengths, 2 * capacities))
+    grown = np.zeros(int(grown_offsets[-1]), dtype=np.uint8)
+    grown[ragged_indices(grown_offsets[:-1], used_lengths)] = packed[
+        ragged_indices(packed_offsets[:-1], used_lengths)
+    ]
+    profiler.count("allocated_bytes", grown.nbytes)
+    return grown, grown_offsets
+
+
+def write_directions(
+    packed: np.ndarray,
+    packed_offsets: np.ndarray,
+    rows: np.ndarray,
+    first_steps: np.ndarray,
+    directions: np.ndarray,
+) -> None:
+    """
+    Packs directions into paths which already hold the steps before them, also if they
+        don't start at a multiple of 4. The directions already stored in the byte the
+        new directions start in are kept
+    :param packed: an array holding the packed directions of all walker one after the
+        other, which is changed in place
+    :param packed_offsets: an array holding where the room of each walker starts and
+        the total length at the end
+    :param rows: the indices of the walker the directions belong to
+    :param first_steps: an array holding the number of the step of the first new
+        direction of each of these walker, step 1 is the first step after the start
+        point
+    :param directions: an array of shape (rows, steps) holding the new directions.
+        Directions which don't fit into the room of a walker are dropped
+    """
+    rows = np.asarray(rows)
+    first_steps = np.broadcast_to(first_steps, rows.shape)
+    for first_step in np.unique(first_steps):
+        group = np.flatnonzero(first_steps == first_step)
+        offset, stored = divmod(int(first_step) - 1, 4)
+        starts = packed_offsets[rows[group]] + offset
+        new_directions = directions[group]
+        if stored > 0:
+            new_directions = np.concatenate(
+                [unpack_directions(packed[starts, None], stored), new_directions],
+                axis=1,
+            )
+        new_packed = pack_directions(new_directions)
+        destinations = starts[:, None] + np.arange(new_packed.shape[1])
+        inside = destinations < packed_offsets[rows[group] + 1][:, None]
+        packed[destinations[inside]] = new_packed[inside]
+
+
+def directions_of_path(
+    x_coordinates: np.ndarray, y_coordinates: np.ndarray
+) -> np.ndarray:
+    """
+    Calculates the direction (index into STEP_DIRECTIONS) of each step of a path
+    :param x_coordinates: an array holding the x-coordinates of the path
+    :param y_coordinates: an array holding the y-coordinates of the path
+    :return: an array holding the directions
+    """
+    x_steps = np.diff(x_coordinates)
+    y_steps = np.diff(y_coordinates)
+    return np.select(
+        [x_steps == 1, x_steps == -1, y_steps == 1], [0, 1, 2], default=3
+    ).astype(np.uint8)
+
+
+def coordinate_dtype(start_points: np.ndarray, number_of_steps: np.ndarray) -> type:
+    """
+    Finds the smallest integer type which holds all coordinates of the paths
+    :param start_points: an array of shape (walker, 2) holding the start points
+    :param number_of_steps: an array holding the number of steps of each walker
+    :return: the integer type
+    """
+    extent = int(np.abs(start_points).max(initial=0)) + int(number_of_steps.max())
+    for dtype in (np.int16, np.int32):
+        if extent <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def expand_coordinates(
+    start_points: np.ndarray,
+    packed_directions: np.ndarray,
+    packed_offsets: np.ndarray,
+    number_of_steps: np.ndarray,
+    axis: int,
+) -> np.ndarray:
+    """
+    Calculates the coordinates of compactly stored paths of different lengths. The
+        coordinates of all walker are stored one after the other in one array without
+        any padding, so walker i holds coordinates[offsets[i] : offsets[i + 1]] with
+        offsets = segment_offsets(number_of_steps).
+    :param start_points: an array of shape (walker, 2) holding the start points
+    :param packed_directions: an array holding the packed directions of all walker one
+        after the other
+    :param packed_offsets: an array holding where the packed directions of each walker
+        start and the total length at the end
+    :param number_of_steps: an array holding the number of steps of each walker
+    :param axis: 0 for the x-coordinates, 1 for the y-coordinates
+    :return: an array holding the coordinates of all walker
+    """
+    dtype = coordinate_dtype(start_points, number_of_steps)
+    lengths = np.asarray(number_of_steps, dtype=np.int64) - 1
+    # select the stored directions of each walker from all unpacked bytes
+    boundaries = np.zeros(4 * int(packed_offsets[-1]) + 1, dtype=np.int8)
+    np.add.at(boundaries, 4 * packed_offsets[:-1], 1)
+    np.add.at(boundaries, 4 * packed_offsets[:-1] + lengths, -1)
+    stored = np.cumsum(boundaries[:-1], dtype=np.int8).astype(bool)
+    steps = STEP_DIRECTIONS[:, axis].astype(dtype)[
+        unpack_directions(packed_directions, 4 * len(packed_directions))[stored]
+    ]
+    displacements = np.zeros(len(lengths), dtype=np.int64)
+    walking = lengths > 0
+    if steps.size > 0:
+        displacements[walking] = np.add.reduceat(
+            steps, segment_offsets(lengths)[:-1][walking], dtype=np.int64
+        )
+    # the cumulative sum over all walker starts each walker at its start point, the
+    # differences may wrap around the type like the sum does
+    previous_ends = np.concatenate([[0], start_points[:-1, axis] + displacements[:-1]])
+    offsets = segment_offsets(number_of_steps)
+    first = np.zeros(int(offsets[-1]), dtype=bool)
+    first[offsets[:-1]] = True
+    coordinates = np.empty(int(offsets[-1]), dtype=dtype)
+    coordinates[first] = (start_points[:, axis] - previous_ends).astype(dtype)
+    coordinates[~first] = steps
+    np.cumsum(coordinates, out=coordinates)
+    profiler.count("allocated_bytes", coordinates.nbytes)
+    return coordinates
+
+
+def pad_coordinates(coordinates: np.ndarray, number_of_steps: np.ndarray) -> np.ndarray:
+    """
+    Arranges the coordinates of paths of different lengths in a matrix. Walker with
+        less steps than the longest path keep standing at their end point.
+    :param coordinates: an array holding the coordinates of all walker one after the
+        other, see expand_coordinates
+    :param number_of_steps: an array holding the number of steps of each walker
+    :return: an array of shape (walker, steps) holding the coordinates
+    """
+    columns = np.arange(int(number_of_steps.max()))
+    walking = columns < number_of_steps[:, None]
+    matrix = np.empty(walking.shape, dtype=coordinates.dtype)
+    matrix[walking] = coordinates
+    matrix[~walking] = np.repeat(
+        coordinates[segment_offsets(number_of_steps)[1:] - 1],
+        len(columns) - number_of_steps,
+    )
+    profiler.count("allocated_bytes", matrix.nbytes)
+    return matrix
+
+
+class PathChunk(NamedTuple):
+    """
+    A chunk of consecutive steps of one walker (1-dimensional arrays) or of the walker
+        of a scene which still walk (arrays of shape (walker, steps)). Walker which
+        already arrived are left out and walker which arrive within the chunk keep
+        standing at their end point.
+    """
+
+    # the number of the first step of the chunk, the start point is step 0
+    first_step: int
+    # the directions of the steps (index into STEPS)
+    directions: np.ndarray
+    x_coordinates: np.ndarray
+    y_coordinates: np.ndarray
+    # the index of the walker of each row within the scene, None for one walker
+    walker: np.ndarray = None
+
+
+class FirstPassage(NamedTuple):
+    """
+    When and where walker first hit a target, see walk_to_target
+    """
+
+    # whether each walker hit the target within its walking time
+    hit: np.ndarray
+    # the number of the step each walker hit the target at, -1 if it didn't
+    steps: np.ndarray
+    # the time each walker hit the target at, the step divided by the speed, NaN if
+    # it didn't
+    times: np.ndarray
+    # an array of shape (walker, 2) holding the position each walker hit the target
+    # at or, if it didn't, its end point
+    positions: np.ndarray
+
+
+def create_buildings(start_points: np.ndarray) -> np.ndarray:
+    """
+    This function calculates the buildings of the walker. It's a rectangle north of
+        the respective walker starting position
+    :param start_points: an array of shape (walker, 2) holding the start points
+    :return: an array of shape (walker, 4) holding the 4 coordinates of each building
+        as xmin, xmax, ymin, ymax
+    """
+    xmin = start_points[:, 0].astype(float) - 20.5
+    ymin = start_points[:, 1].astype(float) + 0.5
+    return np.stack([xmin, xmin + 40, ymin, ymin + 15], axis=1)
+
+
+def draw_start_point(
+    generator: np.random.Generator, number_of_steps: int, landscape: "Landscape"
+) -> np.ndarray:
+    """
+    Draws a random start point of a walker. In a landscape, it is drawn again until the
+        walker can start there
+    :param generator: the random generator of the steps of the walker
+    :param number_of_steps: the number of steps of the walker. The coordinates of the
+        start point are between 0 and the number of steps
+    :param landscape: the landscape the walker walks in or None
+    :return: An array holding the x- and the y-coordinate
+    :raises ValueError: if no valid start point is found within START_POINT_ATTEMPTS
+        draws
+    """
+    for _ in range(START_POINT_ATTEMPTS):
+        start_point = generator.integers(low=0, high=number_of_steps, size=2)
+        if landscape is None or landscape.valid_start_point(start_point):
+            return start_point
+    raise ValueError(
+        "No valid start point found in {} attempts, the landscape blocks (almost) the "
+        "whole region between 0 and {}".format(START_POINT_ATTEMPTS, number_of_steps)
+    )
+
+
+def create_random_streams(seed_sequence: np.random.SeedSequence) -> tuple:
+    """
+    Creates the two independent random streams of a walker. The steps are drawn from
+        the first one and the replacements of steps into the building from the second
+        one, so the path does not depend on how the steps are split up into blocks
+    :param seed_sequence: the seed sequence of the walker
+    :return: a tuple of two random generators, for the steps and for the replacements
+    """
+    return tuple(np.random.default_rng(child) for child in seed_sequence.spawn(2))
+
+
+def path_streams(
+    seed_sequence: np.random.SeedSequence,
+    number_of_steps: int,
+    landscape: "Landscape",
+) -> tuple:
+    """
+    Creates the random streams of a walker again in the state its path starts with:
+        spawned from its seed sequence like create_random_streams does and after
+        drawing its start point
+    :param seed_sequence: the seed sequence of the walker. It is not changed
+    :param number_of_steps: the number of steps the start point was drawn for
+    :param landscape: the landscape the walker walks in or None
+    :return: a tuple of two random generators, for the steps and for the replacements
+    """
+    step_generator, collision_generator = create_random_streams(
+        np.random.SeedSequence(
+            seed_sequence.entropy,
+            spawn_key=seed_sequence.spawn_key,
+            pool_size=seed_sequence.pool_size,
+        )
+    )
+    draw_start_point(step_generator, number_of_steps, landscape)
+    return step_generator, collision_generator
+
+
+def restore_generator(state: dict) -> np.random.Generator:
+    """
+    Creates a random generator continuing from the state of another one
+    :param state: the state of the bit generator of the other random generator
+    :return: the random generator
+    """
+    generator = np.random.Generator(getattr(np.random, state["bit_generator"])())
+    generator.bit_generator.state = state
+    return generator
+
+
+def _calculate_shard(shard: "Scene", engine: str) -> "Scene":
+    """
+    Calculates the paths of a part of a scene. This is executed in the worker processes
+    :param shard: the part of the scene
+    :param engine: the engine which calculates the paths
+    :return: the part of the scene holding the paths
+    """
+    shard.calculate_the_paths(engine)
+    return shard
+
+
+class Landscape:
+    """
+    Represents a landscape with obstacles, e.g. buildings, lakes or walls, which all
+        walker of a scene walk in. Each obstacle is a rectangle like the building of a
+        walker. The cells inside the obstacles are stored in an occupancy bitmap, so
+        checking a position is a single lookup, no matter how many obstacles there are.
+    """
+
+    def __init__(self, obstacles: list):
+        self.obstacles = np.asarray(obstacles, dtype=float).reshape(-1, 4)
+        # the distance of each cell to the next obstacle, calculated when needed
+        self.distances = None
+        # the integer positions strictly inside each obstacle
+        columns = np.stack(
+            [np.floor(self.obstacles[:, 0]) + 1, np.ceil(self.obstacles[:, 1]) - 1],
+            axis=1,
+        ).astype(np.int64)
+        rows = np.stack(
+            [np.floor(self.obstacles[:, 2]) + 1, np.ceil(self.obstacles[:, 3]) - 1],
+            axis=1,
+        ).astype(np.int64)
+        non_empty = (columns[:, 0] <= columns[:, 1]) & (rows[:, 0] <= rows[:, 1])
+        columns = columns[non_empty]
+        rows = rows[non_empty]
+        if len(columns) == 0:
+            self.origin = np.zeros(2, dtype=np.int64)
+            self.bitmap = np.zeros((0, 0), dtype=bool)
+            return
+        self.origin = np.array([columns[:, 0].min(), rows[:, 0].min()])
+        columns -= self.origin[0]
+        rows -= self.origin[1]
+        # mark the corners of each obstacle, the cumulative sums fill the rectangles
+        corners = np.zeros((rows[:, 1].max() + 2, columns[:, 1].max() + 2), np.int32)
+        np.add.at(corners, (rows[:, 0], columns[:, 0]), 1)
+        np.add.at(corners, (rows[:, 0], columns[:, 1] + 1), -1)
+        np.add.at(corners, (rows[:, 1] + 1, columns[:, 0]), -1)
+        np.add.at(corners, (rows[:, 1] + 1, columns[:, 1] + 1), 1)
+        corners = corners.cumsum(axis=0, dtype=np.int32)
+        self.bitmap = corners.cumsum(axis=1, dtype=np.int32)[:-1, :-1] > 0
+
+    def blocked(
+        self, x_coordinates: np.ndarray, y_coordinates: np.ndarray
+    ) -> np.ndarray:
+        """
+        Checks which positions are inside an obstacle
+        :param x_coordinates: an array holding the x-coordinates
+        :param y_coordinates: an array holding the y-coordinates of the same shape
+        :return: a boolean array of the same shape, True inside an obstacle
+        """
+        columns = np.asarray(x_coordinates) - self.origin[0]
+        rows = np.asarray(y_coordinates) - self.origin[1]
+        inside_bitmap = (
+            (columns >= 0)
+            & (columns < self.bitmap.shape[1])
+            & (rows >= 0)
+            & (rows < self.bitmap.shape[0])
+        )
+        blocked = np.zeros(inside_bitmap.shape, dtype=bool)
+        blocked[inside_bitmap] = self.bitmap[
+            rows[inside_bitmap], columns[inside_bitmap]
+        ]
+        return blocked
+
+    def distance(
+        self, x_coordinates: np.ndarray, y_coordinates: np.ndarray
+    ) -> np.ndarray:
+        """
+        Calculates the number of steps from each position to the next position inside
+            an obstacle
+        :param x_coordinates: an array holding the x-coordinates
+        :param y_coordinates: an array holding the y-coordinates of the same shape
+        :return: an array of the same shape holding the distances (Manhattan distance)
+        """
+        if self.bitmap.size == 0:
+            return np.full(np.shape(x_coordinates), np.inf)
+        if self.distances is None:
+            # the smallest signed type holding twice the largest distance, so spreading
+            # the distances along an axis cannot overflow
+            largest = sum(self.bitmap.shape)
+            distances = np.where(self.bitmap, 0, largest).astype(
+                np.min_scalar_type(-2 * largest)
+            )
+            self.distances = distances_along_axis(distances_along_axis(distances, 1), 0)
+        columns = np.asarray(x_coordinates) - self.origin[0]
+        rows = np.asarray(y_coordinates) - self.origin[1]
+        # positions outside the bitmap first walk to its border
+        border_columns = np.clip(columns, 0, self.bitmap.shape[1] - 1)
+        border_rows = np.clip(rows, 0, self.bitmap.shape[0] - 1)
+        return (
+            np.abs(columns - border_columns)
+            + np.abs(rows - border_rows)
+            + self.distances[border_rows, border_columns]
+        )
+
+    def valid_start_point(self, start_point: np.ndarray) -> bool:
+        """
+        Checks whether a walker can start at a position. It must not be inside an
+            obstacle and must be able to take at least one step
+        :param start_point: the x- and the y-coordinate
+        :return: True if the walker can start there
+        """
+        neighbours = start_point + STEP_DIRECTIONS
+        return not self.blocked(start_point[0], start_point[1]) and not np.all(
+            self.blocked(neighbours[:, 0], neighbours[:, 1])
+        )
+
+
+class Walker:
+    """
+    Represents a walker to which a walking speed and walking time are given. The path
+        is stored compactly as the start point and the direction of each step (2 bits
+        per step). The coordinates are only calculated from it when they are accessed.
+    """
+
+    def __init__(
+        self,
+        walking_time: int,
+        walking_speed: int,
+        seed: int = None,
+        landscape: Landscape = None,
+    ):
+        self.walking_speed = walking_speed
+        self.walking_time = walking_time
+        # the walking time the start point is drawn for
+        self.start_walking_time = walking_time
+        self.number_of_steps = self.walking_time * self.walking_speed + 1
+        self.seed_sequence = np.random.SeedSequence(seed)
+        (self.step_generator, self.collision_generator) = create_random_streams(
+            self.seed_sequence
+        )
+        # a walker in a landscape avoids its obstacles instead of its own building
+        self.landscape = landscape
+        with profiler.phase("start_points"):
+            self.start_point = self.assign_start_point()
+        self.end_point = self.start_point.copy()
+        # the packed directions of the steps, None until the path is calculated
+        self.directions = None
+        self._x_coordinates = None
+        self._y_coordinates = None
+        # True if only the end point was calculated, so the path is unknown
+        self.path_dropped = False
+        self.building = None if landscape is not None else self.create_building()
+
+    @classmethod
+    def from_scene(cls, scene: "Scene", index: int) -> "Walker":
+        """
+        Creates a walker which is a view into a scene. It does not copy the path, so
+            changes of the path of the walker are changes of the scene and vice versa
+        :param scene: the scene holding the walker
+        :param index: the index of the walker within the scene
+        :return: the walker object
+        """
+        walker = cls.__new__(cls)
+        walker.walking_speed = int(scene.walking_speeds[index])
+        walker.walking_time = scene.walking_time
+        walker.number_of_steps = int(scene.number_of_steps[index])
+        walker.start_point = scene.start_points[index]
+        walker.end_point = scene.end_points[index]
+        if scene.packed_directions is not None:
+            offset = int(scene.packed_offsets[index])
+            walker.directions = scene.packed_directions[
+                offset : offset + packed_length(walker.number_of_steps - 1)
+            ]
+        else:
+            walker.directions = None
+        walker._x_coordinates = None
+        walker._y_coordinates = None
+        walker.path_dropped = scene.packed_directions is None
+        walker.landscape = scene.landscape
+        walker.building = (
+            scene.buildings[index].tolist() if scene.buildings is not None else None
+        )
+        walker.step_generator = scene.step_generators[index]
+        walker.collision_generator = scene.collision_generators[index]
+        walker.seed_sequence = scene.walker_seed_sequence(index)
+        walker.start_walking_time = scene.start_walking_time
+        return walker
+
+    @classmethod
+    def from_coordinates(
+        cls,
+        walking_time: int,
+        walking_speed: int,
+        x_coordinates: np.ndarray,
+        y_coordinates: np.ndarray,
+        building: list,
+        landscape: Landscape = None,
+    ) -> "Walker":
+        """
+        Creates a walker from the coordinates of a path which was calculated before.
+            The coordinates are not copied, so they can be memory-mapped arrays.
+        :param walking_time: the time the walker walked
+        :param walking_speed: the speed of the walker
+        :param x_coordinates: an array holding the x-coordinates of the path
+        :param y_coordinates: an array holding the y-coordinates of the path
+        :param building: the 4 coordinates of the building of the walker or None if
+            the walker walked in a landscape
+        :param landscape: the landscape the walker walked in
+        :return: the walker object
+        """
+        walker = cls.__new__(cls)
+        walker.walking_speed = walking_speed
+        walker.walking_time = walking_time
+        walker.number_of_steps = len(x_coordinates)
+        walker.start_point = np.array([x_coordinates[0], y_coordinates[0]])
+        walker.end_point = np.array([x_coordinates[-1], y_coordinates[-1]])
+        walker.directions = None
+        walker._x_coordinates = x_coordinates
+        walker._y_coordinates = y_coordinates
+        walker.path_dropped = False
+        walker.landscape = landscape
+        walker.building = list(building) if building is not None else None
+        walker.step_generator = None
+        walker.collision_generator = None
+        walker.seed_sequence = None
+        walker.start_walking_time = walking_time
+        return walker
+
+    @property
+    def x_coordinates(self) -> np.ndarray:
+        """the x-coordinates of the path, calculated from the directions on access"""
+        if self._x_coordinates is None:
+            self._x_coordinates = self.expand_coordinates(0)
+        return self._x_coordinates
+
+    @x_coordinates.setter
+    def x_coordinates(self, x_coordinates: np.ndarray) -> None:
+        self._x_coordinates = np.asarray(x_coordinates)
+        self.start_point[0] = self._x_coordinates[0]
+        self.end_point[0] = self._x_coordinates[-1]
+        self.directions = None
+
+    @property
+    def y_coordinates(self) -> np.ndarray:
+        """the y-coordinates of the path, calculated from the directions on access"""
+        if self._y_coordinates is None:
+            self._y_coordinates = self.expand_coordinates(1)
+        return self._y_coordinates
+
+    @y_coordinates.setter
+    def y_coordinates(self, y_coordinates: np.ndarray) -> None:
+        self._y_coordinates = np.asarray(y_coordinates)
+        self.start_point[1] = self._y_coordinates[0]
+        self.end_point[1] = self._y_coordinates[-1]
+        self.directions = None
+
+    def expand_coordinates(self, axis: int) -> np.ndarray:
+        """
+        Calculates the coordinates of the path from the start point and the directions.
+            If the path is not calculated yet, the walker stands at its start point.
+        :param axis: 0 for the x-coordinates, 1 for the y-coordinates
+        :return: an array holding the coordinates
+        """
+        assert not self.path_dropped, (
+            "The path of the walker was not calculated, only its end point (endpoint "
+            "engine or keep_paths=False)"
+        )
+        if self.directions is None:
+            return np.full(self.number_of_steps, self.start_point[axis])
+        return expand_coordinates(
+            self.start_point[None, :],
+            self.directions,
+            np.array([0, len(self.directions)]),
+            np.array([self.number_of_steps]),
+            axis,
+        )
+
+    def assign_start_point(self) -> np.ndarray:
+        """
+        This function creates the random start point of the walker. In a landscape, it
+            is drawn again until it is outside the obstacles
+        :return: An array holding the x- and the y-coordinate
+        """
+        return draw_start_point(
+            self.step_generator, self.number_of_steps, self.landscape
+        )
+
+    def calculate_the_path(self, engine: str = "vectorized") -> None:
+        """
+        Calculates the path the walker walks by updating each position and checking if
+        the walker does not collide with the building.
+        :param engine: 'vectorized' (default) calculates the path in blocks of steps,
+            'loop' calculates one step after the other, 'endpoint' only calculates the
+            end point
+        """
+        self.path_dropped = False
+        if engine == "vectorized":
+            with profiler.phase("walking"):
+                self.calculate_the_path_vectorized()
+            return
+        if engine == "endpoint":
+            with profiler.phase("walking"):
+                self.calculate_the_end_point()
+            return
+        started = time.perf_counter()
+        self._x_coordinates = np.full(self.number_of_steps, self.start_point[0])
+        self._y_coordinates = np.full(self.number_of_steps, self.start_point[1])
+        rejected_steps = 0
+        # calculate new coordinates for each step
+        for step_number in range(1, self.number_of_steps):
+            self.calculate_next_step(step_number)
+            while self.is_blocked(
+                self.x_coordinates[step_number], self.y_coordinates[step_number]
+            ):
+                self.calculate_next_step(step_number)
+                rejected_steps += 1
+        profiler.count("steps", self.number_of_steps - 1)
+        profiler.count_per_walker("rejected_steps", [rejected_steps])
+        profiler.add_time("walking", time.perf_counter() - started)
+        self.store_directions(
+            directions_of_path(self._x_coordinates, self._y_coordinates), 0
+        )
+        self.end_point[:] = [self._x_coordinates[-1], self._y_coordinates[-1]]
+
+    def is_blocked(self, x_coordinate: int, y_coordinate: int) -> bool:
+        """
+        Checks whether a position is inside the building or an obstacle of the landscape
+        :param x_coordinate: the x-coordinate of the position
+        :param y_coordinate: the y-coordinate of the position
+        :return: True if the walker can't walk there
+        """
+        if self.landscape is not None:
+            return bool(self.landscape.blocked(x_coordinate, y_coordinate))
+        return (
+            (x_coordinate > self.building[0])
+            and (x_coordinate < self.building[1])
+            and (y_coordinate > self.building[2])
+            and (y_coordinate < self.building[3])
+        )
+
+    def calculate_the_path_vectorized(self) -> None:
+        """
+        Calculates the path the walker walks block by block. The directions of a block
+            are drawn at once and the positions are the cumulative sum of the steps.
+            Steps which would lead into the building are drawn again, which only
+            shifts the rest of the affected block.
+        """
+        for chunk in self.iter_path(BLOCK_SIZE):
+            self.store_directions(chunk.directions, chunk.first_step - 1)
+        self._x_coordinates = None
+        self._y_coordinates = None
+
+    def iter_path(self, chunk_size: int = BLOCK_SIZE):
+        """
+        Walks the path chunk by chunk without storing it, so the memory needed does not
+            depend on the number of steps. The walk starts at the start point, the
+            current position is carried from one chunk to the next and the end point
+            is updated after each chunk. The path does not depend on the chunk size.
+        :param chunk_size: the number of steps per chunk. It must be a multiple of 4 to
+            store the directions of the chunks
+        :return: a generator yielding a PathChunk for each chunk of steps
+        """
+        obstacles = self.obstacles
+        # a new path starts at the start point, also if a path was calculated before
+        self.end_point[:] = self.start_point
+        self.path_dropped = False
+        rejected_steps = np.zeros(1, dtype=np.int64) if profiler.enabled else None
+        for first_step in range(1, self.number_of_steps, chunk_size):
+            last_step = min(first_step + chunk_size, self.number_of_steps)
+            directions, x_block, y_block = walk_block(
+                self.end_point[0:1],
+                self.end_point[1:2],
+                obstacles,
+                [last_step - first_step],
+                [self.step_generator],
+                [self.collision_generator],
+                rejected_steps,
+            )
+            self.end_point[:] = [x_block[0, -1], y_block[0, -1]]
+            yield PathChunk(first_step, directions[0], x_block[0], y_block[0])
+        profiler.count_per_walker("rejected_steps", rejected_steps)
+
+    def first_passage(self, target=None) -> "FirstPassage":
+        """
+        Finds when and where the walker first hits a target, e.g. gets too far away
+            from its start point, and stops walking there. The walker walks from its
+            start point with its random streams created again from its seed, so it
+            walks the same path as calculate_the_path does, also if the path was
+            calculated before, and is not changed.
+        :param target: a DistanceTarget (default: the distance from which on the
+            walker takes a plane), a RegionTarget or ObstacleContact
+        :return: the hitting time and position of the walker as arrays of one walker
+        """
+        assert (
+            self.seed_sequence is not None
+        ), "The walker was created from coordinates and has no random streams"
+        target = target if target is not None else DistanceTarget()
+        step_generator, collision_generator = path_streams(
+            self.seed_sequence,
+            self.start_walking_time * self.walking_speed + 1,
+            self.landscape,
+        )
+        rejected_steps = np.zeros(1, dtype=np.int64) if profiler.enabled else None
+        with profiler.phase("walking"):
+            hitting_steps, positions = walk_to_target(
+                self.start_point[None, :],
+                self.obstacles,
+                np.array([self.number_of_steps - 1]),
+                [step_generator],
+                [collision_generator],
+                target,
+                rejected_steps,
+            )
+        profiler.count_per_walker("rejected_steps", rejected_steps)
+        return summarise_first_passage(
+            hitting_steps, positions, np.array([self.walking_speed])
+        )
+
+    def calculate_the_end_point(self) -> None:
+        """
+        Calculates only the end point of the walker. The path itself is not calculated,
+            so its coordinates cannot be accessed afterwards.
+        """
+        rejected_steps = np.zeros(1, dtype=np.int64) if profiler.enabled else None
+        end_x, end_y = walk_to_end_points(
+            self.start_point[0:1],
+            self.start_point[1:2],
+            self.obstacles,
+            [self.number_of_steps - 1],
+            [self.step_generator],
+            [self.collision_generator],
+            rejected_steps,
+        )
+        profiler.count_per_walker("rejected_steps", rejected_steps)
+        self.directions = None
+        self._x_coordinates = None
+        self._y_coordinates = None
+        self.path_dropped = True
+        self.end_point[:] = [end_x[0], end_y[0]]
+
+    @property
+    def obstacles(self):
+        """the landscape the walker walks in or otherwise its building"""
+        if self.landscape is not None:
+            return self.landscape
+        return np.array([self.building], dtype=float)
+
+    def store_directions(self, directions: np.ndarray, first_direction: int) -> None:
+        """
+        Packs directions into the compact path of the walker
+        :param directions: an array holding the directions (index into STEPS)
+        :param first_direction: the index of the first direction within the path. It
+            must be a multiple of 4
+        """
+        if self.directions is None:
+            self.directions = np.zeros(
+                packed_length(self.number_of_steps - 1), dtype=np.uint8
+            )
+        packed = pack_directions(directions)
+        offset = first_direction // 4
+        self.directions[offset : offset + len(packed)] = packed
+
+    def get_start_point(self) -> list:
+        """
+        gets the starting position of the walker
+        :return: a list with the x-coordinate as the first element and the y-coordinate
+            as the second element
+        """
+        return [self.start_point[0], self.start_point[1]]
+
+    def get_end_point(self) -> list:
+        """
+        gets the last position of the walker
+        :return: a list with the x-coordinate as the first element and the y-coordinate
+            as the second element
+        """
+        return [self.end_point[0], self.end_point[1]]
+
+    def calculate_next_step(self, step_number: int) -> None:
+        """
+        This is a helper function which is used by the function calculate_the_path. It
+            is executed each time the next step needs to be calculated or if the walker
+            would walk into the building. It takes a random direction and updates the
+            coordinates from the position before and adds a step according to the
+            randomly determined direction
+        :param step_number: The number of step to be calculated
+        """
+        direction_of_step = self.step_generator.integers(1, 5)
+        if direction_of_step == 1:  # east
+            self.x_coordinates[step_number] = self.x_coordinates[step_number - 1] + 1
+            self.y_coordinates[step_number] = self.y_coordinates[step_number - 1]
+        elif direction_of_step == 2:  # west
+            self.x_coordinates[step_number] = self.x_coordinates[step_number - 1] - 1
+            self.y_coordinates[step_number] = self.y_coordinates[step_number - 1]
         elif direction_of_step == 3:  # north
             self.x_coordinates[step_number] = self.x_coordinates[step_number - 1]
             self.y_coordinates[step_number] = self.y_coordinates[step_number - 1] + 1
@@ -263,44 +2427,2126 @@ class Walker:
             the walker starting position
         :return: a list holding the 4 coordinates of the building
         """
-        xmin = float(self.get_start_point()[0]) - 20.5
-        xmax = xmin + 40
-        ymin = float(self.get_start_point()[1]) + 0.5
-        ymax = ymin + 15
-        return [xmin, xmax, ymin, ymax]
+        return create_buildings(np.array([self.get_start_point()]))[0].tolist()
 
 
-def main():
-    """The main program. Assigns the user definitions, creates the scene and plots it"""
-    # read in specifications defined by the user
-    try:
-        walking_time = int(sys.argv[1])
-        number_of_usual_walker = int(sys.argv[2])
-        number_of_fast_walker = int(sys.argv[3])
-        number_of_running_walker = int(sys.argv[4])
-        outfile_name = sys.argv[5]
-    except (SyntaxError, IndexError, ValueError) as err:
-        print(
-            "Error: At least one of the inputs was not correctly specified.\n"
-            "The Input must be specified as 'python walker.py walking_time "
-            "number_of_usual_walker number_of_fast_walker number_of_running_walker "
-            "outfile_name'.\n"
-            "Inputformats: walking time --> Integer, number of walker --> "
-            "Integer, outfile_name --> string\n"
-            "outfile_name: path_to_output/filename.png\n"
-            "The number of walker and the walking time must be positive & at least 1"
-            "\n\n\n",
-            err,
-        )
-        sys.exit(1)
-
-    scene = create_walker(
-        walking_time,
-        number_of_usual_walker,
-        number_of_fast_walker,
-        number_of_running_walker,
-    )
-    plot_the_paths(scene, outfile_name)
+class Scene:
+    """
+    Holds all walker of a scene as arrays with one row per walker. Each walker has its
+        own speed, so the paths have different lengths. They are stored compactly as
+        the start points and the packed directions of all walker one after the other,
+        where walker i holds packed_directions[packed_offsets[i] :
+        packed_offsets[i + 1]]. The coordinates are only calculated on access, in the
+        same ragged layout without padding, see Scene.coordinates. Each walker draws
+        from its own random streams, which are spawned from the seed. A scene can be
+        extended to walk for a longer time, so the room of a walker may hold more
+        steps.
+    """
+
+    def __init__(
+        self,
+        walking_time: int,
+        walking_speeds: list,
+        seed: int = None,
+        landscape: Landscape = None,
+    ):
+        self.walking_time = walking_time
+        # the walking time the start points are drawn for
+        self.start_walking_time = walking_time
+        self.seed_sequence = np.random.SeedSequence(seed)
+        # walker in a landscape avoid its obstacles instead of their own buildings
+        self.landscape = landscape
+        self.walking_speeds = np.asarray(walking_speeds, dtype=np.int64)
+        self.number_of_steps = self.walking_time * self.walking_speeds + 1
+        number_of_walker = len(self.walking_speeds)
+        # the index of the seed of each walker among the children of the seed sequence
+        self.seed_indices = np.arange(number_of_walker)
+        with profiler.phase("start_points"):
+            (self.step_generators, self.collision_generators) = (
+                list(generators)
+                for generators in zip(
+                    *(
+                        create_random_streams(child)
+                        for child in self.seed_sequence.spawn(number_of_walker)
+                    )
+                )
+            )
+            # each walker starts at a random position like a single walker does
+            self.start_points = np.array(
+                [
+                    draw_start_point(generator, number_of_steps, landscape)
+                    for generator, number_of_steps in zip(
+                        self.step_generators, self.number_of_steps
+                    )
+                ],
+                dtype=np.int64,
+            )
+        self.end_points = self.start_points.copy()
+        self.packed_offsets = segment_offsets(packed_length(self.number_of_steps - 1))
+        self.packed_directions = np.zeros(int(self.packed_offsets[-1]), dtype=np.uint8)
+        profiler.count("allocated_bytes", self.packed_directions.nbytes)
+        self.buildings = (
+            create_buildings(self.start_points) if landscape is None else None
+        )
+
+    def __len__(self) -> int:
+        return len(self.walking_speeds)
+
+    def __getitem__(self, index: int) -> Walker:
+        if not -len(self) <= index < len(self):
+            raise IndexError("walker index out of range")
+        return Walker.from_scene(self, index % len(self))
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield Walker.from_scene(self, index)
+
+    def walker_seed_sequence(self, index: int) -> np.random.SeedSequence:
+        """
+        Gets the seed sequence a walker got its random streams from, the same child
+            of the seed sequence of the scene which Scene.__init__ spawned for it
+        :param index: the index of the walker within the scene
+        :return: the seed sequence of the walker
+        """
+        return np.random.SeedSequence(
+            self.seed_sequence.entropy,
+            spawn_key=self.seed_sequence.spawn_key + (int(self.seed_indices[index]),),
+            pool_size=self.seed_sequence.pool_size,
+        )
+
+    @property
+    def coordinate_offsets(self) -> np.ndarray:
+        """where the coordinates of each walker start in Scene.coordinates and the
+        total number of coordinates at the end"""
+        return segment_offsets(self.number_of_steps)
+
+    def coordinates(self, axis: int) -> np.ndarray:
+        """
+        Calculates the coordinates of all paths one after the other without padding,
+            so a walker needs memory for its own steps only, however fast the others
+            are. Walker i holds coordinates[offsets[i] : offsets[i + 1]] with
+            offsets = Scene.coordinate_offsets
+        :param axis: 0 for the x-coordinates, 1 for the y-coordinates
+        :return: an array holding the coordinates of all walker
+        """
+        assert self.packed_directions is not None, (
+            "The scene was calculated without paths (endpoint engine or "
+            "keep_paths=False), only its start and end points are known"
+        )
+        return expand_coordinates(
+            self.start_points,
+            self.packed_directions,
+            self.packed_offsets,
+            self.number_of_steps,
+            axis,
+        )
+
+    @property
+    def x_coordinates(self) -> np.ndarray:
+        """the x-coordinates of all paths as a matrix of shape (walker, steps), walker
+        with less steps keep standing at their end point"""
+        return pad_coordinates(self.coordinates(0), self.number_of_steps)
+
+    @property
+    def y_coordinates(self) -> np.ndarray:
+        """the y-coordinates of all paths as a matrix of shape (walker, steps), walker
+        with less steps keep standing at their end point"""
+        return pad_coordinates(self.coordinates(1), self.number_of_steps)
+
+    def select(self, rows: np.ndarray) -> "Scene":
+        """
+        Creates a new scene holding a copy of some of the walker of this scene
+        :param rows: the indices of the walker
+        :return: the new scene
+        """
+        scene = Scene.__new__(Scene)
+        scene.walking_time = self.walking_time
+        scene.start_walking_time = self.start_walking_time
+        scene.seed_sequence = self.seed_sequence
+        scene.seed_indices = self.seed_indices[rows]
+        scene.walking_speeds = self.walking_speeds[rows]
+        scene.number_of_steps = self.number_of_steps[rows]
+        scene.start_points = self.start_points[rows]
+        scene.end_points = self.end_points[rows]
+        used_lengths = packed_length(scene.number_of_steps - 1)
+        scene.packed_offsets = segment_offsets(used_lengths)
+        scene.packed_directions = (
+            self.packed_directions[
+                ragged_indices(self.packed_offsets[rows], used_lengths)
+            ]
+            if self.packed_directions is not None
+            else None
+        )
+        scene.landscape = self.landscape
+        scene.buildings = self.buildings[rows] if self.buildings is not None else None
+        scene.step_generators = [self.step_generators[row] for row in rows]
+        scene.collision_generators = [self.collision_generators[row] for row in rows]
+        return scene
+
+    def calculate_the_paths(
+        self,
+        engine: str = "vectorized",
+        workers: int = 1,
+        consumers: list = None,
+        keep_paths: bool = True,
+    ) -> None:
+        """
+        Calculates the paths of all walker. The vectorized engine advances all walker
+            which still walk block by block at once.
+        :param engine: 'vectorized' (default), 'loop', which calculates the path of
+            one walker after the other step by step, or 'endpoint', which only
+            calculates the end points and does not store any paths
+        :param workers: the number of processes the walker are split up to
+        :param consumers: objects which get the paths chunk by chunk. Each consumer
+            needs the methods start(scene), update(chunk) with a PathChunk holding the
+            walker which still walk and finish(). The vectorized engine in one
+            process feeds them while walking, otherwise the stored paths are fed to
+            them afterwards
+        :param keep_paths: if False, the paths are only passed to the consumers and not
+            stored. This needs the vectorized engine in one process
+        """
+        assert keep_paths or (
+            engine == "vectorized" and workers == 1
+        ), "The paths can only be dropped by the vectorized engine in one process"
+        assert not (
+            consumers and engine == "endpoint"
+        ), "The endpoint engine does not calculate any paths to pass to consumers"
+        if not keep_paths or engine == "endpoint":
+            self.packed_directions = None
+        consumers = consumers or []
+        for consumer in consumers:
+            consumer.start(self)
+        if workers > 1 and len(self) > 1:
+            shards = [
+                rows
+                for rows in np.array_split(np.arange(len(self)), workers)
+                if rows.size > 0
+            ]
+            # the worker processes are not profiled, only the time waiting for them
+            with profiler.phase("walking"), ProcessPoolExecutor(
+                max_workers=len(shards)
+            ) as executor:
+                calculated_shards = executor.map(
+                    _calculate_shard,
+                    [self.select(rows) for rows in shards],
+                    repeat(engine),
+                )
+                for rows, shard in zip(shards, calculated_shards):
+                    if self.packed_directions is not None:
+                        self.packed_directions[
+                            ragged_indices(
+                                self.packed_offsets[rows], np.diff(shard.packed_offsets)
+                            )
+                        ] = shard.packed_directions
+                    self.end_points[rows] = shard.end_points
+                    # keep the state of the random streams after the walk
+                    for row, step_generator, collision_generator in zip(
+                        rows, shard.step_generators, shard.collision_generators
+                    ):
+                        self.step_generators[row] = step_generator
+                        self.collision_generators[row] = collision_generator
+        elif engine == "loop":
+            for walker in self:
+                walker.calculate_the_path(engine)
+        elif engine == "endpoint":
+            rejected_steps = (
+                np.zeros(len(self), dtype=np.int64) if profiler.enabled else None
+            )
+            with profiler.phase("walking"):
+                end_x, end_y = walk_to_end_points(
+                    self.start_points[:, 0],
+                    self.start_points[:, 1],
+                    self.obstacles,
+                    self.number_of_steps - 1,
+                    self.step_generators,
+                    self.collision_generators,
+                    rejected_steps,
+                )
+            profiler.count_per_walker("rejected_steps", rejected_steps)
+            self.end_points[:, 0] = end_x
+            self.end_points[:, 1] = end_y
+        else:
+            with profiler.phase("walking"):
+                for chunk in self.iter_paths(BLOCK_SIZE):
+                    if keep_paths:
+                        write_directions(
+                            self.packed_directions,
+                            self.packed_offsets,
+                            chunk.walker,
+                            chunk.first_step,
+                            chunk.directions,
+                        )
+                    with profiler.phase("consumers"):
+                        for consumer in consumers:
+                            consumer.update(chunk)
+        if consumers and (engine == "loop" or (workers > 1 and len(self) > 1)):
+            with profiler.phase("consumers"):
+                for chunk in self.iter_stored_paths(BLOCK_SIZE):
+                    for consumer in consumers:
+                        consumer.update(chunk)
+        for consumer in consumers:
+            consumer.finish()
+
+    def first_passage(self, target=None) -> "FirstPassage":
+        """
+        Finds when and where each walker first hits a target, e.g. gets too far away
+            from its start point. All walker walk in blocks at once and each walker is
+            dropped as soon as it hit the target, so large scenes don't spend their
+            time on walker which already hit it. The walker walk from their start
+            points with their random streams created again from the seed, so they walk
+            the same paths as calculate_the_paths does, also if the paths were
+            calculated or extended before, and the scene is not changed.
+        :param target: a DistanceTarget (default: the distance from which on a walker
+            takes a plane), a RegionTarget or ObstacleContact
+        :return: the hitting times and positions of the walker
+        """
+        target = target if target is not None else DistanceTarget()
+        rejected_steps = (
+            np.zeros(len(self), dtype=np.int64) if profiler.enabled else None
+        )
+        step_generators, collision_generators = (
+            list(generators)
+            for generators in zip(
+                *(
+                    path_streams(
+                        self.walker_seed_sequence(index),
+                        self.start_walking_time * walking_speed + 1,
+                        self.landscape,
+                    )
+                    for index, walking_speed in enumerate(self.walking_speeds)
+                )
+            )
+        )
+        with profiler.phase("walking"):
+            hitting_steps, positions = walk_to_target(
+                self.start_points,
+                self.obstacles,
+                self.number_of_steps - 1,
+                step_generators,
+                collision_generators,
+                target,
+                rejected_steps,
+            )
+        profiler.count_per_walker("rejected_steps", rejected_steps)
+        return summarise_first_passage(hitting_steps, positions, self.walking_speeds)
+
+    def replay_paths(self, consumers: list = None) -> None:
+        """
+        Passes the calculated paths to consumers like calculate_the_paths does
+        :param consumers: objects with the methods start(scene), update(chunk) and
+            finish()
+        """
+        if not consumers:
+            return
+        assert (
+            self.packed_directions is not None
+        ), "The paths of the scene are not stored"
+        for consumer in consumers:
+            consumer.start(self)
+        with profiler.phase("consumers"):
+            for chunk in self.iter_stored_paths(BLOCK_SIZE):
+                for consumer in consumers:
+                    consumer.update(chunk)
+        for consumer in consumers:
+            consumer.finish()
+
+    def extend(self, additional_time: int, engine: str = "vectorized") -> None:
+        """
+        Continues the walk of all walker for some more time from their end points,
+            drawing from their random streams where they stopped. The paths walked so
+            far are kept and the storage of the paths grows by at least doubling, so
+            extending a scene many times does not copy it each time.
+        :param additional_time: the time the walker walk on
+        :param engine: 'vectorized' (default) or 'endpoint', which only calculates the
+            end points and drops the paths
+        """
+        assert (
+            additional_time >= 1
+        ), "The additional time must be at least 1. You stated {}".format(
+            additional_time
+        )
+        assert engine in (
+            "vectorized",
+            "endpoint",
+        ), "A scene can only be extended by the vectorized or the endpoint engine"
+        previous_steps = self.number_of_steps
+        self.walking_time += additional_time
+        self.number_of_steps = self.walking_time * self.walking_speeds + 1
+        additional_steps = self.number_of_steps - previous_steps
+        rejected_steps = (
+            np.zeros(len(self), dtype=np.int64) if profiler.enabled else None
+        )
+        if engine == "endpoint":
+            self.packed_directions = None
+            with profiler.phase("walking"):
+                end_x, end_y = walk_to_end_points(
+                    self.end_points[:, 0],
+                    self.end_points[:, 1],
+                    self.obstacles,
+                    additional_steps,
+                    self.step_generators,
+                    self.collision_generators,
+                    rejected_steps,
+                )
+            self.end_points[:, 0] = end_x
+            self.end_points[:, 1] = end_y
+            profiler.count_per_walker("rejected_steps", rejected_steps)
+            return
+        if self.packed_directions is not None:
+            self.packed_directions, self.packed_offsets = grow_packed(
+                self.packed_directions,
+                self.packed_offsets,
+                packed_length(previous_steps - 1),
+                packed_length(self.number_of_steps - 1),
+            )
+        with profiler.phase("walking"):
+            for first_step in range(0, int(additional_steps.max()), BLOCK_SIZE):
+                rows, directions, _, _ = self.walk_next_block(
+                    additional_steps - first_step, BLOCK_SIZE, rejected_steps
+                )
+                if self.packed_directions is not None:
+                    write_directions(
+                        self.packed_directions,
+                        self.packed_offsets,
+                        rows,
+                        previous_steps[rows] + first_step,
+                        directions,
+                    )
+        profiler.count_per_walker("rejected_steps", rejected_steps)
+
+    def save_checkpoint(self, file_name: str) -> None:
+        """
+        Saves everything needed to continue the walk with extend after loading it with
+            load_checkpoint: the current position, the state of the random streams,
+            the walking speed and the building of each walker, the landscape and the
+            paths walked so far. The file is written under a temporary name and
+            renamed afterwards, so a job stopped while saving keeps its last checkpoint
+        :param file_name: the file to be created, a .npz file
+        """
+        arrays = self.to_arrays()
+        arrays["seed"] = np.array(str(self.seed_sequence.entropy))
+        if self.landscape is not None:
+            arrays["obstacles"] = self.landscape.obstacles
+        descriptor, temporary_name = tempfile.mkstemp(
+            suffix=".tmp", dir=os.path.dirname(os.path.abspath(file_name))
+        )
+        try:
+            with os.fdopen(descriptor, "wb") as outfile:
+                np.savez(outfile, **arrays)
+            os.replace(temporary_name, file_name)
+        finally:
+            if os.path.exists(temporary_name):
+                os.remove(temporary_name)
+
+    @classmethod
+    def load_checkpoint(cls, file_name: str) -> "Scene":
+        """
+        Loads a scene saved by save_checkpoint
+        :param file_name: the checkpoint file
+        :return: the scene, ready to be extended
+        """
+        with np.load(file_name) as data:
+            arrays = {name: data[name] for name in data.files}
+        landscape = Landscape(arrays["obstacles"]) if "obstacles" in arrays else None
+        return cls.from_arrays(arrays, int(str(arrays["seed"])), landscape)
+
+    def to_arrays(self) -> dict:
+        """
+        Describes the calculated scene as arrays, e.g. to save it with numpy.savez
+        :return: a dictionary holding the arrays
+        """
+        random_states = [
+            [generator.bit_generator.state for generator in generators]
+            for generators in (self.step_generators, self.collision_generators)
+        ]
+        arrays = {
+            "walking_time": np.array(self.walking_time),
+            "start_walking_time": np.array(self.start_walking_time),
+            "seed_indices": self.seed_indices,
+            "walking_speeds": self.walking_speeds,
+            "start_points": self.start_points,
+            "end_points": self.end_points,
+            "random_states": np.array(json.dumps(random_states)),
+        }
+        if self.packed_directions is not None:
+            # without the room for extensions
+            arrays["packed_directions"] = self.packed_directions[
+                ragged_indices(
+                    self.packed_offsets[:-1], packed_length(self.number_of_steps - 1)
+                )
+            ]
+        if self.buildings is not None:
+            arrays["buildings"] = self.buildings
+        return arrays
+
+    @classmethod
+    def from_arrays(
+        cls, arrays: dict, seed: int = None, landscape: Landscape = None
+    ) -> "Scene":
+        """
+        Creates a scene from the arrays of Scene.to_arrays
+        :param arrays: the dictionary holding the arrays
+        :param seed: the seed the scene was created with
+        :param landscape: the landscape the walker walked in
+        :return: the scene
+        """
+        scene = cls.__new__(cls)
+        scene.walking_time = int(arrays["walking_time"])
+        # older files do not hold it, their start points are taken as drawn for the
+        # walking time they hold
+        scene.start_walking_time = int(
+            arrays.get("start_walking_time", scene.walking_time)
+        )
+        scene.seed_sequence = np.random.SeedSequence(seed)
+        scene.landscape = landscape
+        scene.walking_speeds = np.asarray(arrays["walking_speeds"], dtype=np.int64)
+        scene.seed_indices = np.asarray(
+            arrays.get("seed_indices", np.arange(len(scene.walking_speeds))),
+            dtype=np.int64,
+        )
+        scene.number_of_steps = scene.walking_time * scene.walking_speeds + 1
+        scene.start_points = np.asarray(arrays["start_points"], dtype=np.int64)
+        scene.end_points = np.array(arrays["end_points"], dtype=np.int64)
+        used_lengths = packed_length(scene.number_of_steps - 1)
+        scene.packed_offsets = segment_offsets(used_lengths)
+        scene.packed_directions = (
+            np.asarray(arrays["packed_directions"], dtype=np.uint8)
+            if "packed_directions" in arrays
+            else None
+        )
+        if scene.packed_directions is not None and scene.packed_directions.ndim == 2:
+            # scenes stored before the paths were stored one after the other hold a
+            # matrix of shape (walker, steps / 4)
+            scene.packed_directions = scene.packed_directions[
+                np.repeat(np.arange(len(scene.walking_speeds)), used_lengths),
+                ragged_indices(np.zeros_like(used_lengths), used_lengths),
+            ]
+        if "buildings" in arrays:
+            scene.buildings = np.asarray(arrays["buildings"], dtype=float)
+        else:
+            scene.buildings = (
+                create_buildings(scene.start_points) if landscape is None else None
+            )
+        scene.step_generators, scene.collision_generators = (
+            [restore_generator(state) for state in states]
+            for states in json.loads(str(arrays["random_states"]))
+        )
+        return scene
+
+    def iter_paths(self, chunk_size: int = BLOCK_SIZE):
+        """
+        Walks the paths of all walker chunk by chunk without storing them, so the
+            memory needed does not depend on the number of steps. The walks start at
+            the start points, the current positions are carried from one chunk to the
+            next and the end points are updated after each chunk. The paths do not
+            depend on the chunk size. The chunks are time-aligned, see iter_blocks
+        :param chunk_size: the largest number of steps per chunk. It must be a multiple
+            of 4 to store the directions of the chunks
+        :return: a generator yielding a PathChunk holding the walker of a speed which
+            still walk for each chunk
+        """
+        # new paths start at the start points, also if paths were calculated before
+        self.end_points[:] = self.start_points
+        rejected_steps = (
+            np.zeros(len(self), dtype=np.int64) if profiler.enabled else None
+        )
+        for first_step, block_size, walking in self.iter_blocks(chunk_size):
+            rows, directions, x_block, y_block = self.walk_next_block(
+                np.where(walking, self.number_of_steps - first_step, 0),
+                block_size,
+                rejected_steps,
+            )
+            yield PathChunk(first_step, directions, x_block, y_block, rows)
+        profiler.count_per_walker("rejected_steps", rejected_steps)
+
+    def iter_blocks(self, chunk_size: int = BLOCK_SIZE):
+        """
+        Splits the steps of all walker into time-aligned blocks: all blocks of a round
+            cover the same time, one block per speed, so faster walker take more steps
+            per block. Consumers like the EncounterDetector therefore only need to
+            keep the positions of one round instead of those between the time the
+            fastest and the slowest walker reached.
+        :param chunk_size: the largest number of steps per block, which the fastest
+            walker take. It must be a multiple of 4
+        :return: a generator yielding the number of the first step, the number of
+            steps and a boolean array marking the walker of each block
+        """
+        # the time of a round is a multiple of 4, so all blocks start at a byte of
+        # the stored directions
+        round_time = max(4, chunk_size // int(self.walking_speeds.max()) // 4 * 4)
+        speeds = np.unique(self.walking_speeds)
+        for first_time in range(0, int(self.walking_time), round_time):
+            for speed in speeds:
+                first_step = 1 + first_time * int(speed)
+                walking = (self.walking_speeds == speed) & (
+                    self.number_of_steps > first_step
+                )
+                if walking.any():
+                    yield first_step, round_time * int(speed), walking
+
+    def walk_next_block(
+        self,
+        remaining_steps: np.ndarray,
+        block_size: int,
+        rejected_steps: np.ndarray = None,
+    ) -> tuple:
+        """
+        Walks the next block of steps of the walker which still walk from their end
+            points and updates the end points. Walker which already arrived are not
+            part of the block, so they don't need any memory or time.
+        :param remaining_steps: an array holding the number of steps each walker still
+            walks
+        :param block_size: the largest number of steps of the block
+        :param rejected_steps: if given, an array the number of steps into an obstacle
+            of each walker is added to
+        :return: a tuple of the indices of the walker which walk and three arrays of
+            shape (walker, block length) holding their directions, x- and
+            y-coordinates, see walk_block
+        """
+        rows = np.flatnonzero(remaining_steps > 0)
+        row_rejected_steps = (
+            np.zeros(rows.size, dtype=np.int64) if rejected_steps is not None else None
+        )
+        directions, x_block, y_block = walk_block(
+            self.end_points[rows, 0],
+            self.end_points[rows, 1],
+            obstacles_of_rows(self.obstacles, rows),
+            np.minimum(remaining_steps[rows], block_size),
+            [self.step_generators[row] for row in rows],
+            [self.collision_generators[row] for row in rows],
+            row_rejected_steps,
+        )
+        self.end_points[rows, 0] = x_block[:, -1]
+        self.end_points[rows, 1] = y_block[:, -1]
+        if rejected_steps is not None:
+            rejected_steps[rows] += row_rejected_steps
+        return rows, directions, x_block, y_block
+
+    @property
+    def obstacles(self):
+        """the landscape the walker walk in or otherwise the buildings of the walker"""
+        return self.landscape if self.landscape is not None else self.buildings
+
+    def iter_stored_paths(self, chunk_size: int = BLOCK_SIZE):
+        """
+        Reads the calculated paths of all walker chunk by chunk like they were yielded
+            by iter_paths while walking
+        :param chunk_size: the largest number of steps per chunk. It must be a multiple
+            of 4
+        :return: a generator yielding a PathChunk holding the walker of a speed which
+            still walk for each chunk
+        """
+        positions = self.start_points.copy()
+        for first_step, block_size, walking in self.iter_blocks(chunk_size):
+            rows = np.flatnonzero(walking)
+            lengths = np.minimum(self.number_of_steps[rows] - first_step, block_size)
+            length = int(lengths.max())
+            # the bytes behind the room of a walker are replaced by standing still
+            indices = np.minimum(
+                (self.packed_offsets[rows] + (first_step - 1) // 4)[:, None]
+                + np.arange(packed_length(length)),
+                len(self.packed_directions) - 1,
+            )
+            directions = unpack_directions(
+                self.packed_directions[indices], length
+            ).astype(np.int64)
+            directions[np.arange(length) >= lengths[:, None]] = STAND_STILL
+            x_block = positions[rows, 0:1] + np.cumsum(STEPS[directions, 0], axis=1)
+            y_block = positions[rows, 1:2] + np.cumsum(STEPS[directions, 1], axis=1)
+            positions[rows, 0] = x_block[:, -1]
+            positions[rows, 1] = y_block[:, -1]
+            yield PathChunk(first_step, directions, x_block, y_block, rows)
+
+    def get_start_points(self) -> np.ndarray:
+        """
+        gets the starting positions of all walker
+        :return: an array of shape (walker, 2) holding the x- and y-coordinates
+        """
+        return self.start_points.copy()
+
+    def get_end_points(self) -> np.ndarray:
+        """
+        gets the last positions of all walker
+        :return: an array of shape (walker, 2) holding the x- and y-coordinates
+        """
+        return self.end_points.copy()
+
+
+class TrajectoryWriter:
+    """
+    Writes the paths of a scene into a binary trajectory file while they are calculated.
+        The file starts with TRAJECTORY_MAGIC, followed by the length of the header as
+        a little-endian 8 byte integer and the header as JSON. It holds the walking
+        time, the speed, number of steps and building of each walker, the obstacles of
+        the landscape, the seed and the type of the coordinates. Then, aligned to
+        TRAJECTORY_ALIGNMENT bytes, the x-coordinates and the y-coordinates of each
+        walker follow as contiguous arrays, one walker after the other.
+    """
+
+    def __init__(self, file_name: str):
+        self.file_name = file_name
+        self.number_of_steps = None
+        self.offsets = None
+        self.coordinates = None
+
+    def start(self, scene: Scene) -> None:
+        """
+        Writes the header of the file and the start points of the walker
+        :param scene: the scene whose paths are written
+        """
+        self.number_of_steps = scene.number_of_steps.copy()
+        dtype = np.dtype(
+            coordinate_dtype(scene.start_points, scene.number_of_steps)
+        ).newbyteorder("<")
+        header = {
+            "walking_time": int(scene.walking_time),
+            "walking_speeds": scene.walking_speeds.tolist(),
+            "number_of_steps": self.number_of_steps.tolist(),
+            "buildings": (
+                scene.buildings.tolist() if scene.buildings is not None else None
+            ),
+            "landscape": (
+                scene.landscape.obstacles.tolist()
+                if scene.landscape is not None
+                else None
+            ),
+            "seed": scene.seed_sequence.entropy,
+            "dtype": dtype.str,
+        }
+        header_bytes = json.dumps(header).encode()
+        data_offset = len(TRAJECTORY_MAGIC) + 8 + len(header_bytes)
+        data_offset += -data_offset % TRAJECTORY_ALIGNMENT
+        header_bytes = header_bytes.ljust(data_offset - len(TRAJECTORY_MAGIC) - 8)
+        with open(self.file_name, "wb") as outfile:
+            outfile.write(TRAJECTORY_MAGIC)
+            outfile.write(len(header_bytes).to_bytes(8, "little"))
+            outfile.write(header_bytes)
+        self.coordinates = np.memmap(
+            self.file_name,
+            dtype=dtype,
+            mode="r+",
+            offset=data_offset,
+            shape=(2 * int(self.number_of_steps.sum()),),
+        )
+        self.offsets = np.concatenate([[0], np.cumsum(2 * self.number_of_steps)])
+        self.coordinates[self.offsets[:-1]] = scene.start_points[:, 0]
+        self.coordinates[self.offsets[:-1] + self.number_of_steps] = scene.start_points[
+            :, 1
+        ]
+
+    def update(self, chunk: PathChunk) -> None:
+        """
+        Writes a chunk of the paths of the walker which still walk, all walker at once
+        :param chunk: the chunk holding the walker which still walk
+        """
+        rows = chunk.walker
+        lengths = np.minimum(
+            self.number_of_steps[rows] - chunk.first_step, chunk.x_coordinates.shape[1]
+        )
+        walking = np.arange(chunk.x_coordinates.shape[1]) < lengths[:, None]
+        x_offsets = self.offsets[rows] + chunk.first_step
+        self.coordinates[ragged_indices(x_offsets, lengths)] = chunk.x_coordinates[
+            walking
+        ]
+        self.coordinates[
+            ragged_indices(x_offsets + self.number_of_steps[rows], lengths)
+        ] = chunk.y_coordinates[walking]
+
+    def finish(self) -> None:
+        """Writes all chunks to the disk and closes the file"""
+        self.coordinates.flush()
+        self.coordinates = None
+
+
+class EnsembleStatistics:
+    """
+    Calculates statistics over all walker of a scene while the paths are calculated,
+        without storing the paths: the mean squared displacement from the start point
+        over time (with Welford's running mean and variance), the distribution of the
+        distances between start and end point and the fraction of walker which took a
+        plane, as they ended too far away.
+    """
+
+    def __init__(self, time_resolution: int = None, distance_bin_width: float = 5):
+        """
+        :param time_resolution: the displacement is recorded every this many time
+            units. By default, it is recorded at about 1000 points in time
+        :param distance_bin_width: the width of the bins of the distribution of the
+            distances between start and end point
+        """
+        self.time_resolution = time_resolution
+        self.distance_bin_width = distance_bin_width
+        self.start_points = None
+        self.walking_speeds = None
+        self.number_of_steps = None
+        self.sample_counts = None
+        self.means = None
+        self.squared_deviations = None
+        self.distance_counts = np.zeros(0, dtype=np.int64)
+        self.flying_walker = 0
+
+    def start(self, scene: "Scene") -> None:
+        """
+        Prepares the statistics for the walker of a scene and records their start
+        :param scene: the scene whose paths are passed to the statistics
+        """
+        if self.time_resolution is None:
+            self.time_resolution = max(1, scene.walking_time // 1000)
+        self.walking_time = scene.walking_time
+        self.start_points = scene.get_start_points()
+        self.walking_speeds = scene.walking_speeds.copy()
+        self.number_of_steps = scene.number_of_steps.copy()
+        number_of_times = scene.walking_time // self.time_resolution + 1
+        self.sample_counts = np.zeros(number_of_times, dtype=np.int64)
+        self.means = np.zeros(number_of_times)
+        self.squared_deviations = np.zeros(number_of_times)
+        # all walker are at their start point at time 0
+        self.sample_counts[0] = len(scene)
+
+    def update(self, chunk: PathChunk) -> None:
+        """
+        Adds the positions of a chunk of the paths of the walker which still walk
+        :param chunk: the chunk holding the walker which still walk
+        """
+        number_of_steps = self.number_of_steps[chunk.walker]
+        start_points = self.start_points[chunk.walker]
+        steps = chunk.first_step + np.arange(chunk.x_coordinates.shape[1])
+        walking = steps[None, :] < number_of_steps[:, None]
+        squared_displacements = (chunk.x_coordinates - start_points[:, 0:1]) ** 2 + (
+            chunk.y_coordinates - start_points[:, 1:2]
+        ) ** 2
+        # record the walker at each multiple of the time resolution
+        steps_per_record = self.walking_speeds[chunk.walker] * self.time_resolution
+        rows, columns = np.nonzero(
+            walking & (steps[None, :] % steps_per_record[:, None] == 0)
+        )
+        self.add_samples(
+            steps[columns] // steps_per_record[rows],
+            squared_displacements[rows, columns],
+        )
+        # record the distance between start and end point of arrived walker
+        rows, columns = np.nonzero(steps[None, :] == number_of_steps[:, None] - 1)
+        distances = np.sqrt(squared_displacements[rows, columns])
+        self.flying_walker += int(np.count_nonzero(distances >= FLYING_DISTANCE))
+        distance_counts = np.bincount(
+            (distances // self.distance_bin_width).astype(np.int64)
+        )
+        if len(distance_counts) > len(self.distance_counts):
+            self.distance_counts = np.pad(
+                self.distance_counts,
+                (0, len(distance_counts) - len(self.distance_counts)),
+            )
+        self.distance_counts[: len(distance_counts)] += distance_counts
+
+    def add_samples(self, time_indices: np.ndarray, values: np.ndarray) -> None:
+        """
+        Adds samples to the running mean and variance of each point in time. The
+            samples are summarised per point in time first and then merged into the
+            running values (Chan's parallel version of Welford's algorithm)
+        :param time_indices: an array holding the index of the point in time of each
+            sample
+        :param values: an array holding the samples
+        """
+        number_of_times = len(self.sample_counts)
+        counts = np.bincount(time_indices, minlength=number_of_times)
+        recorded = counts > 0
+        means = np.zeros(number_of_times)
+        means[recorded] = (
+            np.bincount(time_indices, weights=values, minlength=number_of_times)[
+                recorded
+            ]
+            / counts[recorded]
+        )
+        squared_deviations = np.bincount(
+            time_indices,
+            weights=(values - means[time_indices]) ** 2,
+            minlength=number_of_times,
+        )
+        total_counts = self.sample_counts + counts
+        differences = means - self.means
+        self.means[recorded] += (
+            differences[recorded] * counts[recorded] / total_counts[recorded]
+        )
+        self.squared_deviations[recorded] += (
+            squared_deviations[recorded]
+            + differences[recorded] ** 2
+            * self.sample_counts[recorded]
+            * counts[recorded]
+            / total_counts[recorded]
+        )
+        self.sample_counts = total_counts
+
+    def finish(self) -> None:
+        """Nothing to do, all statistics are up to date after each chunk"""
+
+    def summary(self) -> dict:
+        """
+        Summarises the statistics
+        :return: a dictionary holding the points in time, the mean squared displacement
+            and its variance at each of them, the distribution of the distances
+            between start and end point and the fraction of walker which took a plane
+        """
+        number_of_walker = len(self.start_points)
+        variances = np.zeros(len(self.means))
+        multiple_samples = self.sample_counts > 1
+        variances[multiple_samples] = self.squared_deviations[multiple_samples] / (
+            self.sample_counts[multiple_samples] - 1
+        )
+        return {
+            "number_of_walker": number_of_walker,
+            "times": (np.arange(len(self.means)) * self.time_resolution).tolist(),
+            "mean_squared_displacement": self.means.tolist(),
+            "variance_squared_displacement": variances.tolist(),
+            "distance_bin_width": self.distance_bin_width,
+            "end_distance_counts": self.distance_counts.tolist(),
+            "flying_fraction": self.flying_walker / number_of_walker,
+        }
+
+    def save(self, file_name: str) -> None:
+        """
+        Saves the summary of the statistics as JSON
+        :param file_name: the file to be created
+        """
+        with open(file_name, "w") as outfile:
+            json.dump(self.summary(), outfile)
+
+
+def group_tiles(tile_columns: np.ndarray, tile_rows: np.ndarray) -> tuple:
+    """
+    Finds the distinct tiles of positions. If the tiles lie close together, they are
+        found by counting them in their bounding box, otherwise by sorting them
+    :param tile_columns: an array holding the column of the tile of each position
+    :param tile_rows: an array holding the row of the tile of each position
+    :return: a tuple of three arrays, the column and the row of each distinct tile and
+        the index of the distinct tile of each position
+    """
+    first_column = tile_columns.min()
+    first_row = tile_rows.min()
+    number_of_columns = int(tile_columns.max() - first_column) + 1
+    number_of_rows = int(tile_rows.max() - first_row) + 1
+    if number_of_columns * number_of_rows <= max(tile_columns.size, 1 << 16):
+        keys = (tile_columns - first_column) * number_of_rows + (tile_rows - first_row)
+        touched = np.flatnonzero(
+            np.bincount(keys, minlength=number_of_columns * number_of_rows)
+        )
+        tile_of_key = np.empty(number_of_columns * number_of_rows, dtype=np.int64)
+        tile_of_key[touched] = np.arange(len(touched))
+        return (
+            touched // number_of_rows + first_column,
+            touched % number_of_rows + first_row,
+            tile_of_key[keys],
+        )
+    # rows fit into the lower 32 bits, as a tile holds many positions
+    _, first, tiles = np.unique(
+        tile_columns * (1 << 32) + tile_rows, return_index=True, return_inverse=True
+    )
+    return tile_columns[first], tile_rows[first], tiles.ravel()
+
+
+class OccupancyHeatmap:
+    """
+    Counts how often each position was visited by any walker while the paths are
+        calculated, without storing the paths. The visits are counted in square tiles,
+        which are only created where walker walked, so the memory depends on the area
+        the walker covered, not on the number of walker or steps.
+    """
+
+    def __init__(self, tile_size: int = TILE_SIZE):
+        """
+        :param tile_size: the side length of the tiles
+        """
+        self.tile_size = tile_size
+        # the index of each tile in the counts by its position (column, row)
+        self.tile_indices = {}
+        self.tile_positions = np.zeros((0, 2), dtype=np.int64)
+        self.counts = np.zeros((0, tile_size, tile_size), dtype=np.int64)
+        self.number_of_steps = None
+        self.number_of_walker = 0
+        self.buildings = None
+        self.landscape = None
+
+    def start(self, scene: "Scene") -> None:
+        """
+        Prepares the heatmap for the walker of a scene and counts their start points
+        :param scene: the scene whose paths are passed to the heatmap
+        """
+        self.number_of_steps = scene.number_of_steps.copy()
+        self.number_of_walker += len(scene)
+        self.landscape = scene.landscape
+        if scene.buildings is not None:
+            self.add_buildings(scene.buildings)
+        self.add(scene.start_points[:, 0], scene.start_points[:, 1])
+
+    def update(self, chunk: PathChunk) -> None:
+        """
+        Counts the positions of a chunk of the paths of the walker which still walk
+        :param chunk: the chunk holding the walker which still walk
+        """
+        steps = chunk.first_step + np.arange(chunk.x_coordinates.shape[1])
+        walking = steps[None, :] < self.number_of_steps[chunk.walker, None]
+        self.add(chunk.x_coordinates[walking], chunk.y_coordinates[walking])
+
+    def finish(self) -> None:
+        """Nothing to do, the heatmap is up to date after each chunk"""
+
+    def add_walker(self, walker: "Walker") -> None:
+        """
+        Counts the positions of the path of a walker, e.g. of a loaded trajectory
+        :param walker: the walker object
+        """
+        self.number_of_walker += 1
+        if walker.landscape is not None:
+            self.landscape = walker.landscape
+        elif walker.building is not None:
+            self.add_buildings(np.array([walker.building], dtype=float))
+        for first_step in range(0, walker.number_of_steps, PLOT_CHUNK_SIZE):
+            chunk = slice(first_step, first_step + PLOT_CHUNK_SIZE)
+            self.add(walker.x_coordinates[chunk], walker.y_coordinates[chunk])
+
+    def add_buildings(self, buildings: np.ndarray) -> None:
+        """
+        Remembers buildings to be plotted with the heatmap
+        :param buildings: an array of shape (walker, 4) holding the buildings
+        """
+        self.buildings = (
+            buildings.copy()
+            if self.buildings is None
+            else np.concatenate([self.buildings, buildings])
+        )
+
+    def add(self, x_coordinates: np.ndarray, y_coordinates: np.ndarray) -> None:
+        """
+        Counts visits of positions. The visits of all positions are counted at once and
+            added to the tiles they are in, new tiles are created as needed
+        :param x_coordinates: an array holding the x-coordinates
+        :param y_coordinates: an array holding the y-coordinates
+        """
+        x_coordinates = np.asarray(x_coordinates, dtype=np.int64).ravel()
+        y_coordinates = np.asarray(y_coordinates, dtype=np.int64).ravel()
+        if x_coordinates.size == 0:
+            return
+        tile_columns = x_coordinates // self.tile_size
+        tile_rows = y_coordinates // self.tile_size
+        columns, rows, tiles = group_tiles(tile_columns, tile_rows)
+        indices = np.array(
+            [
+                self.tile_index(column, row)
+                for column, row in zip(columns.tolist(), rows.tolist())
+            ],
+            dtype=np.int64,
+        )
+        cells = (y_coordinates - tile_rows * self.tile_size) * self.tile_size + (
+            x_coordinates - tile_columns * self.tile_size
+        )
+        tile_cells = self.tile_size**2
+        if len(indices) * tile_cells <= 4 * x_coordinates.size:
+            # the touched tiles are small compared to the positions, count densely
+            visits = np.bincount(
+                tiles * tile_cells + cells, minlength=len(indices) * tile_cells
+            )
+            self.counts[indices] += visits.reshape(
+                len(indices), self.tile_size, self.tile_size
+            )
+        else:
+            visited_cells, visits = np.unique(
+                indices[tiles] * tile_cells + cells, return_counts=True
+            )
+            self.counts.reshape(-1)[visited_cells] += visits
+
+    def tile_index(self, column: int, row: int) -> int:
+        """
+        Gets the index of a tile in the counts and creates it, if it does not exist
+        :param column: the column of the tile
+        :param row: the row of the tile
+        :return: the index
+        """
+        index = self.tile_indices.get((column, row))
+        if index is None:
+            index = len(self.tile_indices)
+            if index == len(self.counts):
+                # grow by doubling, so adding tiles takes amortised constant time
+                growth = max(index, 1)
+                self.counts = np.concatenate(
+                    [
+                        self.counts,
+                        np.zeros((growth, self.tile_size, self.tile_size), np.int64),
+                    ]
+                )
+                self.tile_positions = np.concatenate(
+                    [self.tile_positions, np.zeros((growth, 2), np.int64)]
+                )
+            self.tile_indices[(column, row)] = index
+            self.tile_positions[index] = column, row
+        return index
+
+    def to_image(self, resolution: int = HEATMAP_RESOLUTION) -> tuple:
+        """
+        Sums up the visits in an image covering all visited positions. If the visited
+            area is larger than the resolution, each pixel holds several positions.
+        :param resolution: the largest number of pixels of each side of the image
+        :return: a tuple of an array of shape (rows, columns) holding the visits of
+            each pixel and the area of the image as xmin, xmax, ymin, ymax
+        """
+        number_of_tiles = len(self.tile_indices)
+        tiles, rows, columns = np.nonzero(self.counts[:number_of_tiles])
+        visits = self.counts[:number_of_tiles][tiles, rows, columns]
+        x_coordinates = self.tile_positions[tiles, 0] * self.tile_size + columns
+        y_coordinates = self.tile_positions[tiles, 1] * self.tile_size + rows
+        if visits.size == 0:
+            return np.zeros((1, 1), dtype=np.int64), [-0.5, 0.5, -0.5, 0.5]
+        minimum = np.array([x_coordinates.min(), y_coordinates.min()])
+        size = np.array([x_coordinates.max(), y_coordinates.max()]) - minimum + 1
+        pixel_size = int(math.ceil(size.max() / resolution))
+        shape = (size + pixel_size - 1) // pixel_size
+        pixels = ((y_coordinates - minimum[1]) // pixel_size) * shape[0] + (
+            x_coordinates - minimum[0]
+        ) // pixel_size
+        image = np.bincount(
+            pixels, weights=visits, minlength=int(shape[0] * shape[1])
+        ).reshape(shape[1], shape[0])
+        extent = [
+            float(minimum[0]) - 0.5,
+            float(minimum[0] + shape[0] * pixel_size) - 0.5,
+            float(minimum[1]) - 0.5,
+            float(minimum[1] + shape[1] * pixel_size) - 0.5,
+        ]
+        return image.astype(np.int64), extent
+
+
+def bucket_pairs(
+    first_samples: np.ndarray,
+    bucket_sizes: np.ndarray,
+    buckets: np.ndarray,
+    neighbours: np.ndarray,
+) -> tuple:
+    """
+    Lists all pairs of samples of pairs of buckets, without comparing any positions
+    :param first_samples: an array holding the index of the first sample of each
+        bucket in the sorted samples
+    :param bucket_sizes: an array holding the number of samples of each bucket
+    :param buckets: an array holding the first bucket of each pair of buckets
+    :param neighbours: an array holding the second bucket of each pair of buckets
+    :return: a tuple of two arrays, the index of the first and of the second sample of
+        each pair in the sorted samples
+    """
+    pair_counts = bucket_sizes[buckets] * bucket_sizes[neighbours]
+    pairs = np.repeat(np.arange(len(buckets)), pair_counts)
+    index_in_pair = np.arange(len(pairs)) - np.repeat(
+        np.cumsum(pair_counts) - pair_counts, pair_counts
+    )
+    second_sizes = bucket_sizes[neighbours][pairs]
+    return (
+        first_samples[buckets][pairs] + index_in_pair // second_sizes,
+        first_samples[neighbours][pairs] + index_in_pair % second_sizes,
+    )
+
+
+def neighbouring_buckets(
+    bucket_keys: np.ndarray, bucket_sizes: np.ndarray, height: int
+) -> list:
+    """
+    Finds the occupied buckets of a spatial hash which need to be compared. Each bucket
+        is compared with itself, with the bucket above it, which follows it in the
+        sorted keys, and with the three buckets right of it, which follow each other in
+        the sorted keys and are found by one search. The other neighbours compare
+        themselves with the bucket
+    :param bucket_keys: an array holding the sorted keys of the occupied buckets. The
+        key of a bucket is its column times the height plus its row
+    :param bucket_sizes: an array holding the number of positions in each bucket
+    :param height: the number of rows of buckets, including an empty margin
+    :return: a list of tuples of two arrays, the buckets and their neighbours. Within
+        the first tuple, both arrays are the same object
+    """
+    number_of_buckets = len(bucket_keys)
+    # only buckets holding several positions can hold an encounter within themselves
+    crowded = np.flatnonzero(bucket_sizes > 1)
+    pairs = [(crowded, crowded)]
+    right = np.searchsorted(bucket_keys, bucket_keys + height - 1)
+    for neighbours, lowest, highest in [
+        (np.arange(1, number_of_buckets + 1), 1, 1),
+        (right, height - 1, height + 1),
+        (right + 1, height - 1, height + 1),
+        (right + 2, height - 1, height + 1),
+    ]:
+        inside = neighbours < number_of_buckets
+        distances = (
+            bucket_keys[np.minimum(neighbours, number_of_buckets - 1)] - bucket_keys
+        )
+        buckets = np.flatnonzero(
+            inside & (distances >= lowest) & (distances <= highest)
+        )
+        pairs.append((buckets, neighbours[buckets]))
+    return pairs
+
+
+class EncounterDetector:
+    """
+    Finds the encounters of walker while the paths are calculated: two walker meet if
+        they are at most a radius apart in x and y at the same point in time, so with
+        the default radius 1 they share or neighbour a cell. The positions at each
+        point in time are hashed into square buckets with a side length of the radius
+        + 1, so only walker in the same or in neighbouring buckets are compared instead
+        of all pairs. As faster walker take more steps per time unit, the positions are
+        kept until all walker reached their point in time. The chunks of a scene are
+        time-aligned, see Scene.iter_blocks, so only the positions of about one chunk
+        are kept.
+    """
+
+    def __init__(self, radius: int = ENCOUNTER_RADIUS, time_resolution: int = 1):
+        """
+        :param radius: the largest distance in x and y of two walker which meet
+        :param time_resolution: the walker are compared every this many time units
+        """
+        assert radius >= 0, "The radius can't be negative. You stated {}".format(radius)
+        self.radius = radius
+        self.time_resolution = time_resolution
+        self.walking_speeds = None
+        self.number_of_steps = None
+        # the number of the last step of each walker passed to the detector
+        self.reached_steps = None
+        # the time, walker, x- and y-coordinate of positions of incomplete points in
+        # time
+        self.pending = np.zeros((4, 0), dtype=np.int64)
+        self.found_events = []
+        self.events = np.zeros((0, 5), dtype=np.int64)
+
+    def start(self, scene: "Scene") -> None:
+        """
+        Prepares the detection for the walker of a scene and compares their start
+            points
+        :param scene: the scene whose paths are passed to the detector
+        """
+        self.walking_speeds = scene.walking_speeds.copy()
+        self.number_of_steps = scene.number_of_steps.copy()
+        self.reached_steps = np.zeros(len(scene), dtype=np.int64)
+        self.pending = np.zeros((4, 0), dtype=np.int64)
+        self.found_events = []
+        self.detect(
+            np.zeros(len(scene), dtype=np.int64),
+            np.arange(len(scene)),
+            scene.start_points[:, 0],
+            scene.start_points[:, 1],
+        )
+
+    def update(self, chunk: PathChunk) -> None:
+        """
+        Adds the positions of a chunk of the paths of the walker which still walk and
+            compares the positions at each point in time all walker reached
+        :param chunk: the chunk holding the walker which still walk
+        """
+        steps = chunk.first_step + np.arange(chunk.x_coordinates.shape[1])
+        walking_speeds = self.walking_speeds[chunk.walker]
+        samples = [self.pending]
+        # all walker of a speed are recorded at the same steps
+        for speed in np.unique(walking_speeds):
+            rows = np.flatnonzero(walking_speeds == speed)
+            columns = np.flatnonzero(
+                (steps < self.number_of_steps[chunk.walker[rows[0]]])
+                & (steps % (speed * self.time_resolution) == 0)
+            )
+            samples.append(
+                np.stack(
+                    [
+                        np.broadcast_to(
+                            steps[columns] // speed, (len(rows), len(columns))
+                        ),
+                        np.broadcast_to(
+                            chunk.walker[rows, None], (len(rows), len(columns))
+                        ),
+                        chunk.x_coordinates[np.ix_(rows, columns)],
+                        chunk.y_coordinates[np.ix_(rows, columns)],
+                    ]
+                )
+                .reshape(4, -1)
+                .astype(np.int64)
+            )
+        samples = np.concatenate(samples, axis=1)
+        self.reached_steps[chunk.walker] = steps[-1]
+        # all walker which still walk reached the points in time up to the earliest
+        # one reached among them
+        walking = self.reached_steps < self.number_of_steps - 1
+        reached_time = (
+            (self.reached_steps[walking] // self.walking_speeds[walking]).min()
+            if walking.any()
+            else samples[0].max(initial=0)
+        )
+        complete = samples[0] <= reached_time
+        self.pending = samples[:, ~complete]
+        self.detect(*samples[:, complete])
+
+    def finish(self) -> None:
+        """Compares the remaining positions and sorts the encounters by time"""
+        self.detect(*self.pending)
+        self.pending = np.zeros((4, 0), dtype=np.int64)
+        if self.found_events:
+            events = np.concatenate(self.found_events)
+            self.events = events[np.lexsort(events[:, 2::-1].T)]
+        else:
+            self.events = np.zeros((0, 5), dtype=np.int64)
+
+    def detect(
+        self,
+        times: np.ndarray,
+        walker: np.ndarray,
+        x_coordinates: np.ndarray,
+        y_coordinates: np.ndarray,
+    ) -> None:
+        """
+        Finds the encounters among positions. The bucket of each position and its
+            point in time are combined into one key and the keys are sorted, so the
+            neighbouring buckets of the same point in time are found by searching
+        :param times: an array holding the point in time of each position
+        :param walker: an array holding the walker of each position
+        :param x_coordinates: an array holding the x-coordinate of each position
+        :param y_coordinates: an array holding the y-coordinate of each position
+        """
+        if len(times) < 2:
+            return
+        bucket_size = self.radius + 1
+        # shift the buckets to positive numbers with a margin for the neighbours
+        bucket_x = x_coordinates // bucket_size
+        bucket_x = bucket_x - bucket_x.min() + 1
+        bucket_y = y_coordinates // bucket_size
+        bucket_y = bucket_y - bucket_y.min() + 1
+        width = int(bucket_x.max()) + 2
+        height = int(bucket_y.max()) + 2
+        # the points in time compared at once, so the keys don't overflow
+        time_span = np.iinfo(np.int64).max // (2 * width * height)
+        first_time = int(times.min())
+        if int(times.max()) - first_time >= time_span:
+            earlier = times < first_time + time_span
+            self.detect(
+                times[earlier],
+                walker[earlier],
+                x_coordinates[earlier],
+                y_coordinates[earlier],
+            )
+            self.detect(
+                times[~earlier],
+                walker[~earlier],
+                x_coordinates[~earlier],
+                y_coordinates[~earlier],
+            )
+            return
+        keys = ((times - first_time) * width + bucket_x) * height + bucket_y
+        order = np.argsort(keys)
+        bucket_keys, first_samples, bucket_sizes = np.unique(
+            keys[order], return_index=True, return_counts=True
+        )
+        for buckets, neighbours in neighbouring_buckets(
+            bucket_keys, bucket_sizes, height
+        ):
+            first, second = bucket_pairs(
+                first_samples, bucket_sizes, buckets, neighbours
+            )
+            if buckets is neighbours:
+                # each pair within a bucket only once
+                first, second = first[first < second], second[first < second]
+            first = order[first]
+            second = order[second]
+            meeting = (
+                np.abs(x_coordinates[first] - x_coordinates[second]) <= self.radius
+            ) & (np.abs(y_coordinates[first] - y_coordinates[second]) <= self.radius)
+            first = first[meeting]
+            second = second[meeting]
+            # the position of the walker with the lower number
+            lower = np.where(walker[first] < walker[second], first, second)
+            self.found_events.append(
+                np.stack(
+                    [
+                        times[first],
+                        walker[lower],
+                        np.maximum(walker[first], walker[second]),
+                        x_coordinates[lower],
+                        y_coordinates[lower],
+                    ],
+                    axis=1,
+                ).astype(np.int64)
+            )
+
+    def save(self, file_name: str) -> None:
+        """
+        Saves the encounters as CSV with one row per encounter
+        :param file_name: the file to be created
+        """
+        np.savetxt(
+            file_name,
+            self.events,
+            fmt="%d",
+            delimiter=",",
+            header="time,first_walker,second_walker,x,y",
+            comments="",
+        )
+
+
+def encounter_positions(encounters: np.ndarray, number: int) -> np.ndarray:
+    """
+    Selects the positions of the encounters of one walker
+    :param encounters: an array of shape (encounters, 5) as found by EncounterDetector
+    :param number: the index of the walker
+    :return: an array of shape (encounters of the walker, 2) holding x and y
+    """
+    return encounters[(encounters[:, 1] == number) | (encounters[:, 2] == number), 3:5]
+
+
+class Profiler:
+    """
+    Measures where the time of a run goes. Each phase (e.g. walking, collisions,
+        consumers, plotting, rendering) sums up its time and number of calls. Phases can
+        be nested, the time of a phase includes the phases within it. Counters sum up
+        the steps, the bytes of the allocated arrays and the rejected steps of each
+        walker. Only the current process is measured.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.seconds = {}
+        self.calls = {}
+        self.counters = {}
+        self.walker_counters = {}
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        """
+        Measures the time of a phase
+        :param name: the name of the phase
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - started)
+
+    def add_time(self, name: str, seconds: float) -> None:
+        """
+        Adds the time of one call to a phase
+        :param name: the name of the phase
+        :param seconds: the time of the call
+        """
+        self.seconds[name] = self.seconds.get(name, 0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def count(self, name: str, value: int) -> None:
+        """
+        Adds a value to a counter
+        :param name: the name of the counter
+        :param value: the value to be added
+        """
+        self.counters[name] = self.counters.get(name, 0) + int(value)
+
+    def count_per_walker(self, name: str, values: np.ndarray) -> None:
+        """
+        Adds the values of some walker to a counter of each walker. The walker are
+            appended in the order they were calculated
+        :param name: the name of the counter
+        :param values: an array holding a value for each walker
+        """
+        values = np.asarray(values).tolist()
+        self.walker_counters.setdefault(name, []).extend(values)
+        self.count(name, sum(values))
+
+    def report(self) -> dict:
+        """
+        Summarises the measurements
+        :return: a dictionary holding the total time, the time and calls of each
+            phase, the counters and the counters of each walker
+        """
+        return {
+            "total_seconds": time.perf_counter() - self.started,
+            "phases": {
+                name: {"seconds": seconds, "calls": self.calls[name]}
+                for name, seconds in self.seconds.items()
+            },
+            "counters": dict(self.counters),
+            "walker_counters": dict(self.walker_counters),
+        }
+
+    def save(self, file_name: str) -> None:
+        """
+        Saves the report as JSON
+        :param file_name: the file to be created
+        """
+        with open(file_name, "w") as outfile:
+            json.dump(self.report(), outfile, indent=1)
+
+
+class NullProfiler:
+    """
+    Stands in for the profiler while profiling is disabled. It measures nothing, so
+        the instrumented code runs without checking whether profiling is enabled.
+    """
+
+    enabled = False
+    # a context manager doing nothing, shared by all phases
+    null_phase = contextlib.nullcontext()
+
+    def phase(self, name: str):
+        return self.null_phase
+
+    def add_time(self, name: str, seconds: float) -> None:
+        pass
+
+    def count(self, name: str, value: int) -> None:
+        pass
+
+    def count_per_walker(self, name: str, values: np.ndarray) -> None:
+        pass
+
+
+# the profiler all instrumented code reports to, see enable_profiling
+profiler = NullProfiler()
+
+
+def enable_profiling() -> Profiler:
+    """
+    Starts measuring all following calculations and plots
+    :return: the profiler holding the measurements
+    """
+    global profiler
+    profiler = Profiler()
+    return profiler
+
+
+def disable_profiling() -> None:
+    """Stops measuring, the instrumented code does not measure anything anymore"""
+    global profiler
+    profiler = NullProfiler()
+
+
+def read_trajectory_header(file_name: str) -> dict:
+    """
+    Reads the header of a trajectory file written by a TrajectoryWriter
+    :param file_name: the trajectory file
+    :return: a dictionary holding the header and the offset of the coordinates
+    """
+    with open(file_name, "rb") as infile:
+        assert (
+            infile.read(len(TRAJECTORY_MAGIC)) == TRAJECTORY_MAGIC
+        ), "'{}' is not a trajectory file".format(file_name)
+        header_length = int.from_bytes(infile.read(8), "little")
+        header = json.loads(infile.read(header_length))
+    header["data_offset"] = len(TRAJECTORY_MAGIC) + 8 + header_length
+    return header
+
+
+def load_trajectories(file_name: str) -> list:
+    """
+    Opens a trajectory file written by a TrajectoryWriter without reading it. The
+        coordinates of the walker are memory-mapped, they are only read from the disk
+        when they are accessed.
+    :param file_name: the trajectory file
+    :return: a list of walker objects, which can be plotted with plot_the_paths
+    """
+    header = read_trajectory_header(file_name)
+    number_of_steps = np.array(header["number_of_steps"], dtype=np.int64)
+    coordinates = np.memmap(
+        file_name,
+        dtype=np.dtype(header["dtype"]),
+        mode="r",
+        offset=header["data_offset"],
+        shape=(2 * int(number_of_steps.sum()),),
+    )
+    offsets = np.concatenate([[0], np.cumsum(2 * number_of_steps)])
+    landscape = (
+        Landscape(header["landscape"]) if header.get("landscape") is not None else None
+    )
+    buildings = header["buildings"] or [None] * len(number_of_steps)
+    return [
+        Walker.from_coordinates(
+            header["walking_time"],
+            walking_speed,
+            coordinates[offset : offset + steps],
+            coordinates[offset + steps : offset + 2 * steps],
+            building,
+            landscape,
+        )
+        for walking_speed, steps, offset, building in zip(
+            header["walking_speeds"],
+            number_of_steps,
+            offsets[:-1],
+            buildings,
+        )
+    ]
+
+
+def default_cache_directory() -> str:
+    """
+    Gets the directory of the result cache if none is given
+    :return: the directory 'random_walk' in the user's cache directory
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, "random_walk")
+
+
+class ResultCache:
+    """
+    Stores calculated scenes on disk. Each scene is addressed by a hash of everything
+        its paths depend on: the seed, the walking time, the walking speeds, the
+        landscape, the engine and ENGINE_VERSION. The buildings follow from the seed.
+        If the files get larger than the size limit, the least recently used scenes
+        are deleted. Scenes are written to a temporary file which is renamed
+        afterwards and renaming and deleting is locked, so several processes can
+        share a cache.
+    """
+
+    def __init__(self, directory: str = None, max_bytes: int = CACHE_SIZE):
+        """
+        :param directory: the directory holding the cached scenes. By default, the
+            directory of default_cache_directory
+        :param max_bytes: the size limit of all cached scenes
+        """
+        self.directory = directory or default_cache_directory()
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(
+        self,
+        seed: int,
+        walking_time: int,
+        walking_speeds: list,
+        landscape: Landscape = None,
+        engine: str = "vectorized",
+    ) -> str:
+        """
+        Calculates the address of a scene
+        :param seed: the seed of the scene
+        :param walking_time: the walking time of the walker
+        :param walking_speeds: the walking speed of each walker
+        :param landscape: the landscape the walker walk in
+        :param engine: the engine calculating the paths
+        :return: the hash as hexadecimal string
+        """
+        description = {
+            "version": ENGINE_VERSION,
+            "engine": engine,
+            "seed": seed,
+            "walking_time": walking_time,
+            "walking_speeds": np.asarray(walking_speeds).tolist(),
+            "landscape": landscape.obstacles.tolist()
+            if landscape is not None
+            else None,
+        }
+        return hashlib.sha256(
+            json.dumps(description, sort_keys=True).encode()
+        ).hexdigest()
+
+    def path(self, key: str) -> str:
+        """
+        Gets the file of a scene
+        :param key: the address of the scene
+        :return: the path of the file
+        """
+        return os.path.join(self.directory, key + ".npz")
+
+    @contextlib.contextmanager
+    def lock(self):
+        """Locks the cache against other processes changing it at the same time"""
+        with open(os.path.join(self.directory, ".lock"), "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def load(self, key: str, seed: int, landscape: Landscape = None) -> "Scene":
+        """
+        Loads a cached scene and marks it as recently used
+        :param key: the address of the scene
+        :param seed: the seed of the scene
+        :param landscape: the landscape the walker walked in
+        :return: the scene, or None if it is not cached
+        """
+        with profiler.phase("cache"):
+            try:
+                with np.load(self.path(key)) as data:
+                    arrays = {name: data[name] for name in data.files}
+                os.utime(self.path(key))
+            except (OSError, ValueError):
+                # not cached or deleted by another process in the meantime
+                return None
+            return Scene.from_arrays(arrays, seed, landscape)
+
+    def store(self, key: str, scene: "Scene") -> None:
+        """
+        Stores a scene and deletes the least recently used scenes if the cache gets
+            too large
+        :param key: the address of the scene
+        :param scene: the calculated scene, which must hold its paths
+        """
+        assert (
+            scene.packed_directions is not None
+        ), "Scenes calculated without paths are not cached"
+        with profiler.phase("cache"):
+            descriptor, temporary_name = tempfile.mkstemp(
+                suffix=".tmp", dir=self.directory
+            )
+            try:
+                with os.fdopen(descriptor, "wb") as outfile:
+                    np.savez(outfile, **scene.to_arrays())
+                with self.lock():
+                    os.replace(temporary_name, self.path(key))
+                    self.evict()
+            finally:
+                if os.path.exists(temporary_name):
+                    os.remove(temporary_name)
+
+    def evict(self) -> None:
+        """Deletes the least recently used scenes until the cache fits its size limit"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".npz"):
+                try:
+                    status = os.stat(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((status.st_mtime, status.st_size, name))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total_size <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            total_size -= size
+
+    def clear(self) -> None:
+        """Deletes all cached scenes"""
+        with self.lock():
+            for name in os.listdir(self.directory):
+                if name.endswith((".npz", ".tmp")):
+                    os.remove(os.path.join(self.directory, name))
+
+
+def save_end_points(scene: "Scene", file_name: str) -> None:
+    """
+    Saves the start and end points of all walker as JSON
+    :param scene: the calculated scene
+    :param file_name: the file to be created
+    """
+    with open(file_name, "w") as outfile:
+        json.dump(
+            {
+                "walking_time": scene.walking_time,
+                "walking_speeds": scene.walking_speeds.tolist(),
+                "start_points": scene.start_points.tolist(),
+                "end_points": scene.end_points.tolist(),
+            },
+            outfile,
+        )
+
+
+def save_first_passage(passage: FirstPassage, file_name: str) -> None:
+    """
+    Saves when and where each walker first hit a target as CSV with one row per walker.
+        Walker which didn't hit it have the step -1 and the time nan
+    :param passage: the hitting times and positions, see first_passage
+    :param file_name: the file to be created
+    """
+    np.savetxt(
+        file_name,
+        np.column_stack(
+            [
+                np.arange(len(passage.steps)),
+                passage.steps,
+                passage.times,
+                passage.positions,
+            ]
+        ),
+        fmt=["%d", "%d", "%g", "%d", "%d"],
+        delimiter=",",
+        header="walker,step,time,x,y",
+        comments="",
+    )
+
+
+def walk_with_checkpoints(
+    file_name: str,
+    walking_time: int,
+    walking_speeds: list,
+    interval: int = None,
+    seed: int = None,
+    landscape: Landscape = None,
+) -> "Scene":
+    """
+    Creates a scene and walks it interval by interval, saving a checkpoint after each.
+        If the checkpoint exists, the walk continues from it instead, e.g. after the job
+        was stopped or to walk a saved scene for a longer time. The walker start and
+        walk like the walker of create_scene, so the scene does not depend on the
+        interval
+    :param file_name: the checkpoint file, see Scene.save_checkpoint
+    :param walking_time: the time the walker walk in total
+    :param walking_speeds: the speed of each walker, see create_scene
+    :param interval: the time walked between two checkpoints. By default, the
+        checkpoint is only saved at the end
+    :param seed: the seed of a new scene
+    :param landscape: the landscape a new scene walks in
+    :return: the scene
+    """
+    interval = interval or walking_time
+    assert interval >= 1, "The interval must be at least 1. You stated {}".format(
+        interval
+    )
+    if os.path.exists(file_name):
+        scene = Scene.load_checkpoint(file_name)
+        assert np.array_equal(
+            scene.walking_speeds, walking_speeds
+        ), "The checkpoint '{}' holds other walker".format(file_name)
+        assert (
+            scene.walking_time <= walking_time
+        ), "The walker of the checkpoint '{}' already walked for {}".format(
+            file_name, scene.walking_time
+        )
+    else:
+        check_walker(walking_time, walking_speeds)
+        # the start points are drawn for the whole walk like create_scene does and the
+        # walker start with room for all their steps, before walking the first interval
+        scene = Scene(walking_time, walking_speeds, seed, landscape)
+        scene.walking_time = 0
+        scene.number_of_steps = np.ones(len(scene), dtype=np.int64)
+    while scene.walking_time < walking_time:
+        scene.extend(min(interval, walking_time - scene.walking_time))
+        scene.save_checkpoint(file_name)
+    return scene
+
+
+def parse_arguments(arguments: list = None) -> argparse.Namespace:
+    """
+    Reads in the specifications defined by the user
+    :param arguments: the command line arguments. If None, they are taken from sys.argv
+    :return: the namespace holding the specifications
+    """
+    parser = argparse.ArgumentParser(
+        description="A random walk simulation for multiple walker",
+        epilog="The number of walker and the walking time must be positive & at least "
+        "1. Example: 'python walker.py 1000 2 1 1 ./TheRoutesOfMyWalker.png'",
+    )
+    parser.add_argument("walking_time", type=int, help="the time each walker walks")
+    parser.add_argument(
+        "number_of_usual_walker", type=int, help="the number of walker at usual speed"
+    )
+    parser.add_argument(
+        "number_of_fast_walker", type=int, help="the number of walker walking fast"
+    )
+    parser.add_argument(
+        "number_of_running_walker", type=int, help="the number of running walker"
+    )
+    parser.add_argument(
+        "outfile_name",
+        nargs="?",
+        default=None,
+        help="the image to be created: path_to_output/filename.png. With --no-plot, "
+        "an optional JSON file the start and end points are saved to",
+    )
+    parser.add_argument(
+        "--speed-config",
+        default=None,
+        help="a JSON file holding further classes of walker with any integer speed, "
+        'e.g. {"cycling": {"speed": 8, "number": 2}}, which walk in addition to the '
+        "three usual classes",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="the number of processes the walker are split up to (default: 1)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="the seed of the simulation. The same seed leads to the same paths, "
+        "independent of the number of workers",
+    )
+    parser.add_argument(
+        "--trajectory-file",
+        default=None,
+        help="a binary file the paths are written to while they are calculated. It "
+        "can be opened again with load_trajectories",
+    )
+    parser.add_argument(
+        "--landscape",
+        default=None,
+        help="a JSON file holding a list of obstacles [xmin, xmax, ymin, ymax] all "
+        "walker walk in instead of their own buildings",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="calculate statistics over all walker without storing their paths and "
+        "save them as JSON to the outfile instead of plotting the paths",
+    )
+    parser.add_argument(
+        "--first-passage",
+        type=float,
+        default=None,
+        metavar="DISTANCE",
+        help="find when each walker first gets this far away from its start point and "
+        "save it as CSV to the outfile instead of plotting the paths. Each walker "
+        "stops walking as soon as it got this far",
+    )
+    parser.add_argument(
+        "--encounters",
+        default=None,
+        help="a CSV file the encounters of walker, who share or neighbour a cell at "
+        "the same time, are saved to. They are marked in the plot",
+    )
+    parser.add_argument(
+        "--render-mode",
+        choices=RENDER_MODES,
+        default="full",
+        help="'full' plots every coordinate, 'decimated' and 'density' reduce the "
+        "paths to the resolution of the image, 'heatmap' counts the visits of all "
+        "walker while walking and plots them in one image (default: full)",
+    )
+    parser.add_argument(
+        "--animate",
+        default=None,
+        help="a GIF file an animation of the walker walking their paths is saved to. "
+        "With another suffix, each frame is saved as an image next to it",
+    )
+    parser.add_argument(
+        "--frames",
+        type=int,
+        default=ANIMATION_FRAMES,
+        help="the largest number of frames of the animation, spread evenly over the "
+        "walking time (default: 200)",
+    )
+    parser.add_argument(
+        "--render-workers",
+        type=int,
+        default=1,
+        help="if more than 1, each walker is rendered into its own image by this "
+        "number of processes and the images are put together into the outfile",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="the directory of the cache of calculated scenes. Scenes with a seed are "
+        "taken from the cache, if they were calculated before (default: "
+        "~/.cache/random_walk)",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        default=None,
+        help="a .npz file the scene is saved to while walking. If it exists, the walk "
+        "continues from it, e.g. after the job was stopped or to walk a saved scene "
+        "for a longer time. The cache is not used",
+    )
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=int,
+        default=None,
+        help="save the checkpoint after each this much walking time (default: only "
+        "at the end)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="calculate the scene again and don't store it in the cache",
+    )
+    parser.add_argument(
+        "--clear-cache",
+        action="store_true",
+        help="delete all cached scenes before calculating the scene",
+    )
+    parser.add_argument(
+        "--profile",
+        default=None,
+        help="a JSON file a report of the time of each phase of the run, the number "
+        "of steps, rejected steps and allocated bytes is saved to",
+    )
+    parser.add_argument(
+        "--no-show",
+        action="store_true",
+        help="only save the image without showing it, e.g. on headless machines",
+    )
+    parser.add_argument(
+        "--no-plot",
+        action="store_true",
+        help="only calculate the scene, e.g. to fill the cache or write a trajectory "
+        "file, without loading any plotting library",
+    )
+    parsed_arguments = parser.parse_args(arguments)
+    if parsed_arguments.outfile_name is None and not parsed_arguments.no_plot:
+        parser.error("the outfile_name is required unless --no-plot is given")
+    if parsed_arguments.outfile_name is None and parsed_arguments.stats:
+        parser.error(
+            "the outfile_name is required with --stats, the statistics are saved to it"
+        )
+    # the paths of each walker get their own subplot, checked before walking
+    plotting_paths = parsed_arguments.first_passage is None and (
+        parsed_arguments.animate is not None
+        or (
+            not parsed_arguments.stats
+            and not parsed_arguments.no_plot
+            and parsed_arguments.render_mode != "heatmap"
+            and parsed_arguments.render_workers <= 1
+        )
+    )
+    if plotting_paths:
+        number_of_walker = (
+            parsed_arguments.number_of_usual_walker
+            + parsed_arguments.number_of_fast_walker
+            + parsed_arguments.number_of_running_walker
+        )
+        if parsed_arguments.speed_config is not None:
+            number_of_walker += len(load_speed_classes(parsed_arguments.speed_config))
+        if number_of_walker > 12:
+            parser.error(
+                "a maximum of 12 walker can be plotted or animated one by one. You "
+                "stated {}".format(number_of_walker)
+            )
+    return parsed_arguments
+
+
+def main():
+    """The main program. Assigns the user definitions, creates the scene and plots it"""
+    arguments = parse_arguments()
+    if arguments.profile is None:
+        run(arguments)
+        return
+    enable_profiling()
+    try:
+        run(arguments)
+    finally:
+        profiler.save(arguments.profile)
+        disable_profiling()
+
+
+def run(arguments: argparse.Namespace) -> None:
+    """
+    Creates the scene as specified by the user and plots it or saves its statistics
+    :param arguments: the namespace holding the specifications
+    """
+    landscape = None
+    if arguments.landscape is not None:
+        with open(arguments.landscape) as infile:
+            landscape = Landscape(json.load(infile))
+    walking_speeds = speeds_of_classes(
+        arguments.number_of_usual_walker,
+        arguments.number_of_fast_walker,
+        arguments.number_of_running_walker,
+    )
+    if arguments.speed_config is not None:
+        walking_speeds += load_speed_classes(arguments.speed_config)
+    if arguments.first_passage is not None:
+        passage = first_passage(
+            arguments.walking_time,
+            walking_speeds,
+            DistanceTarget(arguments.first_passage),
+            arguments.seed,
+            landscape,
+        )
+        if arguments.outfile_name is not None:
+            save_first_passage(passage, arguments.outfile_name)
+        print(
+            f"{np.count_nonzero(passage.hit)} of {len(walking_speeds)} walker got "
+            f"{arguments.first_passage:g} away from their start point"
+            + (
+                f", on average at time {np.mean(passage.times[passage.hit]):.1f}"
+                if passage.hit.any()
+                else ""
+            )
+        )
+        return
+    if arguments.clear_cache:
+        ResultCache(arguments.cache_dir).clear()
+    # only scenes with a seed are cached, without one the cache directory is not created
+    cache = (
+        ResultCache(arguments.cache_dir)
+        if arguments.seed is not None and not arguments.no_cache
+        else None
+    )
+    consumers = []
+    if arguments.stats:
+        statistics = EnsembleStatistics()
+        consumers.append(statistics)
+    if arguments.trajectory_file is not None:
+        consumers.append(TrajectoryWriter(arguments.trajectory_file))
+    detector = None
+    if arguments.encounters is not None:
+        detector = EncounterDetector()
+        consumers.append(detector)
+    heatmap = None
+    if (
+        arguments.render_mode == "heatmap"
+        and not arguments.stats
+        and not arguments.no_plot
+    ):
+        heatmap = OccupancyHeatmap()
+        consumers.append(heatmap)
+    if arguments.checkpoint is not None:
+        scene = walk_with_checkpoints(
+            arguments.checkpoint,
+            arguments.walking_time,
+            walking_speeds,
+            arguments.checkpoint_interval,
+            arguments.seed,
+            landscape,
+        )
+        scene.replay_paths(consumers)
+    else:
+        scene = create_scene(
+            arguments.walking_time,
+            walking_speeds,
+            workers=arguments.workers,
+            seed=arguments.seed,
+            consumers=consumers,
+            landscape=landscape,
+            # without storing them, the paths can only be passed on in one process
+            keep_paths=arguments.workers > 1
+            or arguments.animate is not None
+            or not (arguments.stats or heatmap is not None),
+            cache=cache,
+        )
+    encounters = None
+    if detector is not None:
+        detector.save(arguments.encounters)
+        encounters = detector.events
+    if arguments.animate is not None:
+        animate_the_paths(scene, arguments.animate, frames=arguments.frames)
+    if arguments.stats:
+        statistics.save(arguments.outfile_name)
+        summary = statistics.summary()
+        print(
+            f"{summary['number_of_walker']} walker, mean squared displacement at "
+            f"time {summary['times'][-1]}: "
+            f"{summary['mean_squared_displacement'][-1]:.1f}, "
+            f"{summary['flying_fraction']:.1%} took a plane"
+        )
+        return
+    if arguments.no_plot:
+        if arguments.outfile_name is not None:
+            save_end_points(scene, arguments.outfile_name)
+        return
+    if heatmap is not None:
+        plot_heatmap(
+            heatmap,
+            arguments.outfile_name,
+            show=not arguments.no_show,
+            encounters=encounters,
+        )
+    elif arguments.render_workers > 1:
+        render_walker_panels(
+            scene,
+            arguments.outfile_name,
+            workers=arguments.render_workers,
+            render_mode=arguments.render_mode,
+            landscape=landscape,
+            encounters=encounters,
+        )
+    else:
+        plot_the_paths(
+            scene,
+            arguments.outfile_name,
+            render_mode=arguments.render_mode,
+            show=not arguments.no_show,
+            encounters=encounters,
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,450 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""A long-running service calculating and plotting random walks for many short jobs"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import walker
+
+# the Unix socket the server listens on if no other address is given
+DEFAULT_SOCKET = os.path.join(
+    os.environ.get("XDG_RUNTIME_DIR") or "/tmp", "random_walk.sock"
+)
+# the largest number of jobs a worker calculates at once
+BATCH_SIZE = 16
+ACTIONS = ("simulate", "plot", "shutdown")
+
+
+def socket_in_use(socket_path: str) -> bool:
+    """
+    Checks whether a server is listening on a Unix socket
+    :param socket_path: the Unix socket
+    :return: True if a connection to the socket is accepted
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        try:
+            connection.connect(socket_path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            return False
+    return True
+
+
+def warm_up() -> None:
+    """
+    Imports the plotting libraries in a worker process, so the first plot does not pay
+        for it. This is executed in the worker processes when they start
+    """
+    walker.create_figure(False)
+
+
+def run_job(job: dict) -> dict:
+    """
+    Calculates the scene of a job and plots it, if it is a plot job
+    :param job: the request holding the action and the parameters of create_walker and
+        plot_the_paths
+    :return: the response holding the start and end points of the walker or the file
+        name of the plot
+    """
+    landscape = (
+        walker.Landscape(job["landscape"]) if job.get("landscape") is not None else None
+    )
+    cache = (
+        walker.ResultCache(job["cache_dir"])
+        if job.get("cache_dir") is not None
+        else None
+    )
+    scene = walker.create_walker(
+        job["walking_time"],
+        job["number_of_usual_walker"],
+        job["number_of_fast_walker"],
+        job["number_of_running_walker"],
+        engine=job.get("engine", "vectorized"),
+        seed=job.get("seed"),
+        landscape=landscape,
+        cache=cache,
+    )
+    if job["action"] == "plot":
+        walker.plot_the_paths(
+            scene,
+            job["outfile_name"],
+            render_mode=job.get("render_mode", "full"),
+            show=False,
+        )
+        return {"outfile_name": os.path.abspath(job["outfile_name"])}
+    return {
+        "start_points": scene.start_points.tolist(),
+        "end_points": scene.end_points.tolist(),
+    }
+
+
+def run_batch(jobs: list) -> list:
+    """
+    Runs several jobs one after the other. This is executed in the worker processes
+    :param jobs: the requests of the jobs
+    :return: a list holding the response of each job. Failed jobs get their error
+        message instead of stopping the batch
+    """
+    responses = []
+    for job in jobs:
+        try:
+            response = {"status": "done", **run_job(job)}
+        except Exception as error:
+            response = {
+                "status": "error",
+                "message": f"{type(error).__name__}: {error}",
+            }
+        responses.append({"id": job.get("id"), **response})
+    return responses
+
+
+class SimulationServer:
+    """
+    Accepts jobs from clients and runs them in a pool of worker processes which stay
+        alive between the jobs, with all libraries already imported. Clients send one
+        JSON request per line and get one JSON response per line: first that the job
+        is queued and then its result. The queued jobs are split up between all free
+        workers in batches, so short jobs do not wait for a process each.
+    """
+
+    def __init__(
+        self,
+        socket_path: str = DEFAULT_SOCKET,
+        port: int = None,
+        workers: int = 1,
+        batch_size: int = BATCH_SIZE,
+        cache_dir: str = None,
+    ):
+        """
+        :param socket_path: the Unix socket the server listens on
+        :param port: if given, the server listens on this port of localhost instead
+        :param workers: the number of worker processes
+        :param batch_size: the largest number of jobs passed to a worker at once
+        :param cache_dir: if given, the scenes of jobs with a seed are cached there
+        """
+        self.socket_path = socket_path
+        self.port = port
+        self.workers = workers
+        self.batch_size = batch_size
+        self.cache_dir = cache_dir
+        self.queue = None
+        self.free_workers = None
+        self.stopped = None
+        self.server = None
+
+    async def serve(self, started: asyncio.Event = None) -> None:
+        """
+        Runs the server until a client sends a shutdown request. A socket file left
+            behind by a server which stopped is replaced, but the socket of a running
+            server is not taken over
+        :param started: an event which is set as soon as clients can connect
+        :raises RuntimeError: if another server is listening on the Unix socket
+        """
+        if self.port is None and os.path.exists(self.socket_path):
+            if socket_in_use(self.socket_path):
+                raise RuntimeError(
+                    "Another server is listening on {}".format(self.socket_path)
+                )
+            os.remove(self.socket_path)
+        self.queue = asyncio.Queue()
+        self.free_workers = asyncio.Semaphore(self.workers)
+        self.stopped = asyncio.Event()
+        with ProcessPoolExecutor(
+            max_workers=self.workers, initializer=warm_up
+        ) as executor:
+            # starts all workers before any client connects, so the first jobs do not
+            # wait for them and they do not inherit the connections to the clients
+            await asyncio.gather(
+                *(
+                    asyncio.get_running_loop().run_in_executor(executor, os.getpid)
+                    for _ in range(self.workers)
+                )
+            )
+            if self.port is not None:
+                self.server = await asyncio.start_server(
+                    self.handle_client, "127.0.0.1", self.port
+                )
+            else:
+                self.server = await asyncio.start_unix_server(
+                    self.handle_client, self.socket_path
+                )
+            dispatcher = asyncio.create_task(self.dispatch(executor))
+            if started is not None:
+                started.set()
+            try:
+                async with self.server:
+                    await self.stopped.wait()
+            finally:
+                dispatcher.cancel()
+                if self.port is None and os.path.exists(self.socket_path):
+                    os.remove(self.socket_path)
+
+    async def dispatch(self, executor: ProcessPoolExecutor) -> None:
+        """
+        Passes the queued jobs to the workers. As soon as a worker is free and a job
+            is queued, the jobs queued in the meantime are split up evenly between all
+            free workers, up to the batch size each
+        :param executor: the pool of worker processes
+        """
+        while True:
+            await self.free_workers.acquire()
+            jobs = [await self.queue.get()]
+            # other workers may have got free while waiting for a job
+            free_workers = 1
+            while not self.free_workers.locked():
+                await self.free_workers.acquire()
+                free_workers += 1
+            while len(jobs) < free_workers * self.batch_size and not self.queue.empty():
+                jobs.append(self.queue.get_nowait())
+            number_of_batches = min(free_workers, len(jobs))
+            for _ in range(free_workers - number_of_batches):
+                self.free_workers.release()
+            size, remainder = divmod(len(jobs), number_of_batches)
+            first = 0
+            for number in range(number_of_batches):
+                last = first + size + (number < remainder)
+                asyncio.create_task(self.run_jobs(executor, jobs[first:last]))
+                first = last
+
+    async def run_jobs(self, executor: ProcessPoolExecutor, jobs: list) -> None:
+        """
+        Runs a batch of jobs in a worker and passes each response to its client. The
+            jobs report their own errors, if the batch fails as a whole each job gets
+            its error, so no client waits forever
+        :param executor: the pool of worker processes
+        :param jobs: a list of tuples of the request and the future of the response
+        """
+        try:
+            responses = await asyncio.get_running_loop().run_in_executor(
+                executor, run_batch, [request for request, _ in jobs]
+            )
+        except Exception as error:
+            # e.g. the worker process died (BrokenProcessPool) or the batch could not
+            # be passed to it, all jobs of the batch failed
+            responses = [
+                {
+                    "id": request.get("id"),
+                    "status": "error",
+                    "message": f"{type(error).__name__}: {error}",
+                }
+                for request, _ in jobs
+            ]
+        finally:
+            self.free_workers.release()
+        for (_, future), response in zip(jobs, responses):
+            future.set_result(response)
+
+    async def handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """
+        Reads the requests of a client and writes back the responses as soon as they
+            are ready. The connection is closed after the client stopped sending and
+            all its jobs are answered. A shutdown request stops the server afterwards
+        :param reader: the stream the requests are read from
+        :param writer: the stream the responses are written to
+        """
+        answers = []
+        stopping = False
+        while True:
+            request = None
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                request = json.loads(line)
+                assert isinstance(
+                    request, dict
+                ), "A request must be a JSON object. You stated '{}'".format(request)
+                assert (
+                    request.get("action") in ACTIONS
+                ), "The action must be one of {}. You stated '{}'".format(
+                    ACTIONS, request.get("action")
+                )
+            except (ValueError, AssertionError) as error:
+                identifier = request.get("id") if isinstance(request, dict) else None
+                self.respond(
+                    writer, {"id": identifier, "status": "error", "message": str(error)}
+                )
+                continue
+            if request["action"] == "shutdown":
+                self.respond(writer, {"id": request.get("id"), "status": "done"})
+                stopping = True
+                break
+            if self.cache_dir is not None:
+                request.setdefault("cache_dir", self.cache_dir)
+            future = asyncio.get_running_loop().create_future()
+            await self.queue.put((request, future))
+            self.respond(writer, {"id": request.get("id"), "status": "queued"})
+            answers.append(asyncio.create_task(self.answer(writer, future)))
+        await asyncio.gather(*answers)
+        await writer.drain()
+        writer.close()
+        await writer.wait_closed()
+        if stopping:
+            self.stopped.set()
+
+    async def answer(self, writer: asyncio.StreamWriter, future: asyncio.Future):
+        """
+        Writes the response of a job as soon as it is ready
+        :param writer: the stream of the client
+        :param future: the future of the response
+        """
+        self.respond(writer, await future)
+        await writer.drain()
+
+    @staticmethod
+    def respond(writer: asyncio.StreamWriter, response: dict) -> None:
+        """
+        Writes a response as one line of JSON
+        :param writer: the stream of the client
+        :param response: the response
+        """
+        writer.write(json.dumps(response).encode() + b"\n")
+
+
+def submit(requests: list, socket_path: str = DEFAULT_SOCKET, port: int = None):
+    """
+    Sends requests to a running server and yields the responses as they arrive
+    :param requests: a list of requests, each a dictionary holding the action and the
+        parameters of create_walker and plot_the_paths
+    :param socket_path: the Unix socket of the server
+    :param port: if given, the server is reached on this port of localhost instead
+    :return: a generator yielding each response
+    """
+    if port is not None:
+        connection = socket.create_connection(("127.0.0.1", port))
+    else:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(socket_path)
+    with connection:
+        for number, request in enumerate(requests):
+            request.setdefault("id", number)
+            connection.sendall(json.dumps(request).encode() + b"\n")
+        connection.shutdown(socket.SHUT_WR)
+        with connection.makefile("r") as responses:
+            for line in responses:
+                yield json.loads(line)
+
+
+def parse_arguments(arguments: list = None) -> argparse.Namespace:
+    """
+    Reads in the specifications defined by the user
+    :param arguments: the command line arguments. If None, they are taken from sys.argv
+    :return: the namespace holding the specifications
+    """
+    parser = argparse.ArgumentParser(
+        description="A service calculating and plotting random walks",
+        epilog="Example: 'python walker_server.py serve --workers 4' and then "
+        "'python walker_server.py submit 1000 2 1 1 ./TheRoutesOfMyWalker.png'",
+    )
+    parser.add_argument(
+        "--socket",
+        default=DEFAULT_SOCKET,
+        help=f"the Unix socket of the server (default: {DEFAULT_SOCKET})",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=None,
+        help="use this port of localhost instead of the Unix socket",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="run the server")
+    serve.add_argument(
+        "--workers", type=int, default=1, help="the number of worker processes"
+    )
+    serve.add_argument(
+        "--batch-size",
+        type=int,
+        default=BATCH_SIZE,
+        help="the largest number of jobs a worker gets at once "
+        f"(default: {BATCH_SIZE})",
+    )
+    serve.add_argument(
+        "--cache-dir",
+        default=None,
+        help="cache the scenes of jobs with a seed in this directory",
+    )
+    job = commands.add_parser(
+        "submit",
+        help="send a job to the server and print the responses as JSON lines",
+    )
+    job.add_argument("walking_time", type=int, help="the time each walker walks")
+    job.add_argument("number_of_usual_walker", type=int)
+    job.add_argument("number_of_fast_walker", type=int)
+    job.add_argument("number_of_running_walker", type=int)
+    job.add_argument(
+        "outfile_name",
+        nargs="?",
+        default=None,
+        help="the image to be created. Without it, the start and end points are "
+        "returned",
+    )
+    job.add_argument("--seed", type=int, default=None, help="the seed of the scene")
+    job.add_argument("--engine", choices=walker.ENGINES, default="vectorized")
+    job.add_argument("--render-mode", choices=walker.RENDER_MODES, default="full")
+    job.add_argument(
+        "--landscape",
+        default=None,
+        help="a JSON file holding a list of obstacles [xmin, xmax, ymin, ymax]",
+    )
+    commands.add_parser("shutdown", help="stop the server")
+    return parser.parse_args(arguments)
+
+
+def main(arguments: list = None) -> int:
+    """
+    The main program. Runs the server or sends a job to it
+    :param arguments: the command line arguments. If None, they are taken from sys.argv
+    :return: the exit code, 1 if a job failed
+    """
+    arguments = parse_arguments(arguments)
+    if arguments.command == "serve":
+        server = SimulationServer(
+            arguments.socket,
+            arguments.port,
+            arguments.workers,
+            arguments.batch_size,
+            arguments.cache_dir,
+        )
+        try:
+            asyncio.run(server.serve())
+        except KeyboardInterrupt:
+            pass
+        except RuntimeError as error:
+            print(error, file=sys.stderr)
+            return 1
+        return 0
+    if arguments.command == "shutdown":
+        request = {"action": "shutdown"}
+    else:
+        request = {
+            "action": "simulate" if arguments.outfile_name is None else "plot",
+            "walking_time": arguments.walking_time,
+            "number_of_usual_walker": arguments.number_of_usual_walker,
+            "number_of_fast_walker": arguments.number_of_fast_walker,
+            "number_of_running_walker": arguments.number_of_running_walker,
+            "outfile_name": arguments.outfile_name
+            and os.path.abspath(arguments.outfile_name),
+            "seed": arguments.seed,
+            "engine": arguments.engine,
+            "render_mode": arguments.render_mode,
+        }
+        if arguments.landscape is not None:
+            with open(arguments.landscape) as infile:
+                request["landscape"] = json.load(infile)
+    failed = False
+    for response in submit([request], arguments.socket, arguments.port):
+        print(json.dumps(response), flush=True)
+        failed = failed or response["status"] == "error"
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())